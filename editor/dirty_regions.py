@@ -0,0 +1,159 @@
+# editor/dirty_regions.py
+# 🧠 ЛОГИКА: показ кадра только изменившимися областями (pygame.display.update(rects))
+#
+# Редакторы рисуют кадр целиком (screen.fill + виджеты), но раньше и показывали его целиком
+# через flip() — даже когда на экране ничего не поменялось. На большом окне (4K) это лишнее
+# копирование всего буфера на каждом кадре.
+#
+# Виджеты, viewport и оверлеи сообщают о себе: report(ключ, rect, состояние).
+# Трекер сравнивает с прошлым кадром: поменялось состояние или rect — область грязная
+# (и старый rect тоже: виджет мог уехать). Виджет, который пропал, — грязный его старый rect.
+# present():
+# - ничего не грязно -> показ пропускается;
+# - немного областей -> display.update(rects);
+# - окно поменялось / областей слишком много -> flip().
+#
+# Показ идёт через output: по умолчанию pygame.display, у редактора сцены с "render_backend": "sdl2" —
+# editor/render_backend.py (те же flip() / update(rects), но в текстуры рендерера).
+#
+# ⚠️ Кадр в screen по-прежнему рисуется целиком, поэтому пропуск показа ничего не ломает,
+# если всё, что может поменяться, сообщает о себе (состояние = всё, от чего зависит картинка).
+
+from __future__ import annotations
+
+from typing import Any, Hashable
+
+import pygame
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+MAX_DIRTY_RECTS = 24        # 🔧 МОЖНО МЕНЯТЬ: больше областей — склеиваем в один общий rect
+FULL_PRESENT_RATIO = 0.6    # 🔧 МОЖНО МЕНЯТЬ: грязная площадь больше этой доли окна — просто flip()
+
+# 🧠 ЛОГИКА: события окна, после которых ОС могла потерять его содержимое — показываем всё
+_FULL_EVENTS = {
+    t
+    for t in (
+        getattr(pygame, name, None)
+        for name in (
+            "VIDEOEXPOSE",
+            "VIDEORESIZE",
+            "WINDOWEXPOSED",
+            "WINDOWSHOWN",
+            "WINDOWRESTORED",
+            "WINDOWMAXIMIZED",
+            "WINDOWRESIZED",
+            "WINDOWSIZECHANGED",
+            "WINDOWFOCUSGAINED",
+        )
+    )
+    if t is not None
+}
+
+
+class DirtyRegions:
+    """
+    🧠 ЛОГИКА:
+    prev/cur: {ключ виджета: (rect, состояние)} прошлого и текущего кадра.
+    rects:    грязные области текущего кадра; full — показать окно целиком.
+    """
+
+    def __init__(self) -> None:
+        self._prev: dict[Hashable, tuple[pygame.Rect, Any]] = {}
+        self._cur: dict[Hashable, tuple[pygame.Rect, Any]] = {}
+        self._rects: list[pygame.Rect] = []
+        self._full = True
+        self._screen: pygame.Surface | None = None
+        self._size: tuple[int, int] = (0, 0)
+        self.output: Any = None  # куда показывать: None — pygame.display, иначе объект с flip() / update(rects)
+
+        # для debug overlay
+        self.presented = 0
+        self.skipped = 0
+        self.last_rects = 0
+
+    # -----------------------------
+    # Кадр
+    # -----------------------------
+    def begin(self, screen: pygame.Surface) -> None:
+        """🧠 ЛОГИКА: начало кадра; новое окно (set_mode) или новый размер — показываем всё."""
+        size = screen.get_size()
+        if screen is not self._screen or size != self._size:
+            self._full = True
+        self._screen = screen
+        self._size = size
+
+    def handle_event(self, event: pygame.event.Event) -> None:
+        if event.type in _FULL_EVENTS:
+            self._full = True
+
+    def mark(self, rect) -> None:
+        """🧠 ЛОГИКА: явная грязная область (что-то нарисовано мимо report)."""
+        self._rects.append(pygame.Rect(rect))
+
+    def mark_all(self) -> None:
+        """🧠 ЛОГИКА: показать окно целиком (после модального окна, загрузки и т.п.)."""
+        self._full = True
+
+    def report(self, key: Hashable, rect, state: Any = None) -> None:
+        """
+        🧠 ЛОГИКА: виджет key нарисован в rect и выглядит как state (любое сравнимое значение).
+        Грязно, если в прошлом кадре было другое состояние/место или виджета не было.
+        """
+        rect = pygame.Rect(rect)
+        self._cur[key] = (rect, state)
+        prev = self._prev.get(key)
+        if prev is None:
+            self._rects.append(rect)
+            return
+        prev_rect, prev_state = prev
+        if prev_rect != rect:
+            self._rects.append(prev_rect)
+            self._rects.append(rect)
+        elif prev_state != state:
+            self._rects.append(rect)
+
+    # -----------------------------
+    # Показ
+    # -----------------------------
+    def present(self) -> bool:
+        """🧠 ЛОГИКА: показать грязные области кадра. False — показ пропущен (ничего не поменялось)."""
+        for key, (rect, _state) in self._prev.items():
+            if key not in self._cur:
+                self._rects.append(rect)  # ✅ виджет пропал — стираем его с экрана
+        self._prev = self._cur
+        self._cur = {}
+
+        rects = self._clip_rects()
+        full = self._full
+        self._full = False
+        self._rects = []
+
+        out = self.output if self.output is not None else pygame.display
+        if full:
+            out.flip()
+            self.last_rects = -1
+        elif rects:
+            out.update(rects)
+            self.last_rects = len(rects)
+        else:
+            self.skipped += 1
+            self.last_rects = 0
+            return False
+        self.presented += 1
+        return True
+
+    def _clip_rects(self) -> list[pygame.Rect]:
+        w, h = self._size
+        bounds = pygame.Rect(0, 0, w, h)
+        rects = [r.clip(bounds) for r in self._rects]
+        rects = [r for r in rects if r.width > 0 and r.height > 0]
+        if not rects:
+            return rects
+        if len(rects) > MAX_DIRTY_RECTS:
+            rects = [rects[0].unionall(rects[1:])]
+        area = sum(r.width * r.height for r in rects)
+        if w * h > 0 and area >= w * h * FULL_PRESENT_RATIO:
+            self._full = True  # ⚠️ почти всё окно — одним flip() дешевле
+        return rects
@@ -0,0 +1,177 @@
+# editor/draw_batch.py
+# 🧠 ЛОГИКА: пакетный вывод кадра — blit-ы копятся и уходят одним вызовом Surface.blits / fblits
+#
+# Раньше каждая сущность, подпись и строка интерфейса рисовались отдельным вызовом
+# pygame.draw.rect / screen.blit: на 10k+ элементах кадр тратит больше на сами вызовы
+# из Python, чем на пиксели. DrawBatch собирает пары (поверхность, место) и отдаёт их
+# целевой поверхности одним blits() (в pygame-ce — fblits(), он ещё быстрее).
+#
+# ✅ Залитые прямоугольники тоже идут пачкой: это blit куска заготовки нужного цвета
+# (paint_surface; крупный прямоугольник — несколькими кусками) — пиксели те же,
+# что у pygame.draw.rect(..., 0).
+# ✅ Рамки без скругления — 4 полосы той же заготовки (если рамка целиком внутри clip поверхности).
+# ✅ Порядок сохраняется: то, что в пачку не ложится (скругления, огромные/полупрозрачные
+# прямоугольники), сначала выталкивает накопленное (flush), потом рисуется как раньше.
+
+from __future__ import annotations
+
+from collections import OrderedDict
+
+import pygame
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+PAINT_SIZE = 256         # 🔧 МОЖНО МЕНЯТЬ: сторона заготовки цвета (крупнее — собирается из кусков)
+PAINT_MAX_PIECES = 4     # 🔧 МОЖНО МЕНЯТЬ: прямоугольник больше стольких кусков — рисуется напрямую
+PAINT_CACHE_COLORS = 32  # 🔧 МОЖНО МЕНЯТЬ: сколько заготовок цветов держать (LRU)
+
+_FBLITS_OK = hasattr(pygame.Surface, "fblits")  # pygame-ce
+
+Color = tuple[int, int, int]
+
+_PAINTS: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+
+
+def paint_surface(color: Color) -> pygame.Surface:
+    """🧠 ЛОГИКА: залитая цветом заготовка PAINT_SIZE x PAINT_SIZE (кусок её = прямоугольник этого цвета)."""
+    display = pygame.display.get_surface() is not None
+    key = (tuple(color), display)
+    surf = _PAINTS.get(key)
+    if surf is not None:
+        _PAINTS.move_to_end(key)
+        return surf
+    surf = pygame.Surface((PAINT_SIZE, PAINT_SIZE))
+    if display:
+        surf = surf.convert()  # ✅ формат экрана — blit без конвертации
+    surf.fill(color)
+    _PAINTS[key] = surf
+    while len(_PAINTS) > PAINT_CACHE_COLORS:
+        _PAINTS.popitem(last=False)
+    return surf
+
+
+class DrawBatch:
+    """
+    🧠 ЛОГИКА:
+    items: [(поверхность, место[, область])] в порядке рисования; flush() отдаёт их target.
+    Счётчики (для бенчмарка / профилирования): drawn — элементов, calls — вызовов blits.
+    """
+
+    def __init__(self, target: pygame.Surface) -> None:
+        self.target = target
+        self._items: list[tuple] = []
+        self._with_area = False
+        self._paints: dict = {}  # цвет -> заготовка (без поиска в общем кеше на каждый fill)
+
+        self.drawn = 0
+        self.calls = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __enter__(self) -> DrawBatch:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.flush()
+
+    # -----------------------------
+    # Накопление
+    # -----------------------------
+    def blit(self, source: pygame.Surface, dest, area=None) -> None:
+        """🧠 ЛОГИКА: как target.blit(source, dest, area), но в пачку."""
+        if area is None:
+            self._items.append((source, dest))
+        else:
+            self._items.append((source, dest, area))
+            self._with_area = True
+
+    def fill(self, color, rect) -> None:
+        """🧠 ЛОГИКА: как pygame.draw.rect(target, color, rect, 0)."""
+        r = rect if type(rect) is pygame.Rect else pygame.Rect(rect)
+        w = r.width
+        h = r.height
+        if w <= 0 or h <= 0:
+            return  # draw.rect тоже ничего не рисует
+        p = PAINT_SIZE
+        if w <= p and h <= p:
+            # ✅ частый случай (вызывается на каждую сущность) — без лишних проверок
+            try:
+                paint = self._paints.get(color)
+            except TypeError:  # список / pygame.Color — не ключ словаря
+                paint = None
+            if paint is not None:
+                self._items.append((paint, r, (0, 0, w, h)))
+                self._with_area = True
+                return
+        if len(color) != 3 or -(-w // p) * -(-h // p) > PAINT_MAX_PIECES:
+            # ⚠️ альфа-цвет / огромный прямоугольник — по-старому (после накопленного)
+            self.flush()
+            pygame.draw.rect(self.target, color, r, 0)
+            return
+        paint = self._paints[tuple(color)] = paint_surface(color)
+        if w <= p and h <= p:
+            self.blit(paint, r.topleft, (0, 0, w, h))
+            return
+        for y in range(r.y, r.bottom, p):
+            for x in range(r.x, r.right, p):
+                self.blit(paint, (x, y), (0, 0, min(p, r.right - x), min(p, r.bottom - y)))
+
+    def fill_many(self, color, xs, ys, ws, hs) -> None:
+        """🧠 ЛОГИКА: много fill одного цвета (координаты — списками): кортежи собираются одним проходом."""
+        if len(color) != 3:
+            for rect in zip(xs, ys, ws, hs):
+                self.fill(color, rect)
+            return
+        paint = self._paints.get(tuple(color))
+        if paint is None:
+            paint = self._paints[tuple(color)] = paint_surface(color)
+        p = PAINT_SIZE
+        items = self._items
+        for x, y, w, h in zip(xs, ys, ws, hs):
+            if w <= 0 or h <= 0:
+                continue
+            if w <= p and h <= p:
+                items.append((paint, (x, y), (0, 0, w, h)))
+            else:
+                self.fill(color, (x, y, w, h))
+        self._with_area = True
+
+    def rect(self, color, rect, width: int = 0) -> None:
+        """🧠 ЛОГИКА: как pygame.draw.rect(target, color, rect, width) без скругления."""
+        if width <= 0:
+            self.fill(color, rect)
+            return
+        r = pygame.Rect(rect)
+        if r.width <= 0 or r.height <= 0:
+            return
+        if 2 * width >= min(r.width, r.height):
+            self.fill(color, r)  # рамка толще половины — draw.rect заливает целиком
+            return
+        if len(color) != 3 or not self.target.get_clip().contains(r):
+            # ⚠️ рамка за краем поверхности / clip: draw.rect обрезает её по-своему — рисуем им же
+            self.flush()
+            pygame.draw.rect(self.target, color, r, width)
+            return
+        self.fill(color, (r.x, r.y, r.width, width))
+        self.fill(color, (r.x, r.bottom - width, r.width, width))
+        self.fill(color, (r.x, r.y + width, width, r.height - 2 * width))
+        self.fill(color, (r.right - width, r.y + width, width, r.height - 2 * width))
+
+    # -----------------------------
+    # Вывод
+    # -----------------------------
+    def flush(self) -> None:
+        """🧠 ЛОГИКА: отдать накопленное одним вызовом (fblits — только если ни у кого нет area)."""
+        items = self._items
+        if not items:
+            return
+        if _FBLITS_OK and not self._with_area:
+            self.target.fblits(items)
+        else:
+            self.target.blits(items, doreturn=False)
+        self.drawn += len(items)
+        self.calls += 1
+        self._items = []
+        self._with_area = False
@@ -48,6 +48,9 @@ from project_manager import (
 )
 
 from editor.scene_editor import run_scene_editor, scene_editor_init, scene_editor_step
+from editor.dirty_regions import DirtyRegions  # ✅ показ кадра только изменившимися областями
+from editor.draw_batch import DrawBatch  # ✅ пакетный вывод (один blits на много элементов)
+from editor.frame_pacer import FramePacer  # ✅ в простое — низкий FPS / ожидание события
 
 from engine_settings import load_settings, save_settings  # ✅ глобальные настройки
 
@@ -84,14 +87,16 @@ def _pm_set_external_events(events) -> None:
     _PM_EXTERNAL_EVENTS = events
 
 
-def _pm_get_events():
-    """Если события переданы извне — используем их один раз, иначе берём из pygame."""
+def _pm_get_events(pacer: FramePacer | None = None):
+    """Если события переданы извне — используем их один раз, иначе берём из pygame (через pacer, если есть)."""
     global _PM_EXTERNAL_EVENTS
     if _PM_EXTERNAL_EVENTS is not None:
         ev = _PM_EXTERNAL_EVENTS
         _PM_EXTERNAL_EVENTS = None
+        if pacer is not None and ev:
+            pacer.wake()
         return ev
-    return pygame.event.get()
+    return pacer.events() if pacer is not None else pygame.event.get()
 
 
 # ============================================================
@@ -143,10 +148,11 @@ class Project:
 
 def _draw_lines(screen, font, lines, x, y, color):
     yy = y  # 🔧 МОЖНО МЕНЯТЬ
-    for line in lines:
-        surf = font.render(line, True, color)
-        screen.blit(surf, (x, yy))
-        yy += surf.get_height() + 6  # 🔧 МОЖНО МЕНЯТЬ
+    with DrawBatch(screen) as out:
+        for line in lines:
+            surf = font.render(line, True, color)
+            out.blit(surf, (x, yy))
+            yy += surf.get_height() + 6  # 🔧 МОЖНО МЕНЯТЬ
 
 
 def _draw_button(screen, font, rect, text, mouse_pos):
@@ -778,6 +784,10 @@ def _project_manager_gen(
 
     # ✅ clock должен быть всегда, иначе упадём на clock.tick(fps)
     clock = pygame.time.Clock()
+    pacer = FramePacer(clock, engine_settings)  # ✅ без ввода и анимаций — не крутим полные FPS
+
+    # ✅ грязные области кадра: виджеты сообщают о себе, показываем только изменившееся
+    dirty = DirtyRegions()
 
     font = pygame.font.SysFont(None, DEFAULT_FONT_SIZE)
     title_font = pygame.font.SysFont(None, TITLE_FONT_SIZE)
@@ -868,6 +878,8 @@ def _project_manager_gen(
         _draw_dim_pause_overlay(overlay_text)
         result = fn(*args, **kwargs)
         _restore_pygame_focus()
+        dirty.mark_all()  # ✅ окно было перекрыто модалкой
+        pacer.wake()
         return result
 
     status_message = ""
@@ -1196,16 +1208,8 @@ def _project_manager_gen(
         try:
             if draw_loading_overlay is not None:
                 pygame.event.pump()
-                draw_loading_overlay(screen, 5, "Загрузка…", f"Сцена: {scene_path.name}")
-                pygame.display.flip()
-
-                draw_loading_overlay(screen, 35, "Загрузка…", "Чтение настроек окна")
-                pygame.display.flip()
-
-                draw_loading_overlay(screen, 70, "Загрузка…", "Подготовка редактора сцены")
-                pygame.display.flip()
-
-                draw_loading_overlay(screen, 100, "Загрузка…", "Запуск")
+                # 🧠 ЛОГИКА: реальный прогресс чтения сцены рисует сам редактор сцены (по кадрам)
+                draw_loading_overlay(screen, 0, "Загрузка…", f"Сцена: {scene_path.name}")
                 pygame.display.flip()
         except Exception:
             pass
@@ -1247,6 +1251,8 @@ def _project_manager_gen(
 
         # ✅ редактор сцены мог поменять fullscreen/windowed_maximized/размер — перечитываем settings
         engine_settings.update(load_settings())
+        pacer.configure(engine_settings)
+        pacer.wake()
 
         # ✅ применяем режим 1:1 как при старте менеджера (учитывает windowed_maximized + windowed_w/h)
         new_sig = (
@@ -1262,6 +1268,7 @@ def _project_manager_gen(
         fullscreen = bool(engine_settings.get("fullscreen", False))
 
         _update_exit_button()
+        dirty.mark_all()  # ✅ экран рисовал редактор сцены
 
         pygame.event.clear()
         pygame.event.pump()
@@ -1426,9 +1433,8 @@ def _project_manager_gen(
         # ✅ SCENE EDITOR MODE (step-режим внутри общего цикла)
         # ============================================================
         if mode == "scene" and scene_state is not None:
-            clock.tick(fps)
-            events = pygame.event.get()
-            action = scene_editor_step(scene_state, events=events)
+            # ✅ темп кадров и события — внутри редактора сцены (его FramePacer), здесь не тикаем второй раз
+            action = scene_editor_step(scene_state)
 
             if action == "quit":
                 force_quit(0)
@@ -1446,11 +1452,13 @@ def _project_manager_gen(
         # ============================================================
         # ✅ PROJECT MANAGER MODE
         # ============================================================
-        clock.tick(fps)
+        # ✅ занято: бейдж загрузки и пульсация кнопок выбранного проекта (анимация без ввода)
+        pacer.tick(fps, busy=pm_bootstrap_badge or selected_project_index is not None)
         mouse_pos = pygame.mouse.get_pos()
 
         win_w, win_h = screen.get_size()
         _update_exit_button()
+        dirty.begin(screen)
 
         # ✅ Запоминаем "оконный на весь экран" и размеры (только когда fullscreen выключен)
         now_ms = pygame.time.get_ticks()
@@ -1484,7 +1492,8 @@ def _project_manager_gen(
 
         all_projects = list_all_projects()
 
-        for event in _pm_get_events():
+        for event in _pm_get_events(pacer):
+            dirty.handle_event(event)
             if event.type == pygame.QUIT:
                 if _confirm_exit():
                     force_quit(0)
@@ -1648,6 +1657,16 @@ def _project_manager_gen(
         title_x = (win_w - title_w) // 2
         screen.blit(title_font.render(title_text, True, EDITOR_TEXT_COLOR), (title_x, TITLE_Y))
 
+        # ✅ грязные области: всё, что нарисовано в кадре, сообщает своё состояние
+        dirty.report(
+            "settings",
+            screen.get_rect(),
+            (settings_open, bool(engine_settings.get("fullscreen", False)), bool(engine_settings.get("debug_overlay", False))),
+        )
+        dirty.report("btn_exit", btn_exit, btn_exit.collidepoint(mouse_pos))
+        dirty.report("btn_settings", btn_settings, btn_settings.collidepoint(mouse_pos))
+        dirty.report("title", (title_x, TITLE_Y, title_w, title_font.get_height()), title_text)
+
         # ✅ Панель: "Менеджер проектов" + его кнопки
         mgr_left = UI_MARGIN_X
         mgr_top = manager_y - 8  # 🔧 МОЖНО МЕНЯТЬ: чуть выше заголовка
@@ -1676,6 +1695,11 @@ def _project_manager_gen(
         _draw_button(screen, font, btn_create, "Создать проект", mouse_pos)
         _draw_button(screen, font, btn_last_project, "Последний проект", mouse_pos)
         _draw_button(screen, font, btn_open_project, "Открыть проект", mouse_pos)
+        dirty.report(
+            "mgr_panel",
+            mgr_panel,
+            tuple(b.collidepoint(mouse_pos) for b in (btn_create, btn_last_project, btn_open_project)),
+        )
 
          # ✅ Панель: список проектов (заголовок + список + кнопки справа)
         list_left = PROJECT_LIST_X
@@ -1705,12 +1729,16 @@ def _project_manager_gen(
         )
 
         y = PROJECT_LIST_Y
+        list_hover = -1
         if all_projects:
+            out = DrawBatch(screen)  # ✅ все строки списка — одним blits
             for i, p in enumerate(all_projects):
                 item_rect = pygame.Rect(PROJECT_LIST_X, y, PROJECT_ITEM_W, PROJECT_ITEM_H)
 
                 # 🧠 ЛОГИКА: hover считается каждый кадр (стабильно, без залипаний)
                 is_hover = item_rect.collidepoint(mouse_pos)
+                if is_hover:
+                    list_hover = i
 
                 # 🧠 ЛОГИКА: фон элемента списка
                 if selected_project_index == i:
@@ -1720,23 +1748,28 @@ def _project_manager_gen(
                 else:
                     bg = PROJECT_ITEM_BG
 
-                pygame.draw.rect(screen, bg, item_rect)
+                out.fill(bg, item_rect)
 
                 # ✅ обводка hover (чтобы было прям очевидно “куда навёл”)
                 if (selected_project_index != i) and is_hover:
-                    pygame.draw.rect(
-                        screen,
+                    out.rect(
                         PROJECT_ITEM_HOVER_BORDER,
                         item_rect,
                         PROJECT_ITEM_HOVER_BORDER_W,
                     )
 
-                pygame.draw.rect(screen, BUTTON_BORDER_COLOR, item_rect, 1)
-                screen.blit(font.render(p.name, True, EDITOR_TEXT_COLOR), (item_rect.x + 10, item_rect.y + 6))
+                out.rect(BUTTON_BORDER_COLOR, item_rect, 1)
+                out.blit(font.render(p.name, True, EDITOR_TEXT_COLOR), (item_rect.x + 10, item_rect.y + 6))
 
                 y += PROJECT_ITEM_H + PROJECT_ITEM_GAP
+            out.flush()
         else:
             _draw_lines(screen, font, ["(пока пусто)"], x=PROJECT_LIST_X, y=PROJECT_LIST_Y, color=EDITOR_TEXT_COLOR)
+        dirty.report(
+            "list_panel",
+            list_panel,
+            (tuple(p.name for p in all_projects), selected_project_index, list_hover),
+        )
 
         if selected_project_index is not None and 0 <= selected_project_index < len(all_projects):
             open_sel_rect = _get_open_selected_button_rect(selected_project_index)
@@ -1763,6 +1796,8 @@ def _project_manager_gen(
             pygame.draw.rect(screen, BUTTON_BORDER_COLOR, delete_rect, BUTTON_BORDER_WIDTH)
             label_del = font.render("Удалить", True, BUTTON_TEXT_COLOR)  # 🔧 МОЖНО МЕНЯТЬ
             screen.blit(label_del, label_del.get_rect(center=delete_rect.center))
+            # ⚠️ кнопки пульсируют — грязные, пока проект выбран
+            dirty.report("sel_buttons", open_sel_rect.union(delete_rect), (open_bg, del_bg))
 
         line_h = font.get_height() + 6
         info_lines_count = 0
@@ -1785,6 +1820,11 @@ def _project_manager_gen(
 
         if status_message:
             _draw_lines(screen, font, [status_message], x=UI_MARGIN_X, y=status_y, color=EDITOR_HINT_COLOR)
+        dirty.report(
+            "info",
+            (0, info_y, win_w, win_h - info_y),
+            (info_lines_count, selected_project_path_text, selected_project_size_text, status_message),
+        )
 
         # ============================================================
         # ✅ DEBUG-OVERLAY (справа сверху + полупрозрачный фон)
@@ -1870,6 +1910,7 @@ def _project_manager_gen(
                 f"GPU load: {_fmt_pct(telemetry_gpu)}",
                 f"VRAM used: {_fmt_pct(telemetry_vram)}{vram_suffix}",
                 f"RAM used: {ram_suffix if ram_suffix else 'N/A'}",
+                f"Pacing: {pacer.status()}",
             ]
 
              # ====================================================
@@ -1944,12 +1985,14 @@ def _project_manager_gen(
 
             # Цвет индикатора для каждой строки
             line_colors = [
-                _grade_fps(fps_now),               # FPS
-                _grade_frame_ms(telemetry_frame_ms_smooth if telemetry_frame_ms_smooth is not None else frame_ms),        # Frame time
+                # в простое низкий FPS / долгий кадр — так и задумано (см. Pacing)
+                COLOR_NA if pacer.idle else _grade_fps(fps_now),               # FPS
+                COLOR_NA if pacer.idle else _grade_frame_ms(telemetry_frame_ms_smooth if telemetry_frame_ms_smooth is not None else frame_ms),        # Frame time
                 _grade_pct(telemetry_cpu_smooth), # CPU
                 _grade_pct(telemetry_gpu),        # GPU
                 _grade_pct(telemetry_vram),       # VRAM
                 _grade_pct(telemetry_ram_pct),    # RAM
+                COLOR_OK if pacer.enabled else COLOR_NA,  # Pacing
             ]
 
             surfaces = [font.render(t, True, TEXT_COLOR) for t in dbg]
@@ -1986,6 +2029,7 @@ def _project_manager_gen(
             # рисуем индикатор + текст
             # ------------------------------------------------
             y = box_y + PAD_Y
+            out = DrawBatch(screen)  # ✅ строки текста — одним blits (индикаторы со скруглением — напрямую, не пересекаются)
             for i, surf in enumerate(surfaces):
                 # индикатор
                 c = line_colors[i] if i < len(line_colors) else COLOR_NA
@@ -1995,11 +2039,12 @@ def _project_manager_gen(
 
                 # текст
                 text_x = ind_x + IND_SIZE + IND_GAP
-                screen.blit(surf, (text_x, y))
+                out.blit(surf, (text_x, y))
 
                 y += surf.get_height() + LINE_GAP
+            out.flush()
 
-
+            dirty.report("debug", (box_x, box_y, box_w, box_h), (tuple(dbg), tuple(line_colors)))
 
         if settings_open:
             _draw_dim_overlay_only(alpha=110)  # 🔧 МОЖНО МЕНЯТЬ: степень затемнения
@@ -2033,7 +2078,8 @@ def _project_manager_gen(
             label2 = font.render("Отладочная информация", True, EDITOR_TEXT_COLOR)
             screen.blit(label2, (debug_rect.right + 10, debug_rect.y - 2))
 
-        # ✅ 100% ровно на первом реальном кадре PM
+        # ✅ 100% ровно на первом реальном кадре PM (бейдж без rect — грязным считаем всё окно)
+        dirty.report("bootstrap_badge", screen.get_rect(), pm_bootstrap_badge)
         if pm_bootstrap_badge:
             try:
                 if draw_loading_badge is not None:
@@ -2044,7 +2090,7 @@ def _project_manager_gen(
                 pass
             pm_bootstrap_badge = False
 
-        pygame.display.flip()
+        dirty.present()
 
     pygame.quit()
 
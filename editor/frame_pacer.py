@@ -0,0 +1,100 @@
+# editor/frame_pacer.py
+# 🧠 ЛОГИКА: темп кадров с учётом простоя — редактор не крутит 60 FPS, когда ничего не происходит
+#
+# Раньше оба цикла (менеджер проектов и редактор сцены) делали clock.tick(fps) и рисовали
+# кадр 60 раз в секунду всегда — даже когда окно стоит за другими окнами и его никто не трогает.
+# Это целое ядро CPU на каждой машине с открытым DragonEngine.
+#
+# FramePacer.tick(fps, busy):
+# - недавно был ввод (любое событие) или что-то анимируется/грузится (busy) -> обычный clock.tick(fps);
+# - иначе (простой дольше idle_after_ms) -> pygame.event.wait(timeout): поток спит внутри SDL
+#   до первого события, но не дольше 1000 / idle_fps мс (таймеры: автосохранение, телеметрия).
+#
+# ✅ Ввод будит сразу: wait() возвращается на первом же событии, и цикл снова идёт на полных FPS.
+# ✅ Событие, разбудившее цикл, не теряется: events() отдаёт его первым, перед остальной очередью.
+# ✅ Настройки — в engine_settings: idle_pacing (вкл/выкл), idle_fps, idle_after_ms.
+
+from __future__ import annotations
+
+import pygame
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+IDLE_FPS = 5            # 🔧 МОЖНО МЕНЯТЬ: частота кадров в простое (если нет в engine_settings)
+IDLE_AFTER_MS = 750     # 🔧 МОЖНО МЕНЯТЬ: сколько без ввода, прежде чем уйти в простой
+
+
+class FramePacer:
+    """
+    🧠 ЛОГИКА:
+    last_activity — время последнего ввода / занятого кадра (pygame ticks, мс).
+    pending       — событие, которое пришло во время wait() (отдаётся первым в events()).
+    idle          — последний кадр был кадром простоя (для debug overlay).
+    """
+
+    def __init__(self, clock: pygame.time.Clock, settings: dict | None = None) -> None:
+        self.clock = clock
+        self.enabled = True
+        self.idle_fps = float(IDLE_FPS)
+        self.idle_after_ms = int(IDLE_AFTER_MS)
+        self.configure(settings or {})
+
+        self._pending: list[pygame.event.Event] = []
+        self._last_activity = pygame.time.get_ticks()
+        self.idle = False
+        self.idle_frames = 0
+
+    def configure(self, settings: dict) -> None:
+        """🧠 ЛОГИКА: параметры из engine_settings (кривые значения — дефолты модуля)."""
+        self.enabled = bool(settings.get("idle_pacing", True))
+        try:
+            self.idle_fps = max(1.0, float(settings.get("idle_fps", IDLE_FPS)))
+        except (TypeError, ValueError):
+            self.idle_fps = float(IDLE_FPS)
+        try:
+            self.idle_after_ms = max(0, int(settings.get("idle_after_ms", IDLE_AFTER_MS)))
+        except (TypeError, ValueError):
+            self.idle_after_ms = int(IDLE_AFTER_MS)
+
+    def wake(self) -> None:
+        """🧠 ЛОГИКА: считать этот момент активностью (после модального окна, смены режима и т.п.)."""
+        self._last_activity = pygame.time.get_ticks()
+
+    # -----------------------------
+    # Кадр
+    # -----------------------------
+    def tick(self, fps: int, busy: bool = False) -> int:
+        """🧠 ЛОГИКА: вместо clock.tick(fps). Возвращает мс с прошлого кадра (как clock.tick)."""
+        now = pygame.time.get_ticks()
+        if busy:
+            self._last_activity = now
+        self.idle = self.enabled and (now - self._last_activity) >= self.idle_after_ms
+        if not self.idle:
+            return self.clock.tick(fps)
+
+        # ✅ простой: спим до события, но не дольше кадра idle_fps
+        event = pygame.event.wait(max(1, int(1000.0 / self.idle_fps)))
+        if event.type != pygame.NOEVENT:
+            self._pending.append(event)
+            self._last_activity = pygame.time.get_ticks()
+        self.idle_frames += 1
+        return self.clock.tick()  # без ограничения: только обновить get_fps()/get_time()
+
+    def events(self) -> list[pygame.event.Event]:
+        """🧠 ЛОГИКА: вместо pygame.event.get(): событие из wait() + очередь; любое событие = активность."""
+        events = pygame.event.get()
+        if self._pending:
+            events = self._pending + events
+            self._pending = []
+        if events:
+            self._last_activity = pygame.time.get_ticks()
+        return events
+
+    def status(self) -> str:
+        """🧠 ЛОГИКА: строка для debug overlay."""
+        if not self.enabled:
+            return "off"
+        if self.idle:
+            return f"idle (<= {self.idle_fps:.0f} FPS)"
+        return "active"
@@ -0,0 +1,105 @@
+# editor/label_cache.py
+# 🧠 ЛОГИКА: кеш отрисованных подписей (font.render) для viewport и оверлеев
+#
+# Растеризация текста — самый дорогой вызов кадра: раньше подпись id каждой сущности
+# рендерилась заново на каждом кадре. Теперь поверхность подписи создаётся один раз
+# и переиспользуется, пока текст, шрифт и цвет те же.
+#
+# ✅ Ключ — (текст, шрифт, цвет): сменился id сущности -> другой текст -> другая подпись,
+# устаревшая просто перестаёт запрашиваться и вытесняется (или сразу — через discard()).
+# ✅ Размер кеша ограничен суммарным объёмом поверхностей в байтах, вытеснение — LRU.
+# ✅ В установившемся кадре (камера стоит / двигается по уже виденным сущностям) текст не растеризуется.
+
+from __future__ import annotations
+
+from collections import OrderedDict
+
+import pygame
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+LABEL_CACHE_BYTES = 8 * 1024 * 1024  # 🔧 МОЖНО МЕНЯТЬ: предел суммарного размера поверхностей (~20k коротких подписей)
+
+Color = tuple[int, int, int]
+
+
+def _surface_bytes(surf: pygame.Surface) -> int:
+    return surf.get_pitch() * surf.get_height()
+
+
+class LabelCache:
+    """
+    🧠 ЛОГИКА:
+    items: OrderedDict{(текст, шрифт, цвет): поверхность} — порядок = давность использования
+    (в конце — самые свежие). Шрифт в ключе — сам объект pygame.font.Font (другой размер = другой шрифт).
+    """
+
+    def __init__(self, max_bytes: int = LABEL_CACHE_BYTES) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self._items: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+        self._bytes = 0
+
+        # для debug overlay / профилирования
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def render(self, font: pygame.font.Font, text: str, color: Color) -> pygame.Surface:
+        """🧠 ЛОГИКА: как font.render(text, True, color), но из кеша, если такая подпись уже была."""
+        key = (text, font, tuple(color))
+        items = self._items
+        surf = items.get(key)
+        if surf is not None:
+            items.move_to_end(key)
+            self.hits += 1
+            return surf
+
+        self.misses += 1
+        surf = font.render(text, True, color)
+        if pygame.display.get_surface() is not None:
+            surf = surf.convert_alpha()  # ✅ формат экрана — blit без конвертации на каждом кадре
+        size = _surface_bytes(surf)
+        if size > self.max_bytes:
+            return surf  # ⚠️ подпись больше всего кеша — не кешируем
+        items[key] = surf
+        self._bytes += size
+        self._evict()
+        return surf
+
+    def _evict(self) -> None:
+        items = self._items
+        while self._bytes > self.max_bytes and items:
+            _key, surf = items.popitem(last=False)
+            self._bytes -= _surface_bytes(surf)
+            self.evictions += 1
+
+    def discard(self, text: str) -> None:
+        """🧠 ЛОГИКА: забыть все подписи с этим текстом (id сущности сменился / сущность удалена)."""
+        stale = [k for k in self._items if k[0] == text]
+        for k in stale:
+            self._bytes -= _surface_bytes(self._items.pop(k))
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._bytes = 0
+
+
+# ============================================================
+# ✅ Общий кеш редактора (viewport и служебные подписи)
+# ============================================================
+_DEFAULT: LabelCache | None = None
+
+
+def label_cache() -> LabelCache:
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = LabelCache()
+    return _DEFAULT
@@ -0,0 +1,257 @@
+# editor/minimap.py
+# 🧠 ЛОГИКА: миникарта сцены — обзор всей сцены по сетке плотности, а не перерисовка сущностей
+#
+# Мир (границы всех сущностей + запас) делится на клетки обзора: MINIMAP_RES клеток по длинной
+# стороне. Для каждой клетки хранится, сколько центров сущностей в неё попадает (counts, NumPy).
+# Картинка миникарты = раскраска counts (логарифм плотности), растянутая до панели —
+# её стоимость зависит от MINIMAP_RES, а не от числа сущностей.
+#
+# ✅ Инкрементально: SceneViewport сообщает о каждом изменении своего пространственного хеша
+# (добавили / удалили / сдвинули — update / discard по ключу хеша). Клетка каждого ключа
+# запомнена (cell_of), поэтому сдвиг = "-1 в старой клетке, +1 в новой" без пересчёта всего.
+# ✅ Полный пересчёт (reset) — только при перестройке хеша или когда сущность ушла за границы обзора.
+# ✅ Сцена из клеток мира (engine/scene_chunks.py): обзор строится по числу сущностей в клетках
+# манифеста (set_cells) — видно весь мир, а не только загруженное вокруг камеры.
+#
+# Клик по миникарте переносит камеру viewport в эту точку (SceneViewport.center_on).
+
+from __future__ import annotations
+
+import math
+
+import pygame
+
+try:
+    import numpy as np  # type: ignore
+
+    _NP_OK = True
+except Exception:
+    np = None  # type: ignore[assignment]
+    _NP_OK = False
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+MINIMAP_RES = 128                   # 🔧 МОЖНО МЕНЯТЬ: клеток обзора по длинной стороне мира
+MINIMAP_MARGIN = 0.1                # 🔧 МОЖНО МЕНЯТЬ: запас вокруг сущностей (доля размера мира)
+MINIMAP_EMPTY_WORLD = (0.0, 0.0, 1024.0, 1024.0)  # границы обзора пустой сцены
+MINIMAP_BG = (14, 15, 20)
+MINIMAP_BORDER = (120, 130, 170)
+MINIMAP_LOW = (40, 60, 110)         # 🔧 МОЖНО МЕНЯТЬ: цвет самой разреженной клетки
+MINIMAP_HIGH = (235, 235, 240)      # 🔧 МОЖНО МЕНЯТЬ: цвет самой плотной клетки
+MINIMAP_VIEW = (255, 210, 120)      # рамка видимой области viewport
+
+Bounds = tuple[float, float, float, float]  # x0, y0, x1, y1
+
+
+class Minimap:
+    """
+    🧠 ЛОГИКА:
+    world:   (x0, y0, x1, y1) — какую часть мира показывает обзор.
+    counts:  int32 [rows, cols] — центров сущностей в клетке.
+    cell_of: int64 [ключ] — плоский номер клетки ключа (-1 — ключа нет). Ключи хеша viewport —
+             небольшие неотрицательные целые (handle строки EntityStore / номер в списке).
+    version: растёт при любом изменении counts (для кеша картинки и dirty regions).
+    stale:   сущность ушла за границы обзора — нужен reset (viewport сделает его в draw).
+    """
+
+    def __init__(self, res: int = MINIMAP_RES) -> None:
+        self.res = max(8, int(res))
+        self.world: Bounds = MINIMAP_EMPTY_WORLD
+        self.cell = 1.0
+        self.cols = 1
+        self.rows = 1
+        self.counts = np.zeros((1, 1), dtype=np.int32) if _NP_OK else None
+        self.cell_of = np.full(0, -1, dtype=np.int64) if _NP_OK else None
+        self.version = 0
+        self.stale = True  # ещё ничего не посчитано
+        self.resets = 0
+
+        self._image: pygame.Surface | None = None
+        self._image_key: tuple | None = None
+
+    @property
+    def available(self) -> bool:
+        return _NP_OK
+
+    # -----------------------------
+    # Сетка обзора
+    # -----------------------------
+    def _set_world(self, x0: float, y0: float, x1: float, y1: float) -> None:
+        w = max(1.0, x1 - x0)
+        h = max(1.0, y1 - y0)
+        self.cell = max(w, h) / self.res
+        self.cols = max(1, math.ceil(w / self.cell))
+        self.rows = max(1, math.ceil(h / self.cell))
+        self.world = (x0, y0, x0 + self.cols * self.cell, y0 + self.rows * self.cell)
+        self.counts = np.zeros((self.rows, self.cols), dtype=np.int32)
+
+    def _cells(self, x0, y0, x1, y1):
+        """🧠 ЛОГИКА (векторно): bounds -> плоский номер клетки центра (за границей — крайняя клетка + stale)."""
+        cx = np.floor(((np.asarray(x0, dtype=np.float64) + x1) * 0.5 - self.world[0]) / self.cell).astype(np.int64)
+        cy = np.floor(((np.asarray(y0, dtype=np.float64) + y1) * 0.5 - self.world[1]) / self.cell).astype(np.int64)
+        inside = (cx >= 0) & (cx < self.cols) & (cy >= 0) & (cy < self.rows)
+        if not inside.all():
+            self.stale = True
+            np.clip(cx, 0, self.cols - 1, out=cx)
+            np.clip(cy, 0, self.rows - 1, out=cy)
+        return cy * self.cols + cx
+
+    def _ensure_keys(self, max_key: int) -> None:
+        n = len(self.cell_of)
+        if max_key < n:
+            return
+        grown = np.full(max(max_key + 1, 2 * n, 1024), -1, dtype=np.int64)
+        grown[:n] = self.cell_of
+        self.cell_of = grown
+
+    # -----------------------------
+    # Данные (сущности по ключам хеша viewport)
+    # -----------------------------
+    def reset(self, keys, x0, y0, x1, y1) -> None:
+        """🧠 ЛОГИКА: полный пересчёт: границы обзора по всем bounds + плотность одним bincount."""
+        if not _NP_OK:
+            return
+        keys = np.asarray(keys, dtype=np.int64)
+        x0 = np.asarray(x0, dtype=np.float64)
+        y0 = np.asarray(y0, dtype=np.float64)
+        x1 = np.asarray(x1, dtype=np.float64)
+        y1 = np.asarray(y1, dtype=np.float64)
+        if len(keys):
+            wx0, wy0, wx1, wy1 = float(x0.min()), float(y0.min()), float(x1.max()), float(y1.max())
+            pad = max(wx1 - wx0, wy1 - wy0) * MINIMAP_MARGIN + 1.0
+            self._set_world(wx0 - pad, wy0 - pad, wx1 + pad, wy1 + pad)
+        else:
+            self._set_world(*MINIMAP_EMPTY_WORLD)
+
+        self.stale = False
+        self.cell_of = np.full(int(keys.max()) + 1 if len(keys) else 0, -1, dtype=np.int64)
+        cells = self._cells(x0, y0, x1, y1)
+        self.cell_of[keys] = cells
+        self.counts = np.bincount(cells, minlength=self.rows * self.cols).astype(np.int32).reshape(self.rows, self.cols)
+        self.version += 1
+        self.resets += 1
+
+    def update(self, keys, x0, y0, x1, y1) -> None:
+        """🧠 ЛОГИКА: ключи добавлены или сдвинуты: -1 в старой клетке (если была), +1 в новой."""
+        if not _NP_OK:
+            return
+        keys = np.asarray(keys, dtype=np.int64)
+        if not len(keys):
+            return
+        self._ensure_keys(int(keys.max()))
+        flat = self.counts.reshape(-1)
+        old = self.cell_of[keys]
+        np.subtract.at(flat, old[old >= 0], 1)
+        new = self._cells(x0, y0, x1, y1)
+        np.add.at(flat, new, 1)
+        self.cell_of[keys] = new
+        self.version += 1
+
+    def discard(self, keys) -> None:
+        """🧠 ЛОГИКА: ключи удалены из хеша (сущность удалена или больше не выбирается мышью)."""
+        if not _NP_OK:
+            return
+        keys = np.asarray(keys, dtype=np.int64)
+        keys = keys[keys < len(self.cell_of)]
+        old = self.cell_of[keys]
+        np.subtract.at(self.counts.reshape(-1), old[old >= 0], 1)
+        self.cell_of[keys] = -1
+        self.version += 1
+
+    def set_cells(self, counts: dict[tuple[int, int], int], cell_size: int) -> None:
+        """
+        🧠 ЛОГИКА: обзор сцены из клеток мира: {(cx, cy): число сущностей}, клетка = cell_size.
+        Одна клетка мира — одна клетка обзора (их немного: это манифест, а не сущности).
+        """
+        if not _NP_OK:
+            return
+        cs = float(max(1, int(cell_size)))
+        if counts:
+            xs = [k[0] for k in counts]
+            ys = [k[1] for k in counts]
+            cx0, cy0 = min(xs) - 1, min(ys) - 1  # запас в клетку с каждой стороны
+            cols, rows = max(xs) - cx0 + 2, max(ys) - cy0 + 2
+        else:
+            cx0, cy0, cols, rows = 0, 0, 1, 1
+        self.cell = cs
+        self.cols = cols
+        self.rows = rows
+        self.world = (cx0 * cs, cy0 * cs, (cx0 + cols) * cs, (cy0 + rows) * cs)
+        grid = np.zeros((rows, cols), dtype=np.int32)
+        for (cx, cy), n in counts.items():
+            grid[cy - cy0, cx - cx0] = n
+        self.counts = grid
+        self.cell_of = np.full(0, -1, dtype=np.int64)
+        self.stale = False
+        self.version += 1
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum()) if _NP_OK else 0
+
+    # -----------------------------
+    # Координаты панели
+    # -----------------------------
+    def image_rect(self, rect: pygame.Rect) -> pygame.Rect:
+        """🧠 ЛОГИКА: где внутри панели лежит картинка обзора (пропорции мира сохраняются)."""
+        inner = rect.inflate(-4, -4)
+        if inner.width <= 0 or inner.height <= 0:
+            return pygame.Rect(rect.center, (0, 0))
+        scale = min(inner.width / self.cols, inner.height / self.rows)
+        w = max(1, int(self.cols * scale))
+        h = max(1, int(self.rows * scale))
+        return pygame.Rect(inner.x + (inner.width - w) // 2, inner.y + (inner.height - h) // 2, w, h)
+
+    def world_at(self, rect: pygame.Rect, screen_pos: tuple[int, int]) -> tuple[float, float] | None:
+        """🧠 ЛОГИКА: точка мира под курсором (None — курсор не над картинкой обзора)."""
+        img = self.image_rect(rect)
+        if not img.collidepoint(screen_pos):
+            return None
+        x0, y0, x1, y1 = self.world
+        wx = x0 + (screen_pos[0] - img.x + 0.5) / img.width * (x1 - x0)
+        wy = y0 + (screen_pos[1] - img.y + 0.5) / img.height * (y1 - y0)
+        return wx, wy
+
+    def _to_panel(self, img: pygame.Rect, wx: float, wy: float) -> tuple[float, float]:
+        x0, y0, x1, y1 = self.world
+        return img.x + (wx - x0) / (x1 - x0) * img.width, img.y + (wy - y0) / (y1 - y0) * img.height
+
+    # -----------------------------
+    # Render
+    # -----------------------------
+    def _render_image(self, size: tuple[int, int]) -> pygame.Surface:
+        """🧠 ЛОГИКА: counts -> цвет (логарифм плотности: одиночные сущности видны рядом с толпой)."""
+        c = self.counts
+        top = float(c.max()) if c.size else 0.0
+        t = np.log1p(c) / math.log1p(top) if top > 0 else np.zeros(c.shape)
+        lo = np.asarray(MINIMAP_LOW, dtype=np.float64)
+        hi = np.asarray(MINIMAP_HIGH, dtype=np.float64)
+        rgb = lo + (hi - lo) * t[..., None]
+        rgb = np.where((c > 0)[..., None], rgb, np.asarray(MINIMAP_BG, dtype=np.float64))
+        small = pygame.image.frombuffer(np.ascontiguousarray(rgb.astype(np.uint8)).tobytes(), (self.cols, self.rows), "RGB")
+        return pygame.transform.scale(small, size)
+
+    def draw(self, screen: pygame.Surface, rect: pygame.Rect, view: Bounds) -> None:
+        """🧠 ЛОГИКА: панель + картинка обзора (из кеша, пока counts не менялись) + рамка видимой области."""
+        pygame.draw.rect(screen, MINIMAP_BG, rect)
+        pygame.draw.rect(screen, MINIMAP_BORDER, rect, 1)
+        if not _NP_OK:
+            return
+        img = self.image_rect(rect)
+        if img.width <= 1 or img.height <= 1:
+            return
+        key = (self.version, img.size)
+        if self._image is None or self._image_key != key:
+            self._image = self._render_image(img.size)
+            self._image_key = key
+        screen.blit(self._image, img.topleft)
+
+        vx, vy, vw, vh = view
+        ax, ay = self._to_panel(img, vx, vy)
+        bx, by = self._to_panel(img, vx + vw, vy + vh)
+        frame = pygame.Rect(math.floor(ax), math.floor(ay), max(2, math.ceil(bx - ax)), max(2, math.ceil(by - ay)))
+        prev_clip = screen.get_clip()
+        screen.set_clip(img.clip(prev_clip))
+        pygame.draw.rect(screen, MINIMAP_VIEW, frame, 1)
+        screen.set_clip(prev_clip)
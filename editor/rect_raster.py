@@ -0,0 +1,89 @@
+# editor/rect_raster.py
+# 🧠 ЛОГИКА: заливка множества прямоугольников одного цвета прямо в пиксели поверхности (pygame.surfarray + NumPy)
+#
+# pygame.draw.rect / DrawBatch.fill — это вызов (или кортеж) из Python на каждый прямоугольник:
+# микросекунды на штуку, на 100k сущностей — сотни миллисекунд. Здесь прямоугольники приходят
+# колонками (xs, ys, ws, hs — массивы NumPy) и пишутся в массив пикселей (surfarray.pixels2d):
+#
+# - немного прямоугольников — срез px[x0:x1, y0:y1] = цвет на каждый
+#   (цикл, но без pygame-вызова и без сборки кортежей);
+# - много — "разностная сетка": +1/-1 в углах каждого прямоугольника (np.bincount),
+#   два cumsum дают покрытие каждого пикселя, затем одно присваивание по маске покрытие > 0.
+#   Стоимость — площадь охватывающего прямоугольника, а не число и размер прямоугольников.
+# Выбор: сетка, если на прямоугольник приходится меньше RASTER_GRID_PX пикселей охвата
+# (срез ~1 мкс на штуку, сетка ~10-15 нс на пиксель охвата; на экране 1280x720 — от ~15k штук).
+#
+# ✅ Пиксели те же, что у pygame.draw.rect(..., 0): [x, x + w) x [y, y + h), обрезка по clip поверхности,
+# прямоугольники с w <= 0 или h <= 0 не рисуются.
+# ⚠️ Порядок между прямоугольниками не важен только потому, что цвет один — разные цвета = разные вызовы.
+# ⚠️ Без NumPy / для 24-битной поверхности (pixels2d её не отдаёт) — available() == False,
+# вызывающий рисует по-старому.
+
+from __future__ import annotations
+
+import pygame
+
+try:
+    import numpy as np  # type: ignore
+    import pygame.surfarray  # noqa: F401  (нужен NumPy)
+
+    _NP_OK = True
+except Exception:
+    np = None  # type: ignore[assignment]
+    _NP_OK = False
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+RASTER_GRID_PX = 64  # 🔧 МОЖНО МЕНЯТЬ: охват (px) на прямоугольник, ниже которого выгоднее разностная сетка
+
+
+def available(surface: pygame.Surface) -> bool:
+    """🧠 ЛОГИКА: можно ли писать в пиксели этой поверхности (NumPy есть, формат 8/16/32 бит)."""
+    return _NP_OK and surface.get_bytesize() in (1, 2, 4)
+
+
+def fill_rects(surface: pygame.Surface, color, xs, ys, ws, hs) -> int:
+    """
+    🧠 ЛОГИКА: залить прямоугольники (колонки одинаковой длины) цветом color.
+    Возвращает, сколько прямоугольников реально попало в clip (для счётчиков / бенчмарка).
+    """
+    xs = np.asarray(xs, dtype=np.int64)
+    ys = np.asarray(ys, dtype=np.int64)
+    clip = surface.get_clip()
+    x0 = np.clip(xs, clip.x, clip.right)
+    y0 = np.clip(ys, clip.y, clip.bottom)
+    x1 = np.clip(xs + np.asarray(ws, dtype=np.int64), clip.x, clip.right)
+    y1 = np.clip(ys + np.asarray(hs, dtype=np.int64), clip.y, clip.bottom)
+    keep = (x1 > x0) & (y1 > y0)
+    if not keep.all():
+        x0, y0, x1, y1 = x0[keep], y0[keep], x1[keep], y1[keep]
+    n = len(x0)
+    if n == 0:
+        return 0
+
+    mapped = surface.map_rgb(color)
+    bx, by = int(x0.min()), int(y0.min())
+    bw, bh = int(x1.max()) - bx, int(y1.max()) - by
+    px = pygame.surfarray.pixels2d(surface)  # ⚠️ поверхность заблокирована, пока жив px
+    try:
+        if n * RASTER_GRID_PX <= bw * bh:
+            for a, b, c, d in zip(x0.tolist(), y0.tolist(), x1.tolist(), y1.tolist()):
+                px[a:c, b:d] = mapped
+            return n
+
+        # разностная сетка в охватывающем прямоугольнике; индексы [y, x] — как пиксели лежат в памяти
+        ax, ay, cx, cy = x0 - bx, y0 - by, x1 - bx, y1 - by
+        stride = bw + 1
+        size = (bh + 1) * stride
+        plus = np.bincount(np.concatenate((ay * stride + ax, cy * stride + cx)), minlength=size)
+        minus = np.bincount(np.concatenate((ay * stride + cx, cy * stride + ax)), minlength=size)
+        diff = np.empty((bh + 1, stride), dtype=np.int32)
+        np.subtract(plus, minus, out=diff.reshape(-1), casting="unsafe")
+        np.cumsum(diff, axis=1, out=diff)
+        np.cumsum(diff, axis=0, out=diff)
+        cover = diff[:bh, :bw]
+        np.putmask(px.T[by : by + bh, bx : bx + bw], cover > 0, mapped)
+        return n
+    finally:
+        del px
@@ -0,0 +1,206 @@
+# editor/render_backend.py
+# 🧠 ЛОГИКА: показ кадра через SDL2 Renderer (pygame._sdl2.video): слои — текстуры, композиция — рендерером
+#
+# По умолчанию ("render_backend": "surface") редактор сцены рисует всё в поверхность окна
+# (display.set_mode) и показывает её display.flip/update. Статический слой viewport каждый кадр
+# копируется в экран (blit), а при промежуточном zoom ещё и масштабируется на CPU (transform.scale).
+#
+# "render_backend": "sdl2" — TextureBackend:
+# - своё окно video.Window + video.Renderer (аппаратный, если есть, иначе software — работает и headless);
+# - кадр рисуется в canvas — поверхность с альфой (SRCALPHA) — тем же кодом, что и раньше;
+# - viewport не копирует слой в canvas: оставляет на его месте прозрачную "дыру" и отдаёт слой
+#   сюда (layer): текстура загружается один раз на перестройку слоя, окно слоя (и mip-масштаб)
+#   рисует рендерер;
+# - панели, выбранные сущности с подписями, рамка выделения, миникарта, debug overlay — в canvas;
+#   canvas — потоковая текстура, в неё загружаются только грязные области (DirtyRegions);
+# - показ: clear -> текстуры слоёв -> текстура canvas (альфа-смешивание) -> present.
+#
+# ✅ Показ — как у pygame.display: flip() / update(rects). DirtyRegions и оверлеи зовут их у бэкенда
+#   (None = сам pygame.display), поэтому остальной код редактора не знает, куда уходит кадр.
+# ✅ Полупрозрачное поверх "дыры" смешивается верно: blit с альфой в прозрачный пиксель pygame
+#   копирует цвет и альфу как есть, а рендерер смешивает их со слоем.
+# ⚠️ Renderer нельзя создать для окна display.set_mode (у окна уже есть своя поверхность),
+#   поэтому у бэкенда своё окно, а окно display на время работы прячется (close() возвращает его).
+# ⚠️ Поверхность, отданная в layer(), не должна меняться после этого: текстура берётся из кеша
+#   по самой поверхности (слои viewport при перестройке — всегда новая поверхность).
+# ⚠️ Нет pygame._sdl2 или не создались окно/рендерер — open_backend() вернёт None (рисуем по-старому).
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Hashable
+
+import pygame
+
+try:
+    from pygame._sdl2 import video as _video  # type: ignore
+
+    _SDL2_OK = True
+except Exception:
+    _video = None  # type: ignore[assignment]
+    _SDL2_OK = False
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+LAYER_TEXTURES = 4         # 🔧 МОЖНО МЕНЯТЬ: текстур слоёв в кеше (mip-уровни viewport + запас)
+CLEAR_COLOR = (0, 0, 0, 255)  # 🔧 МОЖНО МЕНЯТЬ: цвет под всеми текстурами (виден только там, где нет ни слоя, ни canvas)
+BLENDMODE_BLEND = 1        # SDL_BLENDMODE_BLEND: обычное альфа-смешивание
+
+
+def open_backend(name: str, title: str, size: tuple[int, int], fullscreen: bool = False) -> TextureBackend | None:
+    """
+    🧠 ЛОГИКА: бэкенд по имени из настроек. "surface" (или неизвестное имя) — None: рисуем в окно display.
+    "sdl2" — TextureBackend; если окно/рендерер не создались — тоже None.
+    """
+    if name != "sdl2" or not _SDL2_OK:
+        return None
+    try:
+        backend = TextureBackend(title, size, fullscreen)
+    except Exception:
+        return None
+    backend.hide_display()
+    return backend
+
+
+class TextureBackend:
+    """
+    🧠 ЛОГИКА:
+    canvas  — поверхность кадра (размер окна); begin() отдаёт её редактору вместо screen.
+    _layers — кеш текстур: id(поверхности) -> (поверхность, текстура), LRU.
+    _draws  — что рисовать под canvas: ключ (viewport) -> (текстура, окно слоя, куда на экране).
+    """
+
+    def __init__(self, title: str, size: tuple[int, int], fullscreen: bool = False) -> None:
+        w, h = max(1, int(size[0])), max(1, int(size[1]))
+        self.window = _video.Window(title, size=(w, h), resizable=True)
+        try:
+            self.renderer = _video.Renderer(self.window, accelerated=-1)
+        except Exception:
+            self.window.destroy()
+            raise
+        if fullscreen:
+            self.window.set_fullscreen(desktop=True)
+
+        self.canvas: pygame.Surface | None = None
+        self._canvas_tex: Any = None
+        self._layers: OrderedDict[int, tuple[pygame.Surface, Any]] = OrderedDict()
+        self._draws: dict[Hashable, tuple[Any, pygame.Rect, pygame.Rect]] = {}
+        self._hidden: Any = None  # окно display, спрятанное на время работы
+
+        # для debug overlay
+        self.uploads = 0    # загрузок слоёв в текстуры
+        self.presented = 0
+
+    # -----------------------------
+    # Окно
+    # -----------------------------
+    def hide_display(self) -> None:
+        """🧠 ЛОГИКА: окно display.set_mode (менеджер проектов) прячем, пока кадр показывает бэкенд."""
+        if pygame.display.get_surface() is None:
+            return
+        try:
+            self._hidden = _video.Window.from_display_module()
+            self._hidden.hide()
+        except Exception:
+            self._hidden = None
+
+    def set_fullscreen(self, on: bool) -> None:
+        if on:
+            self.window.set_fullscreen(desktop=True)
+        else:
+            self.window.set_windowed()
+
+    def closed_by(self, event: pygame.event.Event) -> bool:
+        """🧠 ЛОГИКА: крестик окна бэкенда. QUIT от SDL может не прийти — окно display ещё живо (спрятано)."""
+        return event.type == getattr(pygame, "WINDOWCLOSE", -1) and getattr(event, "window", None) is self.window
+
+    def close(self) -> None:
+        """🧠 ЛОГИКА: закрыть окно бэкенда и вернуть окно display (дальше рисует менеджер проектов)."""
+        self._draws.clear()
+        self._layers.clear()
+        self._canvas_tex = None
+        self.canvas = None
+        try:
+            self.window.destroy()
+        except Exception:
+            pass
+        if self._hidden is not None:
+            try:
+                self._hidden.show()
+            except Exception:
+                pass
+            self._hidden = None
+
+    def status(self) -> str:
+        """🧠 ЛОГИКА: строка для debug overlay."""
+        return f"sdl2 textures, layer uploads {self.uploads}, presents {self.presented}"
+
+    # -----------------------------
+    # Кадр
+    # -----------------------------
+    def begin(self) -> pygame.Surface:
+        """🧠 ЛОГИКА: canvas размером с окно; окно поменяло размер — новый canvas и новая текстура."""
+        size = self.window.size
+        if self.canvas is None or self.canvas.get_size() != size:
+            self.canvas = pygame.Surface(size, pygame.SRCALPHA)
+            self._canvas_tex = _video.Texture(self.renderer, size, streaming=True)
+            self._canvas_tex.blend_mode = BLENDMODE_BLEND
+        return self.canvas
+
+    def layer(self, key: Hashable, surface: pygame.Surface, area, dest) -> None:
+        """
+        🧠 ЛОГИКА: слой key — окно area поверхности surface, рисуется под canvas в dest
+        (размеры разные — рендерер растягивает: так делается mip-масштаб viewport).
+        """
+        self._draws[key] = (self._texture(surface), pygame.Rect(area), pygame.Rect(dest))
+
+    def drop(self, key: Hashable) -> None:
+        """🧠 ЛОГИКА: слой key больше не рисуется (viewport перешёл на прямую отрисовку в canvas)."""
+        self._draws.pop(key, None)
+
+    def _texture(self, surface: pygame.Surface) -> Any:
+        sid = id(surface)
+        entry = self._layers.get(sid)
+        if entry is not None and entry[0] is surface:
+            self._layers.move_to_end(sid)
+            return entry[1]
+        tex = _video.Texture.from_surface(self.renderer, surface)
+        self._layers[sid] = (surface, tex)  # ✅ держим поверхность: её id не переиспользуется, пока она в кеше
+        self._layers.move_to_end(sid)
+        while len(self._layers) > max(1, int(LAYER_TEXTURES)):
+            self._layers.popitem(last=False)
+        self.uploads += 1
+        return tex
+
+    # -----------------------------
+    # Показ (как pygame.display)
+    # -----------------------------
+    def flip(self) -> None:
+        self._present(None)
+
+    def update(self, rects) -> None:
+        self._present(rects)
+
+    def _present(self, rects) -> None:
+        canvas = self.canvas
+        if canvas is None:
+            return
+        tex = self._canvas_tex
+        if rects is None:
+            tex.update(canvas)
+        else:
+            bounds = canvas.get_rect()
+            for r in rects:
+                r = pygame.Rect(r).clip(bounds)
+                if r.width > 0 and r.height > 0:
+                    tex.update(canvas.subsurface(r), r)  # ✅ в текстуру — только изменившееся
+
+        ren = self.renderer
+        ren.draw_color = CLEAR_COLOR
+        ren.clear()
+        for layer_tex, area, dest in self._draws.values():
+            layer_tex.draw(area, dest)
+        tex.draw()
+        ren.present()
+        self.presented += 1
@@ -135,26 +135,37 @@ def _fmt_gb(x: float | None) -> str:
 
 import pygame  # 🧠 ЛОГИКА: рендер/события
 from editor.scene_viewport import SceneViewport
+from editor.label_cache import label_cache  # ✅ кеш отрисованных подписей
+from editor.dirty_regions import DirtyRegions  # ✅ показ кадра только изменившимися областями
+from editor.draw_batch import DrawBatch  # ✅ пакетный вывод (один blits на много элементов)
+from editor.frame_pacer import FramePacer  # ✅ в простое — низкий FPS / ожидание события
+from editor.minimap import Minimap  # ✅ обзор всей сцены по сетке плотности
+from editor.render_backend import open_backend  # ✅ показ через SDL2 Renderer (слои — текстуры)
 
 # ============================================================
 # ✅ Step-режим: внешние события (для единого main loop)
 # ============================================================
 _SCENE_EDITOR_EXTERNAL_EVENTS = None  # type: list[pygame.event.Event] | None
 
+# 🧠 ЛОГИКА: последнее выделение по сцене (handle) — восстанавливается при повторном открытии
+_LAST_SELECTION: dict = {}
+
 
 def _scene_editor_set_external_events(events) -> None:
     global _SCENE_EDITOR_EXTERNAL_EVENTS
     _SCENE_EDITOR_EXTERNAL_EVENTS = events
 
 
-def _scene_editor_get_events():
-    """Если события переданы извне — используем их один раз, иначе берём из pygame."""
+def _scene_editor_get_events(pacer: FramePacer | None = None):
+    """Если события переданы извне — используем их один раз, иначе берём из pygame (через pacer, если есть)."""
     global _SCENE_EDITOR_EXTERNAL_EVENTS
     if _SCENE_EDITOR_EXTERNAL_EVENTS is not None:
         ev = _SCENE_EDITOR_EXTERNAL_EVENTS
         _SCENE_EDITOR_EXTERNAL_EVENTS = None
+        if pacer is not None and ev:
+            pacer.wake()
         return ev
-    return pygame.event.get()
+    return pacer.events() if pacer is not None else pygame.event.get()
 
 
 # ============================================================
@@ -282,6 +293,16 @@ except Exception:
     )
 
 from engine_settings import load_settings, save_settings  # ✅ настройки движка
+from engine.scene_io import iter_read_scene_file  # ✅ форматы сцены (json/bin), потоковое чтение
+from engine.scene_journal import journal_for, replay_journal  # ✅ инкрементальные сохранения
+from engine.scene_cache import cache_stats, scene_cache_for  # ✅ кеш разобранных сцен
+from engine.scene_autosave import SceneAutosaver  # ✅ фоновое автосохранение
+from engine.scene_chunks import ChunkedScene, is_chunked_scene  # ✅ мир, разбитый на клетки
+from engine.entity_store import ENTITY_STORE_AVAILABLE, EntityStore  # ✅ колонки сущностей (NumPy)
+from engine.scene_binary import LazyEntityList  # ✅ *.scene.bin: колонки прямо из mmap
+from engine.entity_index import entity_index_for  # ✅ поиск по id за O(1) + handles
+from engine.prefabs import PREFAB_KEY, prefab_library_for  # ✅ общие шаблоны сущностей
+from engine.scene_stream import LoadProgress
 
 # ============================================================
 # ✅ WinAPI: получение HWND + смена стиля окна (рамка/безрамки)
@@ -533,18 +554,52 @@ def _apply_display_mode(
 # ============================================================
 # ✅ Сцена: загрузка/сохранение
 # ============================================================
-def load_scene(scene_path: Path):
-    """🧠 ЛОГИКА: загрузка сцены из файла JSON."""
+SCENE_LOAD_SLICE_MS = 25  # 🔧 МОЖНО МЕНЯТЬ: сколько мс за кадр тратить на чтение сцены при загрузке
+
+
+def load_scene_steps(scene_path: Path):
+    """
+    🧠 ЛОГИКА: загрузка сцены по шагам (генератор).
+    После каждого прочитанного куска отдаёт LoadProgress, в конце возвращает dict сцены.
+    Формат (*.scene.json / *.scene.bin) определяется по сигнатуре файла или расширению.
+    Экземпляры префабов остаются как в файле (только переопределения) — шаблон подставляет viewport.
+    """
     if scene_path.exists():
-        with open(scene_path, "r", encoding="utf-8") as file:
-            return json.load(file)
+        # ✅ кеш разобранных сцен (<проект>/.cache/scenes/), для *.scene.bin не используется
+        cache = scene_cache_for(scene_path)
+        scene_data = cache.load(scene_path)
+        if scene_data is None:
+            scene_data = yield from iter_read_scene_file(scene_path)
+            cache.store(scene_path, scene_data)
+        else:
+            size = scene_path.stat().st_size
+            yield LoadProgress(size, size, len(scene_data.get("entities", [])))
+        # ✅ дописанные, но ещё не сжатые изменения из журнала
+        replay_journal(scene_path, scene_data)
+        journal_for(scene_path).baseline(scene_data)
+        return scene_data
     return {"name": "main", "entities": []}
 
 
+def load_scene(scene_path: Path):
+    """🧠 ЛОГИКА: загрузка сцены из файла целиком (без промежуточного прогресса)."""
+    steps = load_scene_steps(scene_path)
+    while True:
+        try:
+            next(steps)
+        except StopIteration as e:
+            return e.value
+
+
 def save_scene(scene_path: Path, scene_data):
-    """🧠 ЛОГИКА: сохраняет изменённую сцену в файл."""
-    with open(scene_path, "w", encoding="utf-8") as file:
-        json.dump(scene_data, file, ensure_ascii=False, indent=2)
+    """
+    🧠 ЛОГИКА: сохраняет изменённую сцену (синхронно, полным сравнением с прошлым сохранением).
+    Редактор сохраняет через SceneAutosaver — в фоне и только отмеченные правки.
+    В журнал рядом со сценой дописываются только изменённые/добавленные/удалённые сущности,
+    основной файл пересобирается в фоне, когда журнал вырастет (см. engine/scene_journal.py).
+    Экземпляры префабов сохраняются без полей шаблона (engine/prefabs.py).
+    """
+    journal_for(scene_path).record(scene_data)
 
 
 def _get_project_name_from_scene_path(scene_path: Path) -> str:
@@ -572,10 +627,33 @@ def draw_entities(screen, entities, font):
                 (255, 255, 255),  # 🔧 МОЖНО МЕНЯТЬ
                 (entity["x"], entity["y"], entity["w"], entity["h"]),
             )
-            label = font.render(str(entity.get("id", "")), True, EDITOR_TEXT_COLOR)
+            label = label_cache().render(font, str(entity.get("id", "")), EDITOR_TEXT_COLOR)
             screen.blit(label, (entity["x"], entity["y"] - 20))  # 🔧 МОЖНО МЕНЯТЬ
 
 
+# 🔧 МОЖНО МЕНЯТЬ: размер новой сущности (Insert)
+NEW_ENTITY_W = 64
+NEW_ENTITY_H = 64
+
+
+def _next_entity_id(entities):
+    """🧠 ЛОГИКА: уникальный id для новой сущности (int-сцена -> max+1, иначе "e<N>")."""
+    ids = set()
+    all_int = True
+    # ✅ EntityStore отдаёт колонку id без создания view на каждую строку
+    keys = entities.ids() if isinstance(entities, EntityStore) else (ent.get("id") for ent in entities)
+    for key in keys:
+        ids.add(key)
+        if not isinstance(key, int) or isinstance(key, bool):
+            all_int = False
+    if all_int:
+        return max(ids, default=0) + 1
+    n = len(ids)
+    while f"e{n}" in ids:
+        n += 1
+    return f"e{n}"
+
+
 def handle_entity_move(mouse_pos, selected_entity):
     """🧠 ЛОГИКА: если выбрана сущность, она двигается за мышью."""
     if selected_entity:
@@ -587,8 +665,8 @@ def _draw_project_badge(
     font: pygame.font.Font,
     project_name: str,
     settings_rect: pygame.Rect,
-) -> None:
-    """🧠 ЛОГИКА: бейдж проекта слева сверху (в рамочке) + выравнивание по кнопке 'Настройки'."""
+) -> pygame.Rect:
+    """🧠 ЛОГИКА: бейдж проекта слева сверху (в рамочке) + выравнивание по кнопке 'Настройки'. Возвращает его rect."""
     # ----------------
     # 🔧 МОЖНО МЕНЯТЬ
     # ----------------
@@ -639,6 +717,7 @@ def _draw_project_badge(
     text_x = badge_rect.x + BADGE_PAD_X
     text_y = badge_rect.y + (badge_rect.height - surf.get_height()) // 2
     screen.blit(surf, (text_x, text_y))
+    return badge_rect
 
 
 def _draw_button(screen, font, rect, text, mouse_pos):
@@ -751,26 +830,128 @@ def _scene_editor_gen(scene_path, window_width, window_height, fps, screen=None)
         # ✅ Используем уже созданный display surface (единый loop без пересоздания окна)
         window_width, window_height = screen.get_size()
 
-    # ✅ маленький "loading frame" сразу после поднятия окна редактора
-    try:
-        from engine.loading_screen import draw_loading_overlay
-
-        draw_loading_overlay(screen, 100, "Загрузка…", "Редактор сцены")
-        pygame.display.flip()
-    except Exception:
-        pass
-
     pygame.display.set_caption("Редактор сцены")
 
+    # ✅ "render_backend": "sdl2" — кадр показывает SDL2 Renderer в своём окне (слой viewport — текстура);
+    # не вышло (нет pygame._sdl2 / рендерера) — None, рисуем в окно display как раньше
+    render = open_backend(
+        str(engine_settings.get("render_backend", "surface")),
+        "Редактор сцены",
+        (window_width, window_height),
+        fullscreen=bool(engine_settings.get("fullscreen", False)),
+    )
+    if render is not None:
+        screen = render.begin()
+    display_out = render if render is not None else pygame.display  # flip() / update(rects)
+
     clock = pygame.time.Clock()
+    pacer = FramePacer(clock, engine_settings)  # ✅ без ввода и анимаций — не крутим полные FPS
     font = pygame.font.SysFont(None, DEFAULT_FONT_SIZE)
 
     scene_path = Path(scene_path)
-    scene_data = load_scene(scene_path)
-    selected_entity = None
+
+    # ============================================================
+    # ✅ Загрузка сцены по кускам: окно не "зависает", оверлей показывает реальный прогресс
+    # ============================================================
+    try:
+        from engine.loading_screen import draw_loading_overlay
+    except Exception:
+        draw_loading_overlay = None  # type: ignore[assignment]
+
+    # ✅ chunk-сцена: читаем только манифест, клетки подгружаются вокруг камеры в фоне
+    chunked = ChunkedScene(scene_path) if is_chunked_scene(scene_path) and scene_path.exists() else None
+
+    loader = load_scene_steps(scene_path) if chunked is None else None
+    scene_data = chunked.scene_data if chunked is not None else None
+    while scene_data is None:
+        progress = None
+        slice_start = time.perf_counter()
+        try:
+            # 🧠 ЛОГИКА: читаем, пока не исчерпан бюджет кадра, затем рисуем прогресс и отдаём кадр
+            while (time.perf_counter() - slice_start) * 1000.0 < SCENE_LOAD_SLICE_MS:
+                progress = next(loader)
+        except StopIteration as e:
+            scene_data = e.value
+            break
+
+        # ✅ окно остаётся отзывчивым (прочие события во время загрузки не обрабатываем);
+        # закрыли окно — бросаем чтение и выходим: сцена ещё не открыта, сохранять нечего
+        for event in _scene_editor_get_events():
+            if event.type == pygame.QUIT or (render is not None and render.closed_by(event)):
+                loader.close()
+                if render is not None:
+                    render.close()
+                return "quit"
+        if draw_loading_overlay is not None and progress is not None:
+            try:
+                mb_done = progress.bytes_done / (1024 * 1024)
+                mb_total = progress.bytes_total / (1024 * 1024)
+                draw_loading_overlay(
+                    screen,
+                    min(99.0, progress.percent),
+                    "Загрузка…",
+                    f"Сцена: {scene_path.name} — объектов: {progress.entities}, {mb_done:.1f} / {mb_total:.1f} MB",
+                )
+                display_out.flip()
+            except Exception:
+                pass
+        yield None
+
+    # ✅ колоночное хранилище сущностей (NumPy): pick/draw viewport-а идут по колонкам.
+    # chunk-сцены остаются в своём контейнере.
+    entities_in = scene_data.get("entities")
+    if ENTITY_STORE_AVAILABLE and chunked is None and type(entities_in) is list:
+        scene_data["entities"] = EntityStore.from_dicts(entities_in)
+    elif ENTITY_STORE_AVAILABLE and isinstance(entities_in, LazyEntityList) and entities_in.source is not None:
+        # mmap-сцена: колонки копируются из файла целиком, строки в dict не декодируются
+        # (иначе первый же хеш viewport-а декодировал бы всю сцену); строки, которые поправил
+        # журнал при загрузке, переписываем поверх. mmap больше не нужен — отпускаем файл.
+        source = entities_in.source
+        store = EntityStore.from_binary(source)
+        for i, ent in entities_in.iter_materialized():
+            store[i] = ent
+        source.close()
+        scene_data["entities"] = store
+    elif ENTITY_STORE_AVAILABLE and isinstance(entities_in, LazyEntityList):
+        scene_data["entities"] = EntityStore.from_dicts(entities_in)  # уже отвязан от mmap журналом
+    del entities_in
+
+    # ✅ правки отмечаются как "грязные", сохранение — в фоне после паузы (или по S)
+    autosaver = chunked if chunked is not None else SceneAutosaver(scene_path)
+
+    # ✅ индекс id -> сущность; выделение держим handle-ом (переживает перезагрузку и подгрузку клеток)
+    entity_index = entity_index_for(scene_path)
+    entity_index.rebind(scene_data.setdefault("entities", []), complete=chunked is None)
+    selection_key = str(Path(scene_path).resolve())
+    selected_handle = _LAST_SELECTION.get(selection_key)
+    selected_entity = entity_index.resolve(selected_handle)
     project_name = _get_project_name_from_scene_path(scene_path)
      # ✅ Viewport (отдельная область для размещения объектов)
     viewport = SceneViewport(pygame.Rect(0, 0, 10, 10))
+    viewport.fill_backend = str(engine_settings.get("viewport_fill", "batch"))  # "surfarray" — NumPy в пиксели
+    viewport.compositor = render  # ✅ sdl2: слой viewport уходит в рендерер текстурой, а не blit-ом
+    viewport.render_scale = float(engine_settings.get("render_scale", 1.0))  # < 1 — viewport в меньшем разрешении
+    if viewport.effective_render_scale() < 1.0:
+        viewport.render_font = pygame.font.SysFont(None, max(6, round(DEFAULT_FONT_SIZE * viewport.effective_render_scale())))
+
+    # ✅ префабы проекта: экземпляры в сцене хранят только переопределённые поля
+    prefabs = prefab_library_for(scene_path)
+    prefabs.reload()
+    viewport.prefabs = prefabs
+
+    # ✅ грязные области кадра: виджеты сообщают о себе, показываем только изменившееся
+    dirty = DirtyRegions()
+    dirty.output = render  # None — pygame.display
+
+    # ✅ миникарта: обычная сцена — плотность по хешу viewport (инкрементально),
+    # сцена из клеток мира — число сущностей в клетках (весь мир, а не только загруженное)
+    minimap = Minimap()
+    minimap_drag = False
+    minimap_cells = None
+    minimap_cells_at = -10**9
+    MINIMAP_CELLS_MS = 250  # 🔧 МОЖНО МЕНЯТЬ: как часто сверять число сущностей в клетках мира
+    if chunked is None:
+        viewport.minimap = minimap
 
     # ✅ состояние меню настроек
     settings_open = False
@@ -815,6 +996,21 @@ def _scene_editor_gen(scene_path, window_width, window_height, fps, screen=None)
         except Exception:
             return
 
+    def _shutdown_workers() -> None:
+        """
+        🧠 ЛОГИКА: выход из редактора (после финального flush) — фоновые потоки сессии закрываем,
+        иначе каждая сцена, открытая из менеджера проектов, оставляет свой поток.
+        """
+        if autosaver is not chunked:
+            autosaver.close()
+        if chunked is not None:
+            chunked.close()  # пулы чтения и записи клеток
+
+    def _close_render_backend() -> None:
+        """🧠 ЛОГИКА: выход из редактора — окно бэкенда закрываем, окно display (менеджер) показываем."""
+        if render is not None:
+            render.close()
+
     # ============================================================
     # ✅ Выход с подтверждением (как в менеджере проектов)
     # ============================================================
@@ -846,13 +1042,15 @@ def _scene_editor_gen(scene_path, window_width, window_height, fps, screen=None)
         screen.blit(line1, line1.get_rect(center=(cx, cy - 10)))
         screen.blit(line2, line2.get_rect(center=(cx, cy + 22)))
 
-        pygame.display.flip()
+        display_out.flip()
 
     def _call_modal(fn, *args, overlay_text: str = "Открыто окно…", **kwargs):
         """🧠 ЛОГИКА: dim+flip -> modal -> restore focus."""
         _draw_dim_pause_overlay(overlay_text)
         result = fn(*args, **kwargs)
         _restore_pygame_focus()
+        dirty.mark_all()  # ✅ окно было перекрыто модалкой
+        pacer.wake()
         return result
 
     def _confirm_back_to_projects() -> bool:
@@ -891,10 +1089,14 @@ def _scene_editor_gen(scene_path, window_width, window_height, fps, screen=None)
 
     running = True
     while running:
-        clock.tick(fps)
+        # ✅ занято, пока клетки мира грузятся в фоне (их появление — без ввода)
+        pacer.tick(fps, busy=chunked is not None and chunked.loading_chunks > 0)
         mouse_pos = pygame.mouse.get_pos()
 
+        if render is not None:
+            screen = render.begin()  # ✅ canvas следует за размером окна бэкенда
         window_width, window_height = screen.get_size()
+        dirty.begin(screen)
 
         # ✅ Запоминаем maximize/размер (только когда fullscreen выключен)
         if not engine_settings.get("fullscreen", False):
@@ -947,6 +1149,17 @@ def _scene_editor_gen(scene_path, window_width, window_height, fps, screen=None)
         )
         viewport.set_rect(viewport_rect)
 
+        # ---------------- Minimap rect ----------------
+        # 🧠 ЛОГИКА: свободная полоса слева от viewport, прижата к низу (сверху — меню настроек)
+        MINIMAP_MIN_W = 40  # 🔧 МОЖНО МЕНЯТЬ: уже этого миникарта не показывается
+        minimap_w = viewport_rect.x - EDGE_PAD - UI_GAP_X
+        minimap_rect = None
+        if minimap_w >= MINIMAP_MIN_W:
+            minimap_h = min(minimap_w, viewport_rect.height)
+            minimap_rect = pygame.Rect(EDGE_PAD, viewport_rect.bottom - minimap_h, minimap_w, minimap_h)
+        elif minimap_drag:
+            minimap_drag = False
+
         # ---------------- Settings panel layout ----------------
         panel_rect = None
         cb_full = None
@@ -972,10 +1185,14 @@ def _scene_editor_gen(scene_path, window_width, window_height, fps, screen=None)
             cb_dbg = pygame.Rect(cb_x, row2_y, cb_size, cb_size)
 
         # ---------------- Events ----------------
-        for event in _scene_editor_get_events():
-            if event.type == pygame.QUIT:
+        for event in _scene_editor_get_events(pacer):
+            dirty.handle_event(event)
+            if event.type == pygame.QUIT or (render is not None and render.closed_by(event)):
                 if _confirm_exit_scene_editor():
+                    autosaver.flush(scene_data)
+                    _shutdown_workers()
                     _persist_window_state_now()
+                    _close_render_backend()
                     return "quit"
                 continue
 
@@ -983,13 +1200,19 @@ def _scene_editor_gen(scene_path, window_width, window_height, fps, screen=None)
                 # верхние кнопки
                 if exit_rect.collidepoint(event.pos):
                     if _confirm_exit_scene_editor():
+                        autosaver.flush(scene_data)
+                        _shutdown_workers()
                         _persist_window_state_now()
+                        _close_render_backend()
                         return "quit"
                     continue
 
                 if back_rect.collidepoint(event.pos) and not settings_open:
                     if _confirm_back_to_projects():
+                        autosaver.flush(scene_data)
+                        _shutdown_workers()
                         _persist_window_state_now()
+                        _close_render_backend()
                         return "back"
                     continue
 
@@ -1018,6 +1241,8 @@ def _scene_editor_gen(scene_path, window_width, window_height, fps, screen=None)
 
                         save_settings(engine_settings)
 
+                        if render is not None:
+                            render.set_fullscreen(bool(engine_settings.get("fullscreen", False)))
                         if screen is None:
                             screen, window_width, window_height = _apply_display_from_settings()
                         else:
@@ -1033,22 +1258,130 @@ def _scene_editor_gen(scene_path, window_width, window_height, fps, screen=None)
                     # клик внутри панели, но не по пунктам
                     continue
 
+                # ✅ миникарта: клик (и перетаскивание с зажатой ЛКМ) — камера в эту точку мира
+                if minimap_rect is not None and minimap_rect.collidepoint(event.pos):
+                    target = minimap.world_at(minimap_rect, event.pos)
+                    if target is not None:
+                        viewport.center_on(*target)
+                    minimap_drag = True
+                    continue
+
                 # выбор/drag сущности — только внутри viewport
+                # Shift — добавить к выделению (клик или рамка); клик по выделенной тащит всю группу
                 if viewport.contains(event.pos):
+                    add = bool(pygame.key.get_mods() & pygame.KMOD_SHIFT)
                     ent = viewport.pick_entity(event.pos, scene_data.get("entities", []))
                     if ent is not None:
-                        selected_entity = ent
+                        if add or not viewport.is_selected(ent):
+                            viewport.select(ent, add=add)
+                        selected_entity = viewport.selected_entity = ent
+                        selected_handle = entity_index.handle_for(ent)
                         viewport.start_drag(ent, event.pos)
                     else:
-                        selected_entity = None
-                        viewport.clear_selection()
+                        if not add:
+                            selected_entity = None
+                            selected_handle = None
+                            viewport.clear_selection()
+                        viewport.start_box(event.pos)  # ✅ рамка выделения
                 else:
                     # клик вне viewport — снимаем выделение
                     selected_entity = None
+                    selected_handle = None
                     viewport.clear_selection()
 
             if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
-                viewport.end_drag()
+                minimap_drag = False
+                for ent in viewport.end_drag():  # ✅ групповой drag: отмечаем сдвинутых один раз, в конце
+                    autosaver.mark_changed(ent)
+                if viewport.boxing:
+                    add = bool(pygame.key.get_mods() & pygame.KMOD_SHIFT)
+                    selected_entity = viewport.end_box(scene_data.get("entities", []), add=add)
+                    selected_handle = entity_index.handle_for(selected_entity)
+
+            # ✅ камера: перетаскивание средней/правой кнопкой внутри viewport
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button in (2, 3):
+                if not settings_open and viewport.contains(event.pos):
+                    viewport.start_pan(event.pos)
+            if event.type == pygame.MOUSEBUTTONUP and event.button in (2, 3):
+                viewport.end_pan()
+            if event.type == pygame.MOUSEMOTION:
+                viewport.pan_to(event.pos)
+                viewport.box_to(event.pos)
+                if minimap_drag and minimap_rect is not None:
+                    target = minimap.world_at(minimap_rect, event.pos)
+                    if target is not None:
+                        viewport.center_on(*target)
+            # ✅ zoom: колесо мыши над viewport (точка под курсором остаётся на месте)
+            if event.type == pygame.MOUSEWHEEL and not settings_open:
+                viewport.wheel_zoom(pygame.mouse.get_pos(), event.y)
+
+            if event.type == pygame.KEYDOWN and not settings_open:
+                entities = scene_data.setdefault("entities", [])
+
+                # 🔧 МОЖНО МЕНЯТЬ: горячая клавиша сохранения сцены (одно сохранение на нажатие)
+                if event.key == pygame.K_s:
+                    autosaver.save_now(scene_data)
+
+                # ✅ Insert — новая сущность под курсором (или в центре viewport).
+                # Если выбран экземпляр префаба — ещё один экземпляр того же префаба.
+                elif event.key == pygame.K_INSERT:
+                    pos = mouse_pos if viewport.contains(mouse_pos) else viewport.rect.center
+                    wx, wy = viewport.screen_to_world(pos)
+                    new_id = chunked.new_entity_id() if chunked is not None else _next_entity_id(entities)
+                    prefab_name = selected_entity.get(PREFAB_KEY) if selected_entity is not None else None
+                    if prefab_name in prefabs:
+                        pw = prefabs.value(selected_entity, "w")
+                        ph = prefabs.value(selected_entity, "h")
+                        pw = int(pw) if isinstance(pw, (int, float)) else NEW_ENTITY_W
+                        ph = int(ph) if isinstance(ph, (int, float)) else NEW_ENTITY_H
+                        ent = {
+                            "id": new_id,
+                            PREFAB_KEY: prefab_name,
+                            "x": int(wx - pw // 2),
+                            "y": int(wy - ph // 2),
+                        }
+                    else:
+                        ent = {
+                            "id": new_id,
+                            "type": "rect",
+                            "x": int(wx - NEW_ENTITY_W // 2),
+                            "y": int(wy - NEW_ENTITY_H // 2),
+                            "w": NEW_ENTITY_W,
+                            "h": NEW_ENTITY_H,
+                        }
+                    entities.append(ent)
+                    ent = entities[-1]  # ✅ для EntityStore — view новой строки (а не исходный dict)
+                    autosaver.mark_added(ent)
+                    viewport.entity_added(ent)
+                    selected_entity = ent
+                    selected_handle = entity_index.add(ent)
+
+                # ✅ Delete — удалить выбранные сущности (основную и всю группу)
+                elif event.key == pygame.K_DELETE and viewport.selection_count:
+                    doomed = []
+                    for sel in viewport.selected_entities(entities):
+                        i = entity_index.row_of(entity_index.handle_for(sel))  # ✅ O(1) по handle
+                        if i < 0 or entities[i] is not sel:
+                            # ⚠️ сущность без id — ищем по ссылке
+                            i = next((k for k, ent in enumerate(entities) if ent is sel), -1)
+                        if i >= 0:
+                            doomed.append(i)
+                    # строки найдены до удаления; удаляем с конца — номера остальных не сдвигаются
+                    doomed = sorted(set(doomed), reverse=True)
+                    gone = [entities[i] for i in doomed]
+                    for ent in gone:
+                        viewport.entity_removed(ent)
+                    if isinstance(entities, EntityStore):
+                        entities.delete_rows(doomed)  # ✅ колонки сжимаются один раз на всю группу
+                    else:
+                        for i in doomed:
+                            del entities[i]
+                    for ent in gone:
+                        entity_index.remove(ent.get("id"))
+                        autosaver.mark_deleted(ent)
+                    selected_entity = None
+                    selected_handle = None
+                    viewport.clear_selection()
 
         # ---------------- Render ----------------
         screen.fill(EDITOR_BG_COLOR)
@@ -1060,19 +1393,50 @@ def _scene_editor_gen(scene_path, window_width, window_height, fps, screen=None)
             dim.fill((0, 0, 0, DIM_ALPHA))
             screen.blit(dim, (0, 0))
 
-        _draw_project_badge(screen, font, project_name, settings_rect)
+        badge_rect = _draw_project_badge(screen, font, project_name, settings_rect)
 
         _draw_button(screen, font, settings_rect, "Настройки", mouse_pos)
         _draw_button(screen, font, back_rect, "К проектам", mouse_pos)
         _draw_exit_button(screen, font, exit_rect, "Выход", mouse_pos)
 
+        # ✅ грязные области: всё, что нарисовано в кадре, сообщает своё состояние
+        dirty.report("dim", screen.get_rect(), settings_open)
+        dirty.report("badge", badge_rect, project_name)
+        dirty.report("btn_settings", settings_rect, settings_rect.collidepoint(mouse_pos))
+        dirty.report("btn_back", back_rect, back_rect.collidepoint(mouse_pos))
+        dirty.report("btn_exit", exit_rect, exit_rect.collidepoint(mouse_pos))
+
          # Viewport: сетка + сущности + выделение
+        if selected_handle is not None:
+            selected_entity = entity_index.resolve(selected_handle)
         viewport.selected_entity = selected_entity
+        if chunked is not None:
+            if chunked.update_view(viewport.world_view_rect(), pinned=selected_entity):
+                entity_index.rebind(scene_data["entities"], complete=False)
+                viewport.invalidate_spatial()
+                if selected_handle is not None:
+                    selected_entity = viewport.selected_entity = entity_index.resolve(selected_handle)
+            if pygame.time.get_ticks() - minimap_cells_at >= MINIMAP_CELLS_MS:
+                minimap_cells_at = pygame.time.get_ticks()
+                cells = chunked.cell_counts()
+            else:
+                cells = minimap_cells
+            if cells != minimap_cells:  # ✅ перерисовка обзора — только когда число сущностей в клетках изменилось
+                minimap_cells = cells
+                minimap.set_cells(cells, chunked.chunk_size)
         viewport.draw(screen, scene_data.get("entities", []), font, EDITOR_TEXT_COLOR)
+        dirty.report("viewport", viewport.rect, viewport.view_state())
+
+        # Minimap: картинка обзора из кеша + рамка видимой области
+        if minimap_rect is not None:
+            view = viewport.world_view_rect()
+            minimap.draw(screen, minimap_rect, view)
+            dirty.report("minimap", minimap_rect, (minimap.version, tuple(view)))
 
         # drag обновляем каждый кадр, пока зажата ЛКМ (состояние внутри viewport)
         if pygame.mouse.get_pressed(num_buttons=3)[0]:
-            viewport.drag_to(mouse_pos)
+            if viewport.drag_to(mouse_pos):
+                autosaver.mark_changed(viewport.selected_entity)
 
         # settings panel render
         if settings_open and panel_rect is not None and cb_full is not None and cb_dbg is not None:
@@ -1098,6 +1462,11 @@ def _scene_editor_gen(scene_path, window_width, window_height, fps, screen=None)
                 font.render("Отладочная информация", True, EDITOR_TEXT_COLOR),
                 (panel_rect.x + 44, cb_dbg.y - 1),
             )
+            dirty.report(
+                "settings",
+                panel_rect,
+                (bool(engine_settings.get("fullscreen", False)), bool(engine_settings.get("debug_overlay", False))),
+            )
 
         # ====================================================
         # ✅ Debug overlay — 1:1 как в Менеджере проектов (editor_app.py)
@@ -1169,6 +1538,11 @@ def _scene_editor_gen(scene_path, window_width, window_height, fps, screen=None)
                     telemetry_frame_ms_smooth * (1.0 - FRAME_MS_EMA_ALPHA) + frame_ms * FRAME_MS_EMA_ALPHA
                 )
 
+            scene_cache_counts = cache_stats()
+            scene_cache_hits = int(scene_cache_counts.get("hits", 0))
+            scene_cache_misses = int(scene_cache_counts.get("misses", 0))
+            autosave_status = autosaver.status()
+
             dbg = [
                 f"FPS: {fps_now:.0f}",
                 f"Frame time: {(telemetry_frame_ms_smooth if telemetry_frame_ms_smooth is not None else frame_ms):.1f} ms",
@@ -1176,7 +1550,20 @@ def _scene_editor_gen(scene_path, window_width, window_height, fps, screen=None)
                 f"GPU load: {_fmt_pct(telemetry_gpu)}",
                 f"VRAM used: {_fmt_pct(telemetry_vram)}{vram_suffix}",
                 f"RAM used: {ram_suffix if ram_suffix else 'N/A'}",
+                f"Scene cache: {scene_cache_hits} hit / {scene_cache_misses} miss",
+                f"Autosave: {autosave_status}",
+                f"Visible: {viewport.visible_count} / {viewport.total_count} entities, zoom {viewport.zoom * 100:.0f}%"
+                f", selected {viewport.selection_count}"
+                + (f", LOD: {viewport.lod_merged} in tiles" if viewport.lod_merged else "")
+                + (f", render {viewport.effective_render_scale() * 100:.0f}%" if viewport.effective_render_scale() < 1.0 else ""),
+                f"Pacing: {pacer.status()}",
+                f"Render: {render.status() if render is not None else 'surface (display.update)'}",
             ]
+            if chunked is not None:
+                dbg.append(
+                    f"Chunks: {chunked.loaded_chunks} / {chunked.total_chunks} loaded"
+                    f" ({chunked.loaded_bytes / (1024 * 1024):.1f} MB), loading {chunked.loading_chunks}"
+                )
             # ====================================================
             # ✅ Цветовые индикаторы (green/orange/red) — 1:1
             # ====================================================
@@ -1242,13 +1629,21 @@ def _scene_editor_gen(scene_path, window_width, window_height, fps, screen=None)
             IND_GAP = 8    # 🔧 МОЖНО МЕНЯТЬ
 
             line_colors: list[tuple[int, int, int]] = [
-                _grade_fps(fps_now),                         # FPS
-                _grade_frame_ms(telemetry_frame_ms_smooth),  # ms
+                # в простое низкий FPS / долгий кадр — так и задумано (см. Pacing)
+                COLOR_NA if pacer.idle else _grade_fps(fps_now),                         # FPS
+                COLOR_NA if pacer.idle else _grade_frame_ms(telemetry_frame_ms_smooth),  # ms
                 _grade_pct(telemetry_cpu_smooth),            # CPU
                 _grade_pct(telemetry_gpu),                   # GPU
                 _grade_pct(telemetry_vram),                  # VRAM
                 _grade_pct(telemetry_ram_pct),               # RAM
+                COLOR_OK if scene_cache_hits else COLOR_NA,  # кеш сцен
+                {"saved": COLOR_OK, "error": COLOR_BAD}.get(autosave_status, COLOR_WARN),  # автосохранение
+                COLOR_OK if viewport.visible_count else COLOR_NA,  # отсечение по видимой области
+                COLOR_OK if pacer.enabled else COLOR_NA,           # темп кадров
+                COLOR_OK if render is not None else COLOR_NA,      # бэкенд показа
             ]
+            if chunked is not None:
+                line_colors.append(COLOR_WARN if chunked.loading_chunks else COLOR_OK)  # клетки мира
 
 
             surfaces = [font.render(t, True, TEXT_COLOR) for t in dbg]
@@ -1279,6 +1674,7 @@ def _scene_editor_gen(scene_path, window_width, window_height, fps, screen=None)
             )
 
             y = box_y + PAD_Y
+            out = DrawBatch(screen)  # ✅ строки текста — одним blits (индикаторы со скруглением — напрямую, не пересекаются)
             for i, surf in enumerate(surfaces):
                 c = line_colors[i] if i < len(line_colors) else COLOR_NA
                 ind_x = box_x + PAD_X
@@ -1286,18 +1682,24 @@ def _scene_editor_gen(scene_path, window_width, window_height, fps, screen=None)
                 pygame.draw.rect(screen, c, (ind_x, ind_y, IND_SIZE, IND_SIZE), border_radius=2)
 
                 text_x = ind_x + IND_SIZE + IND_GAP
-                screen.blit(surf, (text_x, y))
+                out.blit(surf, (text_x, y))
 
                 y += surf.get_height() + LINE_GAP
+            out.flush()
+
+            dirty.report("debug", (box_x, box_y, box_w, box_h), (tuple(dbg), tuple(line_colors)))
 
-        pygame.display.flip()
+        dirty.present()
 
-        # 🔧 МОЖНО МЕНЯТЬ: горячая клавиша сохранения сцены
-        if pygame.key.get_pressed()[pygame.K_s]:
-            save_scene(scene_path, scene_data)
+        # ✅ автосохранение: запись уходит в фоновый поток, кадр не ждёт диск
+        autosaver.tick(scene_data)
+        _LAST_SELECTION[selection_key] = selected_handle
         yield None
 
+    autosaver.flush(scene_data)
+    _shutdown_workers()
     _persist_window_state_now()
+    _close_render_backend()
     return "back"
 # ============================================================
 # ✅ Step-API (init/step) + fallback run_scene_editor
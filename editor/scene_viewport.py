@@ -1,19 +1,50 @@
 # editor/scene_viewport.py
 from __future__ import annotations
 
+import math
+from collections import OrderedDict
+from typing import Any
+
 import pygame
 
+from editor.draw_batch import DrawBatch
+from editor.label_cache import label_cache
+from editor.minimap import Minimap
+from editor.render_backend import TextureBackend
+from editor import rect_raster
+from engine.entity_store import GEOM_KEYS, EntityStore, EntityView
+from engine.prefabs import PREFAB_KEY, PrefabLibrary
+from engine.spatial_hash import SpatialHash
+
+try:
+    import numpy as np  # type: ignore
+
+    _NP_OK = True
+except Exception:
+    np = None  # type: ignore[assignment]
+    _NP_OK = False
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+ENTITY_COLOR = (235, 235, 240)  # 🔧 МОЖНО МЕНЯТЬ: заливка сущности
+LOD_TILE_MIN_ALPHA = 64  # 🔧 МОЖНО МЕНЯТЬ: альфа самой разреженной непустой плитки плотности (0..255)
+RENDER_SCALE_MIN = 0.25  # 🔧 МОЖНО МЕНЯТЬ: ниже этого render_scale не опускается (картинка уже нечитаема)
+
 
 class SceneViewport:
     """
     🧠 ЛОГИКА:
     Viewport — отдельная область внутри окна редактора, где:
     - рисуем "мир" (сетку, сущности)
-    - выбираем сущности
-    - перетаскиваем сущности
+    - выбираем сущности (клик, рамка, Shift+клик) и перетаскиваем их
     - делаем преобразование screen <-> world
 
-    Сейчас камера = простое смещение (cam_x/cam_y), zoom пока не нужен.
+    Камера = смещение (cam_x/cam_y, левый верхний угол в мире) и масштаб zoom (пикселей экрана
+    на единицу мира). entities — список dict или EntityStore (тогда всё по NumPy-колонкам).
+    Состояние: пространственный хеш (выбор и отсечение невидимого), статический слой (mip-уровни, LRU),
+    выделение (selected_entity + группа), настройки LOD, render_scale; снаружи задаются
+    prefabs, minimap и compositor.
     """
 
     def __init__(self, rect: pygame.Rect):
@@ -26,10 +57,43 @@ class SceneViewport:
         self.grid_alpha = 60
         self.bg = (18, 19, 26)
         self.border = (120, 130, 170)
+        self.cull_margin = 64  # запас (ед. мира) вокруг видимой области: подписи рисуются над/правее rect
+        self.use_static_layer = True  # кешировать невыбранные сущности в слое (см. _static_layer)
+        self.layer_margin = 256       # запас слоя (px) с каждой стороны: столько камера едет без перерисовки
+        self.zoom_min = 1 / 16        # самый мелкий масштаб (вся карта)
+        self.zoom_max = 4.0
+        self.zoom_step = 1.25         # множитель zoom на один щелчок колеса
+        self.label_min_zoom = 0.5     # при меньшем масштабе подписи id не рисуются (всё равно не читаются)
+        self.mip_levels = 3           # сколько слоёв разных уровней держать в кеше
+        self.smooth_zoom = False      # True — промежуточный zoom через smoothscale (мягче, но дороже)
+        self.select_color = (255, 210, 120)  # обводка выбранных
+        self.box_color = (255, 210, 120)     # рамка выделения
+        self.lod_enabled = True       # правила LOD (см. _lod_plan)
+        self.lod_density = 40.0       # видимых сущностей на 100x100 px экрана, выше — без подписей
+        self.lod_min_px = 2           # сущность не больше стольких px по обеим сторонам — в плитки плотности
+        self.lod_tile = 4             # сторона плитки плотности (px экрана)
+        self.lod_max_draws = 4000     # отдельных прямоугольников за кадр (на площадь viewport), лишние — в плитки
+        self.lod_tile_color = ENTITY_COLOR     # цвет плиток (как у сущностей; альфа — по заполненности)
+        self.fill_backend = "batch"   # заливка сущностей без подписей: "batch" (DrawBatch) / "surfarray" (см. _use_raster)
+        self.render_scale = 1.0       # внутреннее разрешение viewport (доля от пикселей окна), см. _draw_scaled
+        self.render_font: pygame.font.Font | None = None  # шрифт подписей при render_scale < 1 (None — обычный)
 
         # Камера (world offset)
         self.cam_x = 0.0
         self.cam_y = 0.0
+        self.zoom = 1.0
+
+        # Кеш подписей id (общий для редактора)
+        self.labels = label_cache()
+
+        # Префабы проекта (задаёт редактор); None — сущности рисуются как есть
+        self.prefabs: PrefabLibrary | None = None
+
+        # Миникарта (задаёт редактор); None — правки хеша никуда не повторяются
+        self.minimap: Minimap | None = None
+
+        # Композиция текстурами (задаёт редактор, editor/render_backend.py); None — слой blit-ится в screen
+        self.compositor: TextureBackend | None = None
 
         # Drag state
         self.selected_entity: dict | None = None
@@ -37,6 +101,52 @@ class SceneViewport:
         self._grab_dx = 0.0
         self._grab_dy = 0.0
 
+        # Выделение группы: ключ (_sel_key) -> сущность; основная (selected_entity) может в неё не входить
+        self._selection: dict[int, dict] = {}
+        self._sel_rev = 0  # растёт при смене группы (ключ слоя / view_state)
+        self._group: tuple | None = None  # групповой drag: (store | None, handles | сущности, хват x, хват y)
+        self._group_last: tuple = ((), ())
+        self._group_moved = False
+
+        # Рамка выделения: угол, где нажали, и текущий угол (экранные координаты)
+        self._box_start: tuple[int, int] | None = None
+        self._box_end: tuple[int, int] = (0, 0)
+
+        # Pan state (перетаскивание камеры)
+        self._panning = False
+        self._pan_last: tuple[int, int] = (0, 0)
+
+        # Spatial index (picking)
+        self._spatial = SpatialHash()
+        self._spatial_src = None                  # контейнер, по которому построен индекс
+        self._spatial_count = -1                  # его длина на момент последней синхронизации
+        self._spatial_ents: dict[int, dict] = {}  # ключ -> сущность (только для списков)
+        self._spatial_keys: dict[int, int] = {}   # id(сущности) -> ключ (только для списков)
+        self._spatial_next = 0
+        self.spatial_rebuilds = 0
+
+        # Сетка (готовая поверхность, см. _grid_tile)
+        self._grid_surf: pygame.Surface | None = None
+        self._grid_key: tuple | None = None
+
+        # Статический слой (см. _static_layer): масштаб уровня -> (слой, ключ, камера при отрисовке)
+        self._layers: OrderedDict[float, tuple[pygame.Surface, tuple, float, float]] = OrderedDict()
+        self._zoom_surf: pygame.Surface | None = None  # приёмник масштабированного окна (без аллокации на кадр)
+        self._low_surf: pygame.Surface | None = None   # viewport в пониженном разрешении (см. _draw_scaled)
+        self.layer_rebuilds = 0
+
+        # Ревизия картинки: растёт при любой правке сущностей через viewport (см. view_state)
+        self.revision = 0
+
+        # Culling (для debug overlay): сколько нарисовано в последнем кадре / сколько всего в сцене
+        self.visible_count = 0
+        self.total_count = 0
+
+        # LOD (для debug overlay): последний проход рисования был "плотным" / сколько сущностей ушло в плитки
+        self.lod_dense = False
+        self.lod_merged = 0
+        self._lod_frame: pygame.Rect | None = None  # кадр viewport в координатах прохода (см. _lod_plan)
+
     def set_rect(self, rect: pygame.Rect) -> None:
         self.rect = rect
 
@@ -45,47 +155,361 @@ class SceneViewport:
     # -----------------------------
     def screen_to_world(self, screen_pos: tuple[int, int]) -> tuple[float, float]:
         sx, sy = screen_pos
-        wx = (sx - self.rect.x) + self.cam_x
-        wy = (sy - self.rect.y) + self.cam_y
+        wx = (sx - self.rect.x) / self.zoom + self.cam_x
+        wy = (sy - self.rect.y) / self.zoom + self.cam_y
         return wx, wy
 
     def world_to_screen(self, world_pos: tuple[float, float]) -> tuple[int, int]:
         wx, wy = world_pos
-        sx = int((wx - self.cam_x) + self.rect.x)
-        sy = int((wy - self.cam_y) + self.rect.y)
+        # floor, а не int(): без скачка на 1 px, когда дробная координата пересекает 0 экрана
+        sx = math.floor((wx - self.cam_x) * self.zoom + self.rect.x)
+        sy = math.floor((wy - self.cam_y) * self.zoom + self.rect.y)
         return sx, sy
 
     def contains(self, screen_pos: tuple[int, int]) -> bool:
         return self.rect.collidepoint(screen_pos)
 
+    def world_view_rect(self) -> tuple[float, float, float, float]:
+        """🧠 ЛОГИКА: видимая область мира (x, y, w, h)."""
+        return self.cam_x, self.cam_y, self.rect.width / self.zoom, self.rect.height / self.zoom
+
     # -----------------------------
-    # Picking / dragging
+    # Camera pan
+    # -----------------------------
+    def start_pan(self, screen_pos: tuple[int, int]) -> None:
+        self._panning = True
+        self._pan_last = (int(screen_pos[0]), int(screen_pos[1]))
+
+    def pan_to(self, screen_pos: tuple[int, int]) -> bool:
+        """🧠 ЛОГИКА: сдвиг камеры за мышью. True — если камера сдвинулась."""
+        if not self._panning:
+            return False
+        sx, sy = int(screen_pos[0]), int(screen_pos[1])
+        dx = sx - self._pan_last[0]
+        dy = sy - self._pan_last[1]
+        self._pan_last = (sx, sy)
+        if dx == 0 and dy == 0:
+            return False
+        self.cam_x -= dx / self.zoom
+        self.cam_y -= dy / self.zoom
+        return True
+
+    def end_pan(self) -> None:
+        self._panning = False
+
+    def center_on(self, wx: float, wy: float) -> bool:
+        """🧠 ЛОГИКА: точка мира — в центр viewport (клик по миникарте). True — если камера сдвинулась."""
+        z = self.zoom
+        # камера — на сетке пикселей (как в zoom_at), иначе статический слой не используется
+        cx = round((wx - self.rect.width / (2 * z)) * z) / z
+        cy = round((wy - self.rect.height / (2 * z)) * z) / z
+        if cx == self.cam_x and cy == self.cam_y:
+            return False
+        self.cam_x = cx
+        self.cam_y = cy
+        return True
+
+    # -----------------------------
+    # Zoom
+    # -----------------------------
+    def zoom_at(self, screen_pos: tuple[int, int], factor: float) -> bool:
+        """🧠 ЛОГИКА: умножить zoom на factor вокруг точки экрана. True — если масштаб поменялся."""
+        z = min(max(self.zoom * factor, self.zoom_min), self.zoom_max)
+        p2 = 2.0 ** round(math.log2(z))
+        if abs(z - p2) < 1e-9 * p2:
+            z = p2  # ✅ 1/1.25*1.25 != 1.0 во float — прилипаем к степеням двойки (там слой 1:1)
+        if z == self.zoom:
+            return False
+
+        wx, wy = self.screen_to_world(screen_pos)
+        self.zoom = z
+        # камера — на сетке пикселей нового масштаба: иначе окно слоя не совпадает с экраном
+        self.cam_x = round((wx - (screen_pos[0] - self.rect.x) / z) * z) / z
+        self.cam_y = round((wy - (screen_pos[1] - self.rect.y) / z) * z) / z
+        return True
+
+    def wheel_zoom(self, screen_pos: tuple[int, int], notches: float) -> bool:
+        """🧠 ЛОГИКА: колесо мыши (event.y): вверх — приблизить, вниз — отдалить."""
+        if not notches or not self.contains(screen_pos):
+            return False
+        return self.zoom_at(screen_pos, self.zoom_step**notches)
+
+    # -----------------------------
+    # Entity rects
     # -----------------------------
+    def _resolve(self, ent: dict) -> dict:
+        """🧠 ЛОГИКА: экземпляр префаба -> ChainMap(экземпляр, шаблон), остальное как есть."""
+        if self.prefabs is not None and PREFAB_KEY in ent:
+            return self.prefabs.resolve(ent)  # type: ignore[return-value]
+        return ent
+
     def _entity_world_rect(self, ent: dict) -> pygame.Rect:
         return pygame.Rect(int(ent["x"]), int(ent["y"]), int(ent["w"]), int(ent["h"]))
 
     def _entity_screen_rect(self, ent: dict) -> pygame.Rect:
         wx = float(ent["x"])
         wy = float(ent["y"])
-        ww = int(ent["w"])
-        wh = int(ent["h"])
+        w = float(ent["w"])
+        h = float(ent["h"])
+        z = self.zoom
+        ww = int(w * z)
+        wh = int(h * z)
+        if z < 1.0:
+            # ⚠️ мелкая сущность при отдалении — хотя бы точка
+            ww = max(1, ww) if w > 0 else ww
+            wh = max(1, wh) if h > 0 else wh
         sx, sy = self.world_to_screen((wx, wy))
         return pygame.Rect(sx, sy, ww, wh)
 
+    def _store_world_columns(self, store: EntityStore, rows=None):
+        """
+        🧠 ЛОГИКА (векторно): строки type=="rect" -> (rows, x, y, w, h, geom_ok) в мировых координатах.
+        geom_ok=False — геометрия не числовая (лежит в extras), такие строки считаем по-старому.
+        rows — считать только эти строки (возрастающий массив номеров), иначе все.
+        """
+        sel = slice(None) if rows is None else rows
+        rect_code = store.type_code("rect")
+        is_rect = store.type_codes[sel] == rect_code
+        x, y, w, h = store.x[sel], store.y[sel], store.w[sel], store.h[sel]
+        geom_ok = store.geom_mask(rows)
+        if self.prefabs is not None and len(store.prefab_names()):
+            is_rect, (x, y, w, h), geom_ok = self._apply_prefab_columns(store, is_rect, (x, y, w, h), rows)
+
+        keep = np.nonzero(is_rect)[0]
+        out_rows = keep if rows is None else rows[keep]
+        return out_rows, x[keep], y[keep], w[keep], h[keep], geom_ok[keep]
+
+    def _store_screen_rects(self, store: EntityStore, rows=None):
+        """
+        🧠 ЛОГИКА (векторно):
+        строки type=="rect" -> (rows, sx, sy, w, h, geom_ok) — как _entity_screen_rect, но для всех сразу.
+        """
+        rows, x, y, w, h, geom_ok = self._store_world_columns(store, rows)
+        # floor — как в world_to_screen
+        z = self.zoom
+        sx = np.floor((x - self.cam_x) * z + self.rect.x).astype(np.int64)
+        sy = np.floor((y - self.cam_y) * z + self.rect.y).astype(np.int64)
+        sw = (w * z).astype(np.int64)
+        sh = (h * z).astype(np.int64)
+        if z < 1.0:
+            sw = np.where(w > 0, np.maximum(sw, 1), sw)
+            sh = np.where(h > 0, np.maximum(sh, 1), sh)
+        return rows, sx, sy, sw, sh, geom_ok
+
+    def _apply_prefab_columns(self, store: EntityStore, is_rect, geom: tuple, rows=None):
+        """
+        🧠 ЛОГИКА (векторно): для экземпляров префабов недостающие type/x/y/w/h берутся
+        из шаблона по коду префаба строки (таблица шаблонов — по одному значению на префаб).
+        """
+        codes = store.prefab_codes if rows is None else store.prefab_codes[rows]
+        inst = codes >= 0
+        codes = np.where(inst, codes, 0)
+        tcols = self.prefabs.template_columns(store.prefab_names(), ("type", *GEOM_KEYS))  # type: ignore[union-attr]
+
+        t_rect = np.array([t == "rect" for t in tcols["type"]], dtype=bool)
+        is_rect = np.where(store.column_mask("type", rows), is_rect, inst & t_rect[codes])
+
+        out = []
+        geom_ok = np.ones(len(codes), dtype=bool)
+        for key, col in zip(GEOM_KEYS, geom):
+            vals = tcols[key]
+            t_ok = np.array([isinstance(v, (int, float)) and not isinstance(v, bool) for v in vals], dtype=bool)
+            t_arr = np.array([float(v) if ok else 0.0 for v, ok in zip(vals, t_ok.tolist())], dtype=np.float64)
+            own = store.column_mask(key, rows)
+            out.append(np.where(own, col, t_arr[codes]))
+            geom_ok &= own | (inst & t_ok[codes])
+        return is_rect, tuple(out), geom_ok
+
+    # -----------------------------
+    # Spatial index
+    # -----------------------------
+    def _world_bounds(self, ent: dict) -> tuple[float, float, float, float] | None:
+        """🧠 ЛОГИКА: (x, y, w, h) прямоугольника в мире или None — сущность не выбирается мышью."""
+        src = self._resolve(ent)
+        if src.get("type") != "rect":
+            return None
+        try:
+            return float(src["x"]), float(src["y"]), float(src["w"]), float(src["h"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def invalidate_spatial(self) -> None:
+        """🧠 ЛОГИКА: список сущностей поменялся целиком (подгрузка клеток и т.п.) — перестроим при запросе."""
+        self._spatial_src = None
+        self._layers.clear()
+        self.revision += 1
+
+    def _rebuild_spatial(self, entities) -> None:
+        """
+        🧠 ЛОГИКА: пространственный хеш (engine/spatial_hash.py) в мировых координатах — с нуля.
+        Строится при первом запросе, дальше обновляется точечно: drag (сам viewport),
+        entity_added / entity_removed (редактор). Ключ: для EntityStore — handle строки,
+        для списка — порядковый номер (новые — в конец).
+        """
+        sh = self._spatial
+        sh.clear()
+        self._spatial_ents.clear()
+        self._spatial_keys.clear()
+
+        if _NP_OK and isinstance(entities, EntityStore):
+            rows, x, y, w, h, geom_ok = self._store_world_columns(entities)
+            keys = np.asarray(entities.handles(), dtype=np.int64)[rows]
+            ok = geom_ok
+            sh.insert_many(zip(keys[ok].tolist(), x[ok].tolist(), y[ok].tolist(), w[ok].tolist(), h[ok].tolist()))
+            # редкие строки с нечисловой геометрией — по одной
+            for r, key in zip(rows[~ok].tolist(), keys[~ok].tolist()):
+                b = self._world_bounds(entities[r])
+                if b is not None:
+                    sh.insert(key, *b)
+        else:
+            items = []
+            for i, ent in enumerate(entities):
+                b = self._world_bounds(ent)
+                if b is not None:
+                    items.append((i, *b))
+                self._spatial_ents[i] = ent
+                self._spatial_keys[id(ent)] = i
+            sh.insert_many(items)
+            self._spatial_next = len(entities)
+
+        self._spatial_src = entities
+        self._spatial_count = len(entities)
+        self.spatial_rebuilds += 1
+        self._prune_selection(entities)
+        self._minimap_reset()
+
+    def _sync_spatial(self, entities) -> None:
+        if entities is not self._spatial_src or len(entities) != self._spatial_count:
+            self._rebuild_spatial(entities)
+
+    def _visible_keys(self, entities) -> list[int]:
+        """
+        🧠 ЛОГИКА: ключи хеша, чьи прямоугольники пересекают видимую область (по возрастанию = порядок отрисовки).
+        + запас cull_margin под подписи. Время кадра зависит от того, что на экране, а не от размера сцены.
+        """
+        self._sync_spatial(entities)
+        vx, vy, vw, vh = self.world_view_rect()
+        m = self.cull_margin / self.zoom  # запас под подписи задан в пикселях экрана
+        return sorted(self._spatial.query_rect(vx - m, vy - m, vw + 2 * m, vh + 2 * m))
+
+    def _spatial_key(self, ent: dict, add: bool = False) -> int | None:
+        src = self._spatial_src
+        if isinstance(src, EntityStore):
+            row = src.index_of(ent)
+            return src.handle_at(row) if row >= 0 else None
+        key = self._spatial_keys.get(id(ent))
+        if key is None and add:
+            key = self._spatial_next
+            self._spatial_next += 1
+            self._spatial_ents[key] = ent
+            self._spatial_keys[id(ent)] = key
+        return key
+
+    def _spatial_update(self, ent: dict) -> None:
+        """🧠 ЛОГИКА: сущность сдвинулась/изменилась — переложить её в нужные ячейки."""
+        if self._spatial_src is None:
+            return
+        key = self._spatial_key(ent)
+        if key is None:
+            self.invalidate_spatial()
+            return
+        b = self._world_bounds(ent)
+        if b is None:
+            self._spatial.remove(key)
+        else:
+            self._spatial.move(key, *b)
+        self._minimap_move(key, b)
+
+    def _minimap_reset(self) -> None:
+        """
+        🧠 ЛОГИКА: миникарта заново по всем bounds хеша (вместе с перестройкой хеша).
+        В остальное время каждая правка хеша повторяется в ней точечно (_minimap_move).
+        """
+        if self.minimap is None or not _NP_OK:
+            return
+        items = self._spatial.items()
+        n = len(items)
+        keys = np.fromiter((k for k, _b in items), dtype=np.int64, count=n)
+        b = np.array([b for _k, b in items], dtype=np.float64).reshape(n, 4)
+        self.minimap.reset(keys, b[:, 0], b[:, 1], b[:, 2], b[:, 3])
+
+    def _minimap_move(self, key: int, b: tuple[float, float, float, float] | None) -> None:
+        """🧠 ЛОГИКА: повторить правку хеша в миникарте (b — (x, y, w, h) или None — ключ убран)."""
+        m = self.minimap
+        if m is None:
+            return
+        if b is None:
+            m.discard((key,))
+        else:
+            x, y, w, h = b
+            m.update((key,), (x,), (y,), (x + w,), (y + h,))
+
+    def entity_added(self, ent: dict) -> None:
+        """🧠 ЛОГИКА: вызывать сразу после добавления сущности в конец списка сцены."""
+        self.revision += 1
+        self._layers.clear()
+        if self._spatial_src is None:
+            return
+        key = self._spatial_key(ent, add=True)
+        if key is None:
+            self.invalidate_spatial()
+            return
+        b = self._world_bounds(ent)
+        if b is not None:
+            self._spatial.insert(key, *b)
+            self._minimap_move(key, b)
+        self._spatial_count += 1
+
+    def entity_removed(self, ent: dict) -> None:
+        """🧠 ЛОГИКА: вызывать ПЕРЕД удалением сущности из списка сцены."""
+        self.revision += 1
+        self._layers.clear()
+        if self._spatial_src is None:
+            return
+        key = self._spatial_key(ent)
+        if key is None:
+            self.invalidate_spatial()
+            return
+        self._spatial.remove(key)
+        self._minimap_move(key, None)
+        if self._selection.pop(self._sel_key(ent), None) is not None:
+            self._sel_rev += 1
+        self.labels.discard(str(ent.get("id", "")))
+        if not isinstance(self._spatial_src, EntityStore):
+            self._spatial_ents.pop(key, None)
+            self._spatial_keys.pop(id(ent), None)
+        self._spatial_count -= 1
+
+    # -----------------------------
+    # Picking / dragging
+    # -----------------------------
     def pick_entity(self, screen_pos: tuple[int, int], entities: list[dict]) -> dict | None:
         """
         🧠 ЛОГИКА:
         Выбор сущности только внутри viewport.
         Приоритет: сущности “выше” (последние в списке).
+        Кандидаты — из ячейки пространственного хеша под курсором, точная проверка — по экранному rect.
         """
         if not self.contains(screen_pos):
             return None
 
-        for ent in reversed(entities):
-            if ent.get("type") != "rect":
-                continue
-            r = self._entity_screen_rect(ent)
-            if r.collidepoint(screen_pos):
+        self._sync_spatial(entities)
+        wx, wy = self.screen_to_world(screen_pos)
+        # ⚠️ экранный rect округляется до пикселя — берём кандидатов с запасом в 1 пиксель экрана
+        # (и не меньше 1 единицы мира: при отдалении мелкая сущность растянута до точки)
+        pad = max(1.0, 1.0 / self.zoom)
+        keys = self._spatial.query_rect(wx - pad, wy - pad, 2 * pad, 2 * pad)
+        if not keys:
+            return None
+
+        if isinstance(entities, EntityStore):
+            order = sorted((entities.row_of_handle(k) for k in keys), reverse=True)
+            candidates = (entities[r] for r in order if r >= 0)
+        else:
+            candidates = (self._spatial_ents[k] for k in sorted(keys, reverse=True))
+
+        for ent in candidates:
+            if self._entity_screen_rect(self._resolve(ent)).collidepoint(screen_pos):
                 return ent
         return None
 
@@ -96,95 +520,913 @@ class SceneViewport:
         self.selected_entity = ent
         wx, wy = self.screen_to_world(screen_pos)
 
-        ex = float(ent["x"])
-        ey = float(ent["y"])
+        src = self._resolve(ent)
+        ex = float(src["x"])
+        ey = float(src["y"])
         self._grab_dx = wx - ex
         self._grab_dy = wy - ey
 
         self._dragging = True
+        self._group = None
+        self._group_moved = False
+        if self._selection:
+            self._start_group_drag(wx, wy)
 
-    def drag_to(self, screen_pos: tuple[int, int]) -> None:
-        if not self._dragging or not self.selected_entity:
+    def _start_group_drag(self, wx: float, wy: float) -> None:
+        """
+        🧠 ЛОГИКА: группа = выделение + основная сущность. "Хват" каждой (курсор - позиция) —
+        массивом: drag_to считает новые позиции всей группы сразу, как int(курсор - хват) у одной.
+        """
+        src = self._spatial_src
+        members = self.selected_entities(src)
+        if _NP_OK and isinstance(src, EntityStore):
+            rows = np.asarray([e.row for e in members], dtype=np.int64)
+            rows, x, y, _w, _h, ok = self._store_world_columns(src, np.sort(rows[rows >= 0]))
+            x = x.copy()
+            y = y.copy()
+            for i in np.nonzero(~ok)[0].tolist():
+                # редкие строки с нечисловой геометрией — по одной (не число — такую не двигаем)
+                b = self._world_bounds(src[int(rows[i])])
+                x[i], y[i] = (b[0], b[1]) if b is not None else (np.nan, np.nan)
+            keep = ~np.isnan(x)
+            rows, x, y = rows[keep], x[keep], y[keep]
+            handles = np.asarray([src.handle_at(r) for r in rows.tolist()], dtype=np.int64)
+            self._group = (src, handles, wx - x, wy - y)
+            self._group_last = (x, y)
             return
+        ents, gx, gy, x0, y0 = [], [], [], [], []
+        for ent in members:
+            b = self._world_bounds(ent)
+            if b is None:
+                continue
+            ents.append(ent)
+            gx.append(wx - b[0])
+            gy.append(wy - b[1])
+            x0.append(b[0])
+            y0.append(b[1])
+        self._group = (None, ents, gx, gy)
+        self._group_last = (x0, y0)
+
+    def _drag_group(self, wx: float, wy: float) -> bool:
+        store, members, gx, gy = self._group  # type: ignore[misc]
+        if store is not None:
+            nx = np.trunc(wx - gx).astype(np.int64)  # trunc = int() у одиночного drag
+            ny = np.trunc(wy - gy).astype(np.int64)
+            lx, ly = self._group_last
+            if np.array_equal(nx, lx) and np.array_equal(ny, ly):
+                return False
+            rows = store.rows_of_handles(members)
+            live = rows >= 0
+            store.set_positions(rows[live], nx[live], ny[live])  # ✅ одно присваивание на колонку
+        else:
+            nx = [int(wx - g) for g in gx]
+            ny = [int(wy - g) for g in gy]
+            if (nx, ny) == self._group_last:
+                return False
+            for ent, x, y in zip(members, nx, ny):
+                ent["x"] = x
+                ent["y"] = y
+        self._group_last = (nx, ny)
+        self._group_moved = True
+        self.revision += 1
+        return True
+
+    def drag_to(self, screen_pos: tuple[int, int]) -> bool:
+        """🧠 ЛОГИКА: True — если сущность (или группа) реально сдвинулась (для отметки "сцена изменена")."""
+        if not self._dragging or not self.selected_entity:
+            return False
         wx, wy = self.screen_to_world(screen_pos)
-        self.selected_entity["x"] = int(wx - self._grab_dx)
-        self.selected_entity["y"] = int(wy - self._grab_dy)
+        if self._group is not None:
+            return self._drag_group(wx, wy)
+        nx = int(wx - self._grab_dx)
+        ny = int(wy - self._grab_dy)
+        ent = self.selected_entity
+        if ent.get("x") == nx and ent.get("y") == ny:
+            return False
+        if isinstance(ent, EntityView) and ent.store is not None:
+            ent.store.set_position(ent.row, nx, ny)  # ✅ сразу в колонки
+        else:
+            ent["x"] = nx
+            ent["y"] = ny
+        self._spatial_update(ent)
+        self.revision += 1
+        return True
 
-    def end_drag(self) -> None:
+    def end_drag(self) -> list[dict]:
+        """
+        🧠 ЛОГИКА: конец drag. После группового — хеш обновляется здесь, одной пачкой (move_many).
+        Возвращает сдвинутые сущности группы (для отметки "изменена"; одиночный drag — []).
+        """
         self._dragging = False
+        group, self._group = self._group, None
+        if group is None or not self._group_moved:
+            return []
+        self._group_moved = False
+        store, members, _gx, _gy = group
+        if store is None:
+            moved = list(members)
+            self._spatial_update_many(moved)
+            return moved
+        rows = store.rows_of_handles(members)
+        rows = np.sort(rows[rows >= 0])
+        if self._spatial_src is store:
+            rows_, x, y, w, h, ok = self._store_world_columns(store, rows)
+            keys = [store.handle_at(r) for r in rows_.tolist()]
+            self._spatial.move_many(
+                (k, bx, by, bw, bh)
+                for k, bx, by, bw, bh, good in zip(keys, x.tolist(), y.tolist(), w.tolist(), h.tolist(), ok.tolist())
+                if good
+            )
+            if self.minimap is not None:
+                keys = np.asarray(keys, dtype=np.int64)
+                self.minimap.update(keys[ok], x[ok], y[ok], (x + w)[ok], (y + h)[ok])
+            for r in rows_[~ok].tolist():
+                self._spatial_update(store[r])
+        return [store[r] for r in rows.tolist()]
+
+    def _spatial_update_many(self, ents: list[dict]) -> None:
+        """🧠 ЛОГИКА: _spatial_update для многих сущностей списка — перекладка одной пачкой."""
+        if self._spatial_src is None:
+            return
+        items = []
+        for ent in ents:
+            key = self._spatial_keys.get(id(ent))
+            if key is None:
+                self.invalidate_spatial()
+                return
+            b = self._world_bounds(ent)
+            if b is None:
+                self._spatial.remove(key)
+                self._minimap_move(key, None)
+            else:
+                items.append((key, *b))
+        self._spatial.move_many(items)
+        if self.minimap is not None and items:
+            k, x, y, w, h = (np.asarray(col, dtype=np.float64) for col in zip(*items))
+            self.minimap.update(k.astype(np.int64), x, y, x + w, y + h)
 
     def clear_selection(self) -> None:
+        if self._group is not None:
+            self.end_drag()  # ⚠️ хеш после группового drag ещё не обновлён
         self.selected_entity = None
         self._dragging = False
+        self._box_start = None
+        if self._selection:
+            self._selection = {}
+            self._sel_rev += 1
+
+    # -----------------------------
+    # Selection (группа, рамка)
+    # -----------------------------
+    @staticmethod
+    def _sel_key(ent: dict) -> int:
+        """🧠 ЛОГИКА: ключ выделения — handle строки EntityStore (view пересоздаётся) или id(dict)."""
+        if isinstance(ent, EntityView) and ent.store is not None:
+            return ent.store.handle_at(ent.row)
+        return id(ent)
+
+    @property
+    def selection_count(self) -> int:
+        """🧠 ЛОГИКА: сколько выделено всего (группа + основная)."""
+        n = len(self._selection)
+        sel = self.selected_entity
+        if sel is not None and self._sel_key(sel) not in self._selection:
+            n += 1
+        return n
+
+    def is_selected(self, ent: dict) -> bool:
+        return ent is self.selected_entity or self._sel_key(ent) in self._selection
+
+    def select(self, ent: dict | None, add: bool = False) -> None:
+        """
+        🧠 ЛОГИКА: клик по сущности. add (Shift) — прежняя основная и новая остаются в группе,
+        иначе группа сбрасывается и выбрана только ent.
+        """
+        if add:
+            for e in (self.selected_entity, ent):
+                if e is not None:
+                    self._selection[self._sel_key(e)] = e
+        elif self._selection:
+            self._selection = {}
+        self.selected_entity = ent
+        self._sel_rev += 1
+
+    def selected_entities(self, entities) -> list[dict]:
+        """🧠 ЛОГИКА: группа + основная в порядке отрисовки (для Delete / drag)."""
+        out = list(self._selection.values())
+        sel = self.selected_entity
+        if sel is not None and self._sel_key(sel) not in self._selection:
+            out.append(sel)
+        if isinstance(entities, EntityStore):
+            out.sort(key=lambda e: e.row if isinstance(e, EntityView) else -1)
+        else:
+            order = self._spatial_keys
+            out.sort(key=lambda e: order.get(id(e), -1))
+        return out
+
+    def _selection_rows(self, store: EntityStore):
+        """🧠 ЛОГИКА: строки группы (по возрастанию; удалённые отброшены)."""
+        handles = np.fromiter(self._selection.keys(), dtype=np.int64, count=len(self._selection))
+        rows = store.rows_of_handles(handles)
+        return np.sort(rows[rows >= 0])
+
+    def _prune_selection(self, entities) -> None:
+        """🧠 ЛОГИКА: после перестройки индекса — выкинуть из группы то, чего в сцене больше нет."""
+        if not self._selection:
+            return
+        if isinstance(entities, EntityStore):
+            keep = {k: e for k, e in self._selection.items() if isinstance(e, EntityView) and e.store is entities}
+        else:
+            keep = {k: e for k, e in self._selection.items() if k in self._spatial_keys}
+        if len(keep) != len(self._selection):
+            self._selection = keep
+            self._sel_rev += 1
+
+    @property
+    def boxing(self) -> bool:
+        return self._box_start is not None
+
+    def start_box(self, screen_pos: tuple[int, int]) -> None:
+        """🧠 ЛОГИКА: нажали ЛКМ по пустому месту viewport — тянем рамку выделения."""
+        self._box_start = screen_pos
+        self._box_end = screen_pos
+
+    def box_to(self, screen_pos: tuple[int, int]) -> bool:
+        if self._box_start is None:
+            return False
+        self._box_end = screen_pos
+        return True
+
+    def box_rect(self) -> pygame.Rect | None:
+        """🧠 ЛОГИКА: рамка в экранных координатах (обрезана по viewport) или None — рамки нет."""
+        if self._box_start is None:
+            return None
+        (x0, y0), (x1, y1) = self._box_start, self._box_end
+        return pygame.Rect(min(x0, x1), min(y0, y1), abs(x1 - x0), abs(y1 - y0)).clip(self.rect)
+
+    def end_box(self, entities, add: bool = False) -> dict | None:
+        """
+        🧠 ЛОГИКА: отпустили ЛКМ — выделить всё, что задевает рамку. add (Shift) — добавить к выделению.
+        Основной становится верхняя (последняя в порядке отрисовки) из попавших. Возвращает основную.
+        """
+        r = self.box_rect()
+        self._box_start = None
+        hits = self.entities_in_rect(r, entities) if r is not None and r.width and r.height else []
+        if not add:
+            self._selection = {}
+        elif self.selected_entity is not None:
+            self._selection[self._sel_key(self.selected_entity)] = self.selected_entity
+        for ent in hits:
+            self._selection[self._sel_key(ent)] = ent
+        if hits or not add:
+            self.selected_entity = hits[-1] if hits else None
+        self._sel_rev += 1
+        return self.selected_entity
+
+    def entities_in_rect(self, screen_rect: pygame.Rect, entities) -> list[dict]:
+        """
+        🧠 ЛОГИКА: сущности, чьи экранные прямоугольники пересекают screen_rect (в порядке отрисовки).
+        Кандидаты — запросом прямоугольника к хешу, точная проверка — как у pick_entity, по экранному rect.
+        """
+        self._sync_spatial(entities)
+        wx0, wy0 = self.screen_to_world(screen_rect.topleft)
+        wx1, wy1 = self.screen_to_world(screen_rect.bottomright)
+        pad = max(1.0, 1.0 / self.zoom)  # экранный rect округляется до пикселя (см. pick_entity)
+        keys = self._spatial.query_rect(wx0 - pad, wy0 - pad, wx1 - wx0 + 2 * pad, wy1 - wy0 + 2 * pad)
+        if not keys:
+            return []
+
+        if _NP_OK and isinstance(entities, EntityStore):
+            rows = entities.rows_of_handles(np.fromiter(keys, dtype=np.int64, count=len(keys)))
+            rows, sx, sy, w, h, ok = self._store_screen_rects(entities, np.sort(rows[rows >= 0]))
+            # как Rect.colliderect (пустой прямоугольник ни с чем не пересекается)
+            hit = (
+                (sx < screen_rect.right) & (sx + w > screen_rect.x)
+                & (sy < screen_rect.bottom) & (sy + h > screen_rect.y)
+                & (w > 0) & (h > 0)
+            )
+            out = []
+            for r, good, ok_geom in zip(rows.tolist(), hit.tolist(), ok.tolist()):
+                if not ok_geom:
+                    good = self._entity_screen_rect(self._resolve(entities[r])).colliderect(screen_rect)
+                if good:
+                    out.append(entities[r])
+            return out
+
+        candidates = (self._spatial_ents[k] for k in sorted(keys))
+        return [ent for ent in candidates if self._entity_screen_rect(self._resolve(ent)).colliderect(screen_rect)]
 
     # -----------------------------
     # Render
     # -----------------------------
-    def _draw_grid(self, surf: pygame.Surface) -> None:
-        # сетка рисуется только внутри viewport через clip
-        w = self.rect.width
-        h = self.rect.height
+    def view_state(self) -> tuple:
+        """
+        🧠 ЛОГИКА: всё, от чего зависит картинка viewport (для editor/dirty_regions.py):
+        камера, сетка, ревизия сущностей, их число и выделение. Не поменялось — кадр тот же.
+        """
+        return (
+            self.cam_x,
+            self.cam_y,
+            self.zoom,
+            int(self.grid_step),
+            int(self.grid_alpha),
+            self.revision,
+            self.total_count,
+            self._selection_key(),
+            None if self._box_start is None else tuple(self.box_rect()),
+            self.effective_render_scale(),
+        )
+
+    def _selection_key(self) -> Any:
+        sel = self.selected_entity
+        if isinstance(sel, EntityView) and sel.store is not None:
+            return ("row", sel.row, self._sel_rev)  # view создаётся заново, строка — нет
+        return (id(sel), self._sel_rev)
+
+    def _grid_tile(self, w: int, h: int, step: int) -> pygame.Surface:
+        """
+        🧠 ЛОГИКА: сетка, отрисованная один раз: линии через каждые step пикселей,
+        на step больше viewport по обеим осям (запас под сдвиг камеры).
+        Перерисовывается только при смене grid_step / grid_alpha / размера viewport.
+        """
+        key = (w, h, step, int(self.grid_alpha))
+        if self._grid_surf is not None and self._grid_key == key:
+            return self._grid_surf
+
+        tw = w + step
+        th = h + step
+        grid_color = (255, 255, 255, int(self.grid_alpha))
+        tile = pygame.Surface((tw, th), pygame.SRCALPHA)
+
+        # vertical
+        for x in range(0, tw, step):
+            pygame.draw.line(tile, grid_color, (x, 0), (x, th), 1)
+
+        # horizontal
+        for y in range(0, th, step):
+            pygame.draw.line(tile, grid_color, (0, y), (tw, y), 1)
+
+        if pygame.display.get_surface() is not None:
+            tile = tile.convert_alpha()  # ✅ формат экрана — blit без конвертации на каждом кадре
+        self._grid_surf = tile
+        self._grid_key = key
+        return tile
+
+    def _grid_step_px(self) -> float:
+        """🧠 ЛОГИКА: шаг сетки на экране; при отдалении мировой шаг удваивается, пока линии не реже 8 px."""
+        step = max(8, int(self.grid_step)) * self.zoom
+        while step < 8:
+            step *= 2
+        return step
+
+    def _draw_grid(self, surf: pygame.Surface, area: pygame.Rect | None = None) -> None:
+        # сетка рисуется только внутри viewport через clip (area — другая область, например весь слой)
+        area = self.rect if area is None else area
+        w = area.width
+        h = area.height
         if w <= 0 or h <= 0:
             return
 
         # стартовые линии с учётом камеры
         # (cam_x/cam_y — в world, значит сдвиг влияет на видимую сетку)
-        step = max(8, int(self.grid_step))
+        step = self._grid_step_px()
+
+        offset_x = (-(self.cam_x * self.zoom + area.x - self.rect.x)) % step
+        offset_y = (-(self.cam_y * self.zoom + area.y - self.rect.y)) % step
 
-        offset_x = int((-self.cam_x) % step)
-        offset_y = int((-self.cam_y) % step)
+        if not step.is_integer():
+            # ⚠️ дробный шаг (zoom не степень двойки) — тайл не повторяется, рисуем линии по месту
+            self._draw_grid_lines(surf, area, step, offset_x, offset_y)
+            return
+
+        # ✅ готовая сетка: вырезаем окно так, чтобы линия тайла k*step попала в offset + (k-1)*step
+        step = int(step)
+        offset_x = int(offset_x)
+        offset_y = int(offset_y)
+        tile = self._grid_tile(w, h, step)
+        surf.blit(tile, (area.x, area.y), pygame.Rect(step - offset_x, step - offset_y, w, h))
 
+    def _draw_grid_lines(self, surf: pygame.Surface, area: pygame.Rect, step: float, offset_x: float, offset_y: float) -> None:
+        w = area.width
+        h = area.height
         grid_color = (255, 255, 255, int(self.grid_alpha))
-        grid_surf = pygame.Surface((w, h), pygame.SRCALPHA)
+        lines = pygame.Surface((w, h), pygame.SRCALPHA)
 
-        # vertical
-        x = offset_x
-        while x < w:
-            pygame.draw.line(grid_surf, grid_color, (x, 0), (x, h), 1)
-            x += step
+        for k in range(int((w - offset_x) / step) + 1):
+            x = int(offset_x + k * step)
+            pygame.draw.line(lines, grid_color, (x, 0), (x, h), 1)
 
-        # horizontal
-        y = offset_y
-        while y < h:
-            pygame.draw.line(grid_surf, grid_color, (0, y), (w, y), 1)
-            y += step
+        for k in range(int((h - offset_y) / step) + 1):
+            y = int(offset_y + k * step)
+            pygame.draw.line(lines, grid_color, (0, y), (w, y), 1)
 
-        surf.blit(grid_surf, (self.rect.x, self.rect.y))
+        surf.blit(lines, (area.x, area.y))
 
-    def draw(
+    def _draw_entity(
+        self,
+        out: DrawBatch,
+        r: pygame.Rect,
+        ent_id,
+        selected: bool,
+        font: pygame.font.Font,
+        text_color: tuple[int, int, int],
+        label: bool = True,
+    ) -> None:
+        # базовый прямоугольник (у выбранного мельче обводки — сразу цвет обводки: она его всё равно закроет)
+        if not (selected and 4 >= min(r.width, r.height)):
+            out.fill(ENTITY_COLOR, r)
+
+        # id/label (при сильном отдалении — без подписей, см. _labels_visible)
+        if label:
+            label = self.labels.render(font, str(ent_id), text_color)
+            out.blit(label, (r.x, r.y - 18))
+
+        # обводка выбранного
+        if selected:
+            out.rect(self.select_color, r, 2)
+
+    def _draw_store(
+        self,
+        screen: pygame.Surface,
+        store: EntityStore,
+        font: pygame.font.Font,
+        text_color: tuple[int, int, int],
+        skip_selected: bool = False,
+    ) -> None:
+        """
+        🧠 ЛОГИКА: видимые строки — из пространственного хеша, их экранные прямоугольники
+        считаются по колонкам, рисование — по строкам (порядок тот же).
+        skip_selected — выбранную строку не рисовать (её рисует _draw_selected поверх слоя).
+        """
+        visible = store.rows_of_handles(np.asarray(self._visible_keys(store), dtype=np.int64))
+        visible = np.sort(visible[visible >= 0])  # handles не обязаны идти в порядке строк
+        rows, sx, sy, w, h, geom_ok = self._store_screen_rects(store, visible)
+        self.visible_count = len(rows)
+        sel = self.selected_entity
+        sel_row = store.index_of(sel) if isinstance(sel, EntityView) else -1
+        is_sel = rows == sel_row
+        if self._selection:
+            is_sel |= np.isin(rows, self._selection_rows(store))
+        merge = self._lod_plan(sx, sy, w, h, geom_ok & ~is_sel)
+        labels = self._labels_visible()
+
+        out = DrawBatch(screen)
+        if merge is not None:
+            self._draw_lod_tiles(out, sx[merge], sy[merge], w[merge], h[merge])
+            keep = ~merge
+            rows, sx, sy, w, h, geom_ok, is_sel = rows[keep], sx[keep], sy[keep], w[keep], h[keep], geom_ok[keep], is_sel[keep]
+        if self._use_raster(screen, labels, skip_selected):
+            out.flush()  # плитки LOD — под прямоугольниками
+            fill = geom_ok & ~is_sel
+            rect_raster.fill_rects(screen, ENTITY_COLOR, sx[fill], sy[fill], w[fill], h[fill])
+            keep = ~fill
+            rows, sx, sy, w, h, geom_ok, is_sel = rows[keep], sx[keep], sy[keep], w[keep], h[keep], geom_ok[keep], is_sel[keep]
+        for r, x, y, ww, hh, ok, selected in zip(
+            rows.tolist(), sx.tolist(), sy.tolist(), w.tolist(), h.tolist(), geom_ok.tolist(), is_sel.tolist()
+        ):
+            if skip_selected and selected:
+                continue
+            rect = pygame.Rect(x, y, ww, hh) if ok else self._entity_screen_rect(self._resolve(store[r]))
+            ent_id = store.value(r, "id", "") if labels else ""  # без подписей id не нужен
+            self._draw_entity(out, rect, ent_id, selected, font, text_color, labels)
+        out.flush()
+
+    def _draw_entities(
         self,
         screen: pygame.Surface,
         entities: list[dict],
         font: pygame.font.Font,
         text_color: tuple[int, int, int],
+        skip_selected: bool = False,
     ) -> None:
-        # фон viewport
-        pygame.draw.rect(screen, self.bg, self.rect)
+        """
+        🧠 ЛОГИКА: сущности (только видимые — см. _visible_keys) в порядке списка.
+        Подписи — из label_cache, прямоугольники и подписи уходят на поверхность пачкой (DrawBatch).
+        """
+        if _NP_OK and isinstance(entities, EntityStore):
+            self._draw_store(screen, entities, font, text_color, skip_selected)
+            return
+        visible = [self._spatial_ents[k] for k in self._visible_keys(entities)]
+        sel = self.selected_entity
+        group = self._selection
+        items = []  # (сущность, экранный прямоугольник, выбрана)
+        for ent in visible:
+            src = self._resolve(ent)
+            if src.get("type") != "rect":
+                continue
+            items.append((ent, self._entity_screen_rect(src), sel is ent or id(ent) in group))
+        self.visible_count = len(items)
 
-        # ограничиваем рисование только viewport
-        prev_clip = screen.get_clip()
-        screen.set_clip(self.rect)
+        out = DrawBatch(screen)
+        done = None  # уже нарисованы (плитками LOD / заливкой в пиксели)
+        if _NP_OK and items:
+            geom = np.array([(r.x, r.y, r.width, r.height) for _, r, _ in items], dtype=np.int64)
+            free = ~np.fromiter((selected for _, _, selected in items), dtype=bool, count=len(items))
+            merge = self._lod_plan(*geom.T, free)
+            done = np.zeros(len(items), dtype=bool)
+            if merge is not None:
+                self._draw_lod_tiles(out, *geom[merge].T)
+                done |= merge
+            if self._use_raster(screen, self._labels_visible(), skip_selected):
+                out.flush()  # плитки LOD — под прямоугольниками
+                fill = free & ~done
+                rect_raster.fill_rects(screen, ENTITY_COLOR, *geom[fill].T)
+                done |= fill
+            done = done.tolist()
+        else:
+            self.lod_dense = False
+            self.lod_merged = 0
+        labels = self._labels_visible()
+        for i, (ent, r, selected) in enumerate(items):
+            if (skip_selected and selected) or (done is not None and done[i]):
+                continue
+            self._draw_entity(out, r, ent.get("id", ""), selected, font, text_color, labels)
+        out.flush()
+
+    def _use_raster(self, surface: pygame.Surface, labels: bool, skip_selected: bool) -> bool:
+        """
+        🧠 ЛОГИКА: заливать невыбранные сущности прямо в пиксели (editor/rect_raster.py)?
+        Только без подписей и без выбранных в проходе: тогда всё, что рисуется, — заливки одного цвета
+        и картинка та же, что у DrawBatch. Иначе (или поверхность не годится) — по-старому.
+        """
+        return self.fill_backend == "surfarray" and skip_selected and not labels and rect_raster.available(surface)
+
+    def _lod_plan(self, sx, sy, w, h, free):
+        """
+        🧠 ЛОГИКА (векторно): правила LOD для одного прохода рисования (экран или статический слой).
+        - плотно (видимых больше lod_density на 100x100 px) — подписи не рисуются;
+        - сущность мельче lod_min_px на экране — сливается в плитки плотности (_draw_lod_tiles);
+        - отдельных прямоугольников не больше lod_max_draws: лишние (самые мелкие) — тоже в плитки.
+        Выбранные не сливаются никогда.
+        sx, sy, w, h — экранные прямоугольники видимых сущностей, free — их можно слить в плитки
+        (не выбраны, геометрия числовая). Выставляет lod_dense / lod_merged;
+        возвращает маску "в плитки плотности" или None (сливать нечего).
 
-        # сетка
-        self._draw_grid(screen)
+        Плотность и лимит считаются по сущностям в кадре viewport (_lod_frame), а не по всему проходу:
+        слой шире экрана, но решает так же, как прямое рисование того же кадра.
+        """
+        n = len(w)
+        self.lod_dense = False
+        self.lod_merged = 0
+        if not self.lod_enabled or n == 0:
+            return None
+        f = self._lod_frame or self.rect
+        in_frame = (sx < f.right) & (sx + w > f.x) & (sy < f.bottom) & (sy + h > f.y)
+        n_frame = int(in_frame.sum())
+        self.lod_dense = n_frame * 10000.0 / max(1, f.width * f.height) > self.lod_density
+
+        cap = max(0, int(self.lod_max_draws))
+        side = np.maximum(w, h)
+        limit = max(1, int(self.lod_min_px))
+        merge = free & (side <= limit)
+        # порог размера растёт ступенями x2 (до стороны плитки), пока в кадре больше cap отдельных:
+        # сливается по размеру сущности, а не по её месту в очереди
+        while n_frame - int((merge & in_frame).sum()) > cap and limit < self.lod_tile:
+            limit = min(2 * limit, max(1, int(self.lod_tile)))
+            merge = free & (side <= limit)
+        over = n_frame - int((merge & in_frame).sum()) - cap
+        if over > 0:
+            # ⚠️ и крупных больше лимита — порог по площади: over-я по величине среди оставшихся в кадре
+            area = w * h
+            rest = np.sort(area[free & ~merge & in_frame])
+            if len(rest):
+                merge |= free & (area <= rest[min(over, len(rest)) - 1])
+        self.lod_merged = int(merge.sum())
+        return merge if self.lod_merged else None
+
+    def _draw_lod_tiles(self, out: DrawBatch, sx, sy, w, h) -> None:
+        """
+        🧠 ЛОГИКА: слитые сущности -> плитки lod_tile px. Плитка = сумма площадей её сущностей
+        (по центрам, bincount) / площадь плитки = альфа (яркость в среднем та же, что у отдельных прямоугольников;
+        непустая плитка — не прозрачнее LOD_TILE_MIN_ALPHA, одиночная точка не пропадает).
+        Сетка плиток привязана к миру (к пикселям мира при текущем zoom): при сдвиге камеры не "плывёт".
+        Вся сетка — одна маленькая RGBA-картинка, растянутая в lod_tile раз: один blit на проход.
+        """
+        t = max(1, int(self.lod_tile))
+        z = self.zoom
+        # экран x = floor(X - base_x), где X — пиксель мира (мир * zoom)
+        base_x = self.cam_x * z - self.rect.x
+        base_y = self.cam_y * z - self.rect.y
+        area = self.rect.inflate(2 * self.cull_margin, 2 * self.cull_margin).clip(out.target.get_clip())
+        if area.width <= 0 or area.height <= 0:
+            return
+        ix0 = math.floor((area.x + base_x) / t)
+        iy0 = math.floor((area.y + base_y) / t)
+        cols = math.floor((area.right - 1 + base_x) / t) - ix0 + 1
+        rows = math.floor((area.bottom - 1 + base_y) / t) - iy0 + 1
+
+        ix = np.floor((sx + w * 0.5 + base_x) / t).astype(np.int64) - ix0
+        iy = np.floor((sy + h * 0.5 + base_y) / t).astype(np.int64) - iy0
+        inside = (ix >= 0) & (ix < cols) & (iy >= 0) & (iy < rows)
+        cells = iy[inside] * cols + ix[inside]
+        fill = np.bincount(cells, weights=(w * h)[inside].astype(np.float64), minlength=rows * cols) / (t * t)
+
+        rgba = np.empty((rows * cols, 4), dtype=np.uint8)
+        rgba[:, :3] = self.lod_tile_color
+        alpha = np.minimum(fill, 1.0) * 255.0
+        rgba[:, 3] = np.where(fill > 0, np.maximum(alpha, LOD_TILE_MIN_ALPHA), 0)
+        small = pygame.image.frombuffer(rgba.tobytes(), (cols, rows), "RGBA")
+        if pygame.display.get_surface() is not None:
+            small = small.convert_alpha()  # ✅ формат экрана — blit без конвертации
+        tiles = pygame.transform.scale(small, (cols * t, rows * t))
+        out.blit(tiles, (math.floor(ix0 * t - base_x), math.floor(iy0 * t - base_y)))
+
+    def _draw_selected(
+        self,
+        screen: pygame.Surface,
+        entities: list[dict],
+        font: pygame.font.Font,
+        text_color: tuple[int, int, int],
+    ) -> None:
+        """🧠 ЛОГИКА: выделенная группа и выбранная (перетаскиваемая) сущность — поверх статического слоя."""
+        ent = self.selected_entity
+        labels = self._labels_visible()
+        with DrawBatch(screen) as out:
+            if self._selection:
+                self._draw_group(out, entities, font, text_color, labels)
+            if ent is None or self._world_bounds(ent) is None:
+                return
+            r = self._entity_screen_rect(self._resolve(ent))
+            self._draw_entity(out, r, ent.get("id", ""), True, font, text_color, labels)
 
-        # сущности
-        for ent in entities:
-            if ent.get("type") != "rect":
+    def _draw_group(
+        self,
+        out: DrawBatch,
+        entities: list[dict],
+        font: pygame.font.Font,
+        text_color: tuple[int, int, int],
+        labels: bool,
+    ) -> None:
+        """
+        🧠 ЛОГИКА: группа (кроме основной) по текущим позициям — не через хеш: во время группового
+        drag он не обновляется. Отсечение — по экранным прямоугольникам (+ cull_margin под подписи).
+        """
+        view = self.rect.inflate(2 * self.cull_margin, 2 * self.cull_margin)
+        sel = self.selected_entity
+        if _NP_OK and isinstance(entities, EntityStore):
+            sel_row = entities.index_of(sel) if isinstance(sel, EntityView) else -1
+            rows, sx, sy, w, h, ok = self._store_screen_rects(entities, self._selection_rows(entities))
+            vis = (sx <= view.right) & (sx + w >= view.x) & (sy <= view.bottom) & (sy + h >= view.y)
+            vis |= ~ok
+            vis &= rows != sel_row  # основная — отдельно, поверх группы
+            if not labels and ok.all() and np.all(np.minimum(w, h) <= 4):
+                # ✅ отдалились: каждая сущность группы — сплошной цвет обводки (см. _draw_entity),
+                # порядок одноцветных заливок не важен — одна пачка без вызова на сущность
+                out.fill_many(self.select_color, sx[vis].tolist(), sy[vis].tolist(), w[vis].tolist(), h[vis].tolist())
+                return
+            for r, x, y, ww, hh, good in zip(
+                rows[vis].tolist(), sx[vis].tolist(), sy[vis].tolist(), w[vis].tolist(), h[vis].tolist(), ok[vis].tolist()
+            ):
+                rect = pygame.Rect(x, y, ww, hh) if good else self._entity_screen_rect(self._resolve(entities[r]))
+                ent_id = entities.value(r, "id", "") if labels else ""
+                self._draw_entity(out, rect, ent_id, True, font, text_color, labels)
+            return
+        for ent in self.selected_entities(entities):
+            if ent is sel:
+                continue
+            src = self._resolve(ent)
+            if src.get("type") != "rect":
                 continue
+            r = self._entity_screen_rect(src)
+            if r.x <= view.right and view.x <= r.right and r.y <= view.bottom and view.y <= r.bottom:
+                self._draw_entity(out, r, ent.get("id", ""), True, font, text_color, labels)
+
+    def _layer_scale(self) -> float:
+        """🧠 ЛОГИКА: масштаб статического слоя (mip-уровень): zoom >= 1 — сам zoom, иначе степень двойки сверху."""
+        z = self.zoom
+        if z >= 1.0:
+            return z
+        return 2.0 ** math.ceil(math.log2(z))
+
+    def _labels_visible(self) -> bool:
+        # по масштабу уровня, а не zoom: в слое и поверх него подписи появляются/пропадают вместе;
+        # плотно (LOD, см. _lod_plan) — тоже без подписей
+        return self._layer_scale() >= self.label_min_zoom and not self.lod_dense
+
+    def _layer_usable(self) -> bool:
+        if not (self.use_static_layer and self.rect.width > 0 and self.rect.height > 0):
+            return False
+        if self._layer_scale() != self.zoom:
+            return True  # mip: окно слоя всё равно масштабируется
+        # ⚠️ камера не на пиксельной сетке: экранные координаты округляются иначе, чем в слое — рисуем напрямую
+        px = self.cam_x * self.zoom
+        py = self.cam_y * self.zoom
+        return abs(px - round(px)) < 1e-6 and abs(py - round(py)) < 1e-6
+
+    def _static_layer(
+        self,
+        entities: list[dict],
+        font: pygame.font.Font,
+        text_color: tuple[int, int, int],
+    ) -> tuple[pygame.Surface, pygame.Rect]:
+        """
+        🧠 ЛОГИКА: слой "фон + сетка + невыбранные сущности" в масштабе уровня (_layer_scale)
+        и окно viewport внутри слоя для текущей камеры. Окно размером с viewport — blit 1:1,
+        крупнее (mip) — его надо масштабировать до viewport.
+        Слой шире viewport на layer_margin, слой mip — ещё вдвое: окно промежуточного zoom до 2x шире.
+        Перестраивается, если поменялось что-то из ключа (правки сцены, выделение, размер, сетка)
+        или окно вышло за край слоя. Слои уровней кешируются (до mip_levels штук, LRU):
+        промежуточный zoom колесом сцену не перерисовывает.
+        """
+        s = self._layer_scale()
+        exact = s == self.zoom
+        m = max(0, int(self.layer_margin))
+        w, h = self.rect.size
+        vw, vh = (w, h) if exact else (2 * w, 2 * h)
+        key = (
+            id(entities),
+            len(entities),
+            (vw, vh),
+            m,
+            int(self.grid_step),
+            int(self.grid_alpha),
+            tuple(self.bg),
+            id(self.prefabs),
+            font,
+            tuple(text_color),
+            self.label_min_zoom,
+            (self.lod_enabled, self.lod_density, self.lod_min_px, self.lod_tile, self.lod_max_draws, tuple(self.lod_tile_color)),
+            self.fill_backend,
+            self._selection_key(),
+        )
+        # окно viewport в пикселях слоя
+        ww = w * s / self.zoom
+        wh = h * s / self.zoom
+
+        entry = self._layers.get(s)
+        if entry is not None and entry[1] == key:
+            layer, _key, bx, by = entry
+            ox = m + (self.cam_x - bx) * s
+            oy = m + (self.cam_y - by) * s
+            if 0 <= ox and ox + ww <= vw + 2 * m and 0 <= oy and oy + wh <= vh + 2 * m:
+                self._layers.move_to_end(s)
+                return layer, self._layer_window(layer, exact, ox, oy, ww, wh)
+
+        layer = pygame.Surface((vw + 2 * m, vh + 2 * m))
+        if pygame.display.get_surface() is not None:
+            layer = layer.convert()  # ✅ формат экрана — blit без конвертации
+
+        # окно — по центру слоя (у слоя 1:1 центр = (m, m))
+        shift_x = int(vw - ww) // 2
+        shift_y = int(vh - wh) // 2
+        bx = self.cam_x - shift_x / s
+        by = self.cam_y - shift_y / s
+
+        # 🧠 ЛОГИКА: рисуем тем же кодом, что и на экран, но viewport "стоит" в слое в точке (m, m)
+        # в масштабе уровня, а видимая область расширена на запас слоя
+        saved = (self.rect, self.cull_margin, self.zoom, self.cam_x, self.cam_y)
+        self.rect = pygame.Rect(m, m, vw, vh)
+        self.cull_margin = saved[1] + m
+        self.zoom = s
+        self.cam_x, self.cam_y = bx, by
+        self._lod_frame = pygame.Rect(m + shift_x, m + shift_y, math.ceil(ww), math.ceil(wh))  # LOD решает по кадру
+        try:
+            layer.fill(self.bg)
+            self._draw_grid(layer, layer.get_rect())
+            self._draw_entities(layer, entities, font, text_color, skip_selected=True)
+        finally:
+            self.rect, self.cull_margin, self.zoom, self.cam_x, self.cam_y = saved
+            self._lod_frame = None
+
+        self._layers[s] = (layer, key, bx, by)
+        self._layers.move_to_end(s)
+        while len(self._layers) > max(1, int(self.mip_levels)):
+            self._layers.popitem(last=False)
+        self.layer_rebuilds += 1
+        return layer, self._layer_window(layer, exact, m + shift_x, m + shift_y, ww, wh)
+
+    def _layer_window(self, layer: pygame.Surface, exact: bool, ox: float, oy: float, ww: float, wh: float) -> pygame.Rect:
+        if exact:
+            return pygame.Rect(round(ox), round(oy), self.rect.width, self.rect.height)
+        x0 = math.floor(ox)
+        y0 = math.floor(oy)
+        return pygame.Rect(x0, y0, math.ceil(ox + ww) - x0, math.ceil(oy + wh) - y0).clip(layer.get_rect())
+
+    def _blit_scaled(self, screen: pygame.Surface, src: pygame.Surface) -> None:
+        """🧠 ЛОГИКА: окно mip-слоя -> размер viewport (стоимость — пиксели viewport, не число сущностей)."""
+        size = self.rect.size
+        dest = self._zoom_surf
+        if dest is None or dest.get_size() != size or dest.get_bitsize() != src.get_bitsize():
+            dest = self._zoom_surf = pygame.Surface(size, 0, src)
+        if self.smooth_zoom and src.get_bitsize() in (24, 32):
+            pygame.transform.smoothscale(src, size, dest)
+        else:
+            pygame.transform.scale(src, size, dest)
+        screen.blit(dest, self.rect.topleft)
+
+    def _draw_view(
+        self,
+        screen: pygame.Surface,
+        entities: list[dict],
+        font: pygame.font.Font,
+        text_color: tuple[int, int, int],
+        dest: pygame.Rect,
+    ) -> None:
+        """
+        🧠 ЛОГИКА: сцена в self.rect поверхности screen; dest — где viewport на экране.
+        С compositor (render_backend "sdl2") окно слоя в screen не копируется: на месте viewport —
+        прозрачная область, слой уходит в рендерер текстурой. Выбранные и рамка — в screen поверх.
+        """
+        if self._layer_usable():
+            # ✅ готовый слой (фон + сетка + невыбранные сущности) + выбранная поверх
+            layer, window = self._static_layer(entities, font, text_color)
+            if self.compositor is not None:
+                # ✅ слой (и его mip-масштаб) рисует рендерер под canvas, здесь — прозрачная "дыра" под него
+                screen.fill((0, 0, 0, 0), self.rect)
+                self.compositor.layer(self, layer, window, dest)
+            elif window.size == self.rect.size:
+                screen.blit(layer, self.rect.topleft, window)
+            else:
+                self._blit_scaled(screen, layer.subsurface(window))
+            self._draw_selected(screen, entities, font, text_color)
+        else:
+            if self.compositor is not None:
+                self.compositor.drop(self)  # слой под canvas больше не нужен: всё рисуется прямо в canvas
+
+            # фон viewport
+            pygame.draw.rect(screen, self.bg, self.rect)
+
+            # сетка
+            self._draw_grid(screen)
+
+            # сущности (выбранная — поверх, как и со слоем)
+            self._draw_entities(screen, entities, font, text_color, skip_selected=True)
+            self._draw_selected(screen, entities, font, text_color)
 
-            r = self._entity_screen_rect(ent)
+    def effective_render_scale(self) -> float:
+        """🧠 ЛОГИКА: масштаб внутреннего разрешения viewport, 1.0 — рисуем в пикселях окна."""
+        return min(1.0, max(RENDER_SCALE_MIN, float(self.render_scale)))
+
+    def _draw_scaled(
+        self,
+        screen: pygame.Surface,
+        entities: list[dict],
+        font: pygame.font.Font,
+        text_color: tuple[int, int, int],
+    ) -> None:
+        """
+        🧠 ЛОГИКА: viewport в пониженном разрешении (render_scale): тот же _draw_view, но viewport
+        "стоит" в своей поверхности в точке (0, 0), zoom умножен на масштаб, камера — на сетке
+        её пикселей (иначе слой не годится, см. _layer_usable). Потом один transform.scale
+        прямо в пиксели screen (без blit: прозрачная "дыра" compositor-а копируется как есть).
+        Подписи — шрифтом render_font (меньше во столько же раз), чтобы на экране быть прежнего размера.
+        Координаты мыши (screen_to_world, pick) не меняются: подмена — только на время прохода.
+        """
+        real = self.rect
+        s = self.effective_render_scale()
+        size = (max(1, math.ceil(real.width * s)), max(1, math.ceil(real.height * s)))
+        low = self._low_surf
+        flags = screen.get_flags() & pygame.SRCALPHA  # ⚠️ без флага blit в поверхность с альфой теряет альфу
+        if low is None or low.get_size() != size or low.get_masks() != screen.get_masks() or low.get_flags() & pygame.SRCALPHA != flags:
+            low = self._low_surf = pygame.Surface(size, flags, screen)  # ✅ формат screen — scale пишет прямо в него
+
+        saved = (self.rect, self.zoom, self.cam_x, self.cam_y)
+        z = self.zoom * s
+        self.rect = low.get_rect()
+        self.zoom = z
+        self.cam_x = round(self.cam_x * z) / z
+        self.cam_y = round(self.cam_y * z) / z
+        try:
+            # подписи — шрифтом под масштаб (задаёт редактор): на экране того же размера, что и без него
+            self._draw_view(low, entities, self.render_font or font, text_color, real)
+        finally:
+            self.rect, self.zoom, self.cam_x, self.cam_y = saved
+
+        if not screen.get_rect().contains(real):
+            screen.blit(pygame.transform.scale(low, real.size), real)  # ⚠️ viewport за краем окна — через blit
+        elif self.smooth_zoom and low.get_bitsize() in (24, 32):
+            pygame.transform.smoothscale(low, real.size, screen.subsurface(real))
+        else:
+            pygame.transform.scale(low, real.size, screen.subsurface(real))
+
+    def draw(
+        self,
+        screen: pygame.Surface,
+        entities: list[dict],
+        font: pygame.font.Font,
+        text_color: tuple[int, int, int],
+    ) -> None:
+        self.total_count = len(entities)
+
+        # ограничиваем рисование только viewport
+        prev_clip = screen.get_clip()
+        screen.set_clip(self.rect)
 
-            # базовый прямоугольник
-            pygame.draw.rect(screen, (235, 235, 240), r, 0)
+        if self.effective_render_scale() < 1.0:
+            self._draw_scaled(screen, entities, font, text_color)
+        else:
+            self._draw_view(screen, entities, font, text_color, self.rect)
 
-            # id/label
-            label = font.render(str(ent.get("id", "")), True, text_color)
-            screen.blit(label, (r.x, r.y - 18))
+        # миникарта: первая отрисовка / сущность ушла за границы обзора — пересчитать целиком
+        if self.minimap is not None and self.minimap.stale:
+            self._sync_spatial(entities)
+            if self.minimap.stale:
+                self._minimap_reset()
 
-            # обводка выбранного
-            if self.selected_entity is ent:
-                pygame.draw.rect(screen, (255, 210, 120), r, 2)
+        # рамка выделения
+        box = self.box_rect()
+        if box is not None and box.width and box.height:
+            pygame.draw.rect(screen, self.box_color, box, 1)
 
         # возвращаем clip
         screen.set_clip(prev_clip)
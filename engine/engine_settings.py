@@ -10,6 +10,12 @@ SETTINGS_FILE = Path(__file__).resolve().parent / "engine_settings.json"
 # 🔧 МОЖНО МЕНЯТЬ: дефолтные значения (если добавишь новые настройки — добавляй сюда)
 DEFAULT_SETTINGS: dict = {
     "fullscreen": False,
+    "idle_pacing": True,   # в простое (нет ввода, ничего не анимируется) редактор спит, а не рисует 60 FPS
+    "idle_fps": 5,         # частота кадров в простое
+    "idle_after_ms": 750,  # через сколько мс без ввода начинается простой
+    "viewport_fill": "batch",  # заливка сущностей без подписей: "batch" или "surfarray" (NumPy прямо в пиксели)
+    "render_backend": "surface",  # показ кадра: "surface" (display.update) или "sdl2" (Renderer + текстуры)
+    "render_scale": 1.0,   # внутреннее разрешение viewport (0.25..1): 0.5 — вчетверо меньше пикселей на 4K
 }
 
 
@@ -0,0 +1,270 @@
+# engine/entity_index.py
+# 🧠 ЛОГИКА: индекс сущностей сцены по id + поколенческие (generational) handles
+#
+# Раньше найти сущность можно было только перебором scene_data["entities"], а выделение
+# в редакторе держалось ссылкой на объект (после перезагрузки/подгрузки клетки объект другой).
+#
+# EntityHandle = (slot, gen):
+# - slot закрепляется за id и переживает перестановку строк, удаление соседей и перезагрузку
+#   сцены (rebind по тем же id);
+# - при удалении сущности gen слота увеличивается — старые handles перестают разрешаться,
+#   даже если позже появится сущность с тем же id (редактор выдаёт max(id) + 1).
+#   Если контейнер — вся сцена (complete=True), id, пропавший мимо remove (перезагрузка сцены,
+#   строку удалили в обход редактора), освобождается так же при ближайшем пересчёте.
+#   У chunk-сцены в списке только загруженные клетки — там слоты пропавших id живут дальше.
+#
+# Поиск:
+# - EntityStore: слот хранит handle строки хранилища -> строка за O(1) без пересчёта;
+# - list / LazyEntityList: слот хранит номер строки-подсказку; строка проверяется по id,
+#   после структурных правок (insert/del) номера пересчитываются один раз (лениво) — O(n),
+#   как и само удаление из списка.
+#
+# ⚠️ Сущности без id (или с нехешируемым id) в индекс не попадают.
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from engine.entity_store import EntityStore
+from engine.scene_binary import LazyEntityList
+
+
+class EntityHandle(NamedTuple):
+    slot: int
+    gen: int
+
+
+def _hashable(key: Any) -> bool:
+    if key is None:
+        return False
+    try:
+        hash(key)
+    except TypeError:
+        return False
+    return True
+
+
+def _ids_of(entities) -> list:
+    """🧠 ЛОГИКА: id всех строк без лишней материализации (колонка хранилища / mmap)."""
+    if isinstance(entities, EntityStore):
+        return entities.ids()
+    if isinstance(entities, LazyEntityList) and entities.source is not None:
+        return [entities.original_value(i, "id") for i in range(len(entities))]
+    return [ent.get("id") for ent in entities]
+
+
+class EntityIndex:
+    """
+    🧠 ЛОГИКА:
+    id -> slot (dict), по слоту: id, поколение и ссылка на строку контейнера
+    (handle EntityStore или номер строки для списков; -1 — сущности сейчас нет в контейнере).
+    """
+
+    def __init__(self, entities=None) -> None:
+        self._slot_of: dict[Any, int] = {}
+        self._keys: list[Any] = []
+        self._gens: list[int] = []
+        self._refs: list[int] = []
+        self._free: list[int] = []
+
+        self._entities: Any = []
+        self._store: EntityStore | None = None
+        self._seen_len = 0
+        self._stale = False
+        self._complete = True
+
+        # для debug overlay
+        self.duplicates = 0
+        self.reindexes = 0
+
+        if entities is not None:
+            self.rebind(entities)
+
+    # -----------------------------
+    # Привязка к контейнеру
+    # -----------------------------
+    def rebind(self, entities, complete: bool = True) -> None:
+        """
+        🧠 ЛОГИКА: (пере)привязать индекс к списку сущностей — после загрузки/перезагрузки сцены
+        или когда поменялся плоский список chunk-сцены. Слоты и поколения известных id сохраняются,
+        поэтому выданные раньше handles снова указывают на те же сущности.
+        complete=False — в списке не вся сцена (chunk-сцена): id, которых в нём нет, не освобождаются.
+        """
+        self._complete = complete
+        self._entities = entities
+        self._store = entities if isinstance(entities, EntityStore) else None
+        self._reindex()
+
+    def _reindex(self) -> None:
+        entities = self._entities
+        ids = _ids_of(entities)
+        refs = self._store.handles() if self._store is not None else range(len(ids))
+
+        for slot in range(len(self._refs)):
+            self._refs[slot] = -1
+
+        dup = 0
+        for key, ref in zip(ids, refs):
+            if not _hashable(key):
+                continue
+            slot = self._slot_of.get(key)
+            if slot is None:
+                slot = self._new_slot(key)
+            elif self._refs[slot] >= 0:
+                dup += 1  # ⚠️ id повторяется — индекс указывает на первую строку
+                continue
+            self._refs[slot] = ref
+
+        if self._complete:
+            # ✅ id пропал из сцены мимо remove — слот свободен, старые handles устаревают
+            for slot, ref in enumerate(self._refs):
+                if ref < 0 and self._keys[slot] is not None:
+                    self._release(slot)
+
+        self.duplicates = dup
+        self.reindexes += 1
+        self._seen_len = len(entities)
+        self._stale = False
+
+    def _new_slot(self, key: Any) -> int:
+        if self._free:
+            slot = self._free.pop()
+            self._keys[slot] = key
+        else:
+            slot = len(self._keys)
+            self._keys.append(key)
+            self._gens.append(0)
+            self._refs.append(-1)
+        self._slot_of[key] = slot
+        return slot
+
+    # -----------------------------
+    # Поиск
+    # -----------------------------
+    def _key_at(self, row: int) -> Any:
+        return self._entities[row].get("id")
+
+    def _row_of_slot(self, slot: int) -> int:
+        ref = self._refs[slot]
+        if self._store is not None:
+            if ref < 0:
+                return -1
+            row = self._store.row_of_handle(ref)
+            if row < 0:
+                # ⚠️ строку удалили мимо индекса (например, пересоздали) — ищем id заново
+                self._reindex()
+                ref = self._refs[slot]
+                row = self._store.row_of_handle(ref) if ref >= 0 else -1
+            return row
+
+        if len(self._entities) != self._seen_len:
+            self._stale = True  # ✅ список поменяли мимо индекса — номера строк пересчитаем
+        if not self._stale:
+            if ref < 0:
+                return -1
+            if ref < self._seen_len and self._key_at(ref) == self._keys[slot]:
+                return ref
+        # ⚠️ строки сдвинулись (insert/del/перестановка) — один пересчёт на изменение
+        self._reindex()
+        return self._refs[slot]
+
+    def handle_of(self, key: Any) -> EntityHandle | None:
+        """🧠 ЛОГИКА: handle сущности с этим id (None — id неизвестен индексу)."""
+        if not _hashable(key):
+            return None
+        slot = self._slot_of.get(key)
+        if slot is None:
+            return None
+        return EntityHandle(slot, self._gens[slot])
+
+    def handle_for(self, ent) -> EntityHandle | None:
+        return None if ent is None else self.handle_of(ent.get("id"))
+
+    def is_valid(self, handle: EntityHandle | None) -> bool:
+        """🧠 ЛОГИКА: handle не устарел (сущность не удаляли). Сущность может быть не загружена."""
+        if handle is None:
+            return False
+        slot, gen = handle
+        return 0 <= slot < len(self._gens) and self._gens[slot] == gen and self._keys[slot] is not None
+
+    def row_of(self, handle: EntityHandle | None) -> int:
+        """🧠 ЛОГИКА: строка сущности в контейнере (-1 — удалена или сейчас не загружена)."""
+        if not self.is_valid(handle):
+            return -1
+        return self._row_of_slot(handle.slot)  # type: ignore[union-attr]
+
+    def resolve(self, handle: EntityHandle | None):
+        """🧠 ЛОГИКА: сущность по handle за O(1) (None — удалена или сейчас не загружена)."""
+        row = self.row_of(handle)
+        return None if row < 0 else self._entities[row]
+
+    def get(self, key: Any, default: Any = None):
+        """🧠 ЛОГИКА: сущность по id за O(1)."""
+        ent = self.resolve(self.handle_of(key))
+        return default if ent is None else ent
+
+    def __contains__(self, key: object) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        """🧠 ЛОГИКА: сколько id знает индекс (включая сущности выгруженных клеток)."""
+        return len(self._slot_of)
+
+    # -----------------------------
+    # Правки (редактор сообщает сразу после изменения контейнера)
+    # -----------------------------
+    def add(self, ent) -> EntityHandle | None:
+        """🧠 ЛОГИКА: сущность уже вставлена в контейнер — выдать ей handle."""
+        key = ent.get("id")
+        if not _hashable(key):
+            return None
+        slot = self._slot_of.get(key)
+        if slot is None:
+            slot = self._new_slot(key)
+
+        if self._store is not None:
+            row = self._store.index_of(ent)
+            self._refs[slot] = self._store.handle_at(row) if row >= 0 else -1
+        else:
+            entities = self._entities
+            n = len(entities)
+            if n == self._seen_len + 1 and not self._stale and n and entities[n - 1] is ent:
+                self._refs[slot] = n - 1  # ✅ частый случай: append в конец — без пересчёта
+                self._seen_len = n
+            else:
+                self._stale = True
+        return EntityHandle(slot, self._gens[slot])
+
+    def remove(self, key: Any) -> None:
+        """🧠 ЛОГИКА: сущность удалена — слот освобождается, его handles устаревают."""
+        if not _hashable(key):
+            return
+        slot = self._slot_of.get(key)
+        if slot is None:
+            return
+        self._release(slot)
+        if self._store is None:
+            self._stale = True
+
+    def _release(self, slot: int) -> None:
+        del self._slot_of[self._keys[slot]]
+        self._gens[slot] += 1
+        self._keys[slot] = None
+        self._refs[slot] = -1
+        self._free.append(slot)
+
+
+# ============================================================
+# ✅ Реестр: один индекс на файл сцены (переживает повторное открытие сцены)
+# ============================================================
+_INDEXES: dict[str, EntityIndex] = {}
+
+
+def entity_index_for(scene_path: Path) -> EntityIndex:
+    key = str(Path(scene_path).resolve())
+    idx = _INDEXES.get(key)
+    if idx is None:
+        idx = EntityIndex()
+        _INDEXES[key] = idx
+    return idx
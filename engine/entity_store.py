@@ -0,0 +1,850 @@
+# engine/entity_store.py
+# 🧠 ЛОГИКА: колоночное (struct-of-arrays) хранилище сущностей редактора на NumPy
+#
+# Вместо list[dict] со строковыми ключами геометрия лежит в массивах:
+#   x, y, w, h  — float64 (+ битовая маска "значение было int", чтобы int оставался int)
+#   type_code   — int32, код из таблицы интернированных строк type ("rect" -> 0 ...)
+#   prefab_code — int32, так же для ссылки на префаб (engine/prefabs.py), -1 — не экземпляр
+#   ids         — список id (любые JSON-значения)
+# Остальные поля сущности (и "нестандартные" значения, например bool вместо числа) — в extras.
+#
+# ✅ Для существующего кода store[i] отдаёт EntityView — dict-совместимую обёртку над строкой
+# (get / [] / keys / items / update / dict(view), repr как у dict). Одна строка = один объект view,
+# поэтому сравнения `ent is selected` работают как раньше.
+# ✅ Viewport может работать сразу по колонкам (pick/draw/drag без float()/int() на каждую сущность).
+#
+# ⚠️ NumPy — опциональная зависимость: без него редактор остаётся на list[dict] (ENTITY_STORE_AVAILABLE).
+
+from __future__ import annotations
+
+import copy
+from collections.abc import Mapping, MutableMapping, MutableSequence
+from typing import Any, Iterable, Iterator
+
+try:
+    import numpy as np  # type: ignore
+
+    _NP_OK = True
+except Exception:
+    np = None  # type: ignore[assignment]
+    _NP_OK = False
+
+ENTITY_STORE_AVAILABLE = _NP_OK
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+INITIAL_CAPACITY = 1024   # 🔧 МОЖНО МЕНЯТЬ: стартовый размер массивов (дальше растут x2)
+
+GEOM_KEYS = ("x", "y", "w", "h")
+_GEOM_BIT = {k: 1 << i for i, k in enumerate(GEOM_KEYS)}
+_GEOM_ROW = {k: i for i, k in enumerate(GEOM_KEYS)}
+_BIT_ID = 1 << 4
+_BIT_TYPE = 1 << 5
+_BIT_PREFAB = 1 << 6
+# 🧠 ЛОГИКА: строковые поля, которые хранятся кодами интернированных строк ("rect" -> 0 ...)
+NAME_KEYS = ("type", "prefab")
+_NAME_BIT = {"type": _BIT_TYPE, "prefab": _BIT_PREFAB}
+_NAME_ROW = {k: i for i, k in enumerate(NAME_KEYS)}
+_MAX_EXACT_INT = 2 ** 53  # 🧠 ЛОГИКА: больше — float64 теряет точность, такие значения держим в extras
+
+_MISSING = object()
+_RAISE = object()  # 🧠 ЛОГИКА: _get без default -> KeyError
+
+
+def _is_geom_value(v: Any) -> bool:
+    if isinstance(v, bool):
+        return False
+    if isinstance(v, int):
+        return -_MAX_EXACT_INT <= v <= _MAX_EXACT_INT
+    return isinstance(v, float)
+
+
+def json_default(o: Any) -> Any:
+    """🧠 ЛОГИКА: для json.dumps(default=...) — EntityView сериализуется как обычный dict."""
+    if isinstance(o, Mapping):
+        return dict(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+# ============================================================
+# ✅ Dict-совместимая строка
+# ============================================================
+class EntityView(MutableMapping):
+    """
+    🧠 ЛОГИКА:
+    Пока строка живёт в хранилище — читает/пишет колонки.
+    После удаления из хранилища view "отвязывается" и дальше хранит обычную копию dict
+    (удалённую сущность ещё можно прочитать: автосохранение берёт её id).
+    """
+
+    __slots__ = ("_store", "_handle", "_data")
+
+    def __init__(self, store: "EntityStore", handle: int) -> None:
+        self._store: EntityStore | None = store
+        self._handle = handle
+        self._data: dict | None = None
+
+    # ---- служебное ----
+    @property
+    def row(self) -> int:
+        """🧠 ЛОГИКА: текущая строка в хранилище (-1 — view отвязан)."""
+        if self._store is None:
+            return -1
+        return int(self._store._row_of[self._handle])
+
+    @property
+    def store(self) -> "EntityStore | None":
+        return self._store
+
+    def _detach(self, data: dict) -> None:
+        self._store = None
+        self._data = data
+
+    # ---- Mapping ----
+    def __getitem__(self, key: str) -> Any:
+        if self._store is None:
+            return self._data[key]  # type: ignore[index]
+        return self._store._get(self.row, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if self._store is None:
+            return self._data.get(key, default)  # type: ignore[union-attr]
+        v = self._store._get(self.row, key, _MISSING)
+        return default if v is _MISSING else v
+
+    def __contains__(self, key: object) -> bool:
+        if self._store is None:
+            return key in self._data  # type: ignore[operator]
+        return key in self._store._layouts[self._store._layout[self.row]]
+
+    def __iter__(self) -> Iterator[str]:
+        if self._store is None:
+            return iter(self._data)  # type: ignore[arg-type]
+        return iter(self._store._layouts[self._store._layout[self.row]])
+
+    def __len__(self) -> int:
+        if self._store is None:
+            return len(self._data)  # type: ignore[arg-type]
+        return len(self._store._layouts[self._store._layout[self.row]])
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if self._store is None:
+            self._data[key] = value  # type: ignore[index]
+            return
+        self._store._set(self.row, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if self._store is None:
+            del self._data[key]  # type: ignore[arg-type]
+            return
+        self._store._del(self.row, key)
+
+    # ---- как у dict ----
+    def to_dict(self) -> dict:
+        if self._store is None:
+            return dict(self._data)  # type: ignore[arg-type]
+        return self._store.row_dict(self.row)
+
+    def copy(self) -> dict:
+        return self.to_dict()
+
+    def __copy__(self) -> dict:
+        return self.to_dict()
+
+    def __deepcopy__(self, memo: dict) -> dict:
+        return copy.deepcopy(self.to_dict(), memo)
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Mapping):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+
+# ============================================================
+# ✅ Хранилище
+# ============================================================
+class EntityStore(MutableSequence):
+    """
+    🧠 ЛОГИКА:
+    Порядок строк = порядок сущностей в сцене (последние рисуются сверху).
+    У каждой строки есть handle (не меняется при удалении соседей) -> EntityView на handle.
+    Ключи строки в исходном порядке хранятся как интернированный кортеж (layout),
+    поэтому dict(view) и repr(view) совпадают с исходным dict один в один.
+    """
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY) -> None:
+        if not _NP_OK:
+            raise RuntimeError("EntityStore требует numpy")
+        cap = max(16, int(capacity))
+        self._n = 0
+        self._geom = np.zeros((4, cap), dtype=np.float64)   # x, y, w, h
+        self._int_bits = np.zeros(cap, dtype=np.uint8)      # бит i: geom[i] был int
+        self._cols = np.zeros(cap, dtype=np.uint8)          # какие поля лежат в колонках
+        self._name = np.full((len(NAME_KEYS), cap), -1, dtype=np.int32)  # type, prefab
+        self._layout = np.zeros(cap, dtype=np.int32)
+        self._handles = np.zeros(cap, dtype=np.int64)
+        self._ids: list = []
+        self._extras: list[dict | None] = []
+
+        self._names: tuple[list[str], ...] = tuple([] for _ in NAME_KEYS)
+        self._name_codes: tuple[dict[str, int], ...] = tuple({} for _ in NAME_KEYS)
+        self._layouts: list[tuple] = []
+        self._layout_codes: dict[tuple, int] = {}
+
+        self._row_of = np.full(cap, -1, dtype=np.int64)     # handle -> строка
+        self._views: list[EntityView | None] = []
+        self._next_handle = 0
+
+    # -----------------------------
+    # Колонки (для векторных путей)
+    # -----------------------------
+    @property
+    def x(self):
+        return self._geom[0, : self._n]
+
+    @property
+    def y(self):
+        return self._geom[1, : self._n]
+
+    @property
+    def w(self):
+        return self._geom[2, : self._n]
+
+    @property
+    def h(self):
+        return self._geom[3, : self._n]
+
+    @property
+    def type_codes(self):
+        return self._name[0, : self._n]
+
+    def type_code(self, type_name: str) -> int:
+        """🧠 ЛОГИКА: код интернированного type (-1, если такого type в сцене нет)."""
+        return self._name_codes[0].get(type_name, -1)
+
+    @property
+    def prefab_codes(self):
+        """🧠 ЛОГИКА: код префаба каждой строки (-1 — строка не экземпляр префаба)."""
+        return self._name[1, : self._n]
+
+    def prefab_names(self) -> list[str]:
+        """🧠 ЛОГИКА: имена префабов по кодам (prefab_names()[code])."""
+        return list(self._names[1])
+
+    def column_mask(self, key: str, rows=None):
+        """
+        🧠 ЛОГИКА: bool-маска строк, у которых поле key лежит в колонке (x/y/w/h/type/prefab).
+        rows — только эти строки (массив номеров), иначе все.
+        """
+        bit = _GEOM_BIT.get(key) or _NAME_BIT.get(key) or 0
+        cols = self._cols[: self._n] if rows is None else self._cols[rows]
+        return (cols & bit) != 0
+
+    def geom_mask(self, rows=None):
+        """🧠 ЛОГИКА: bool-маска строк, у которых x/y/w/h все лежат в колонках (rows — как в column_mask)."""
+        full = _GEOM_BIT["x"] | _GEOM_BIT["y"] | _GEOM_BIT["w"] | _GEOM_BIT["h"]
+        cols = self._cols[: self._n] if rows is None else self._cols[rows]
+        return (cols & full) == full
+
+    def ids(self) -> list:
+        """🧠 ЛОГИКА: id всех строк (без создания view); у строки без id — None."""
+        return list(self._ids)
+
+    # -----------------------------
+    # Внутреннее: ёмкость, интернирование
+    # -----------------------------
+    def _grow(self, need: int) -> None:
+        cap = self._geom.shape[1]
+        if need <= cap:
+            return
+        new_cap = max(need, cap * 2)
+        geom = np.zeros((4, new_cap), dtype=np.float64)
+        geom[:, : self._n] = self._geom[:, : self._n]
+        self._geom = geom
+        names = np.full((len(NAME_KEYS), new_cap), -1, dtype=np.int32)
+        names[:, : self._n] = self._name[:, : self._n]
+        self._name = names
+        for name, fill in (("_int_bits", 0), ("_cols", 0), ("_layout", 0), ("_handles", 0)):
+            old = getattr(self, name)
+            arr = np.full(new_cap, fill, dtype=old.dtype)
+            arr[: self._n] = old[: self._n]
+            setattr(self, name, arr)
+
+    def _new_handle(self, row: int) -> int:
+        h = self._next_handle
+        self._next_handle += 1
+        if h >= self._row_of.shape[0]:
+            arr = np.full(max(h + 1, self._row_of.shape[0] * 2), -1, dtype=np.int64)
+            arr[: self._row_of.shape[0]] = self._row_of
+            self._row_of = arr
+        self._row_of[h] = row
+        self._views.append(None)
+        return h
+
+    def _intern_name(self, key: str, name: str) -> int:
+        i = _NAME_ROW[key]
+        codes = self._name_codes[i]
+        code = codes.get(name)
+        if code is None:
+            code = len(self._names[i])
+            self._names[i].append(name)
+            codes[name] = code
+        return code
+
+    def _intern_layout(self, keys: tuple) -> int:
+        code = self._layout_codes.get(keys)
+        if code is None:
+            code = len(self._layouts)
+            self._layouts.append(keys)
+            self._layout_codes[keys] = code
+        return code
+
+    # -----------------------------
+    # Строка <-> dict
+    # -----------------------------
+    def _write_row(self, row: int, ent: Mapping) -> None:
+        cols = 0
+        ints = 0
+        extras: dict | None = None
+        self._name[:, row] = -1
+        ent_id = None
+        for k, v in ent.items():
+            bit = _GEOM_BIT.get(k)
+            if bit is not None and _is_geom_value(v):
+                self._geom[_GEOM_ROW[k], row] = v
+                cols |= bit
+                if isinstance(v, int):
+                    ints |= bit
+            elif k == "id":
+                ent_id = v
+                cols |= _BIT_ID
+            elif k in _NAME_BIT and isinstance(v, str):
+                self._name[_NAME_ROW[k], row] = self._intern_name(k, v)
+                cols |= _NAME_BIT[k]
+            else:
+                if extras is None:
+                    extras = {}
+                extras[k] = v
+        self._cols[row] = cols
+        self._int_bits[row] = ints
+        self._layout[row] = self._intern_layout(tuple(ent.keys()))
+        self._ids[row] = ent_id
+        self._extras[row] = extras
+
+    def row_dict(self, row: int) -> dict:
+        """🧠 ЛОГИКА: строка -> обычный dict (порядок ключей как в исходной сущности)."""
+        return {k: self._get(row, k) for k in self._layouts[self._layout[row]]}
+
+    def _get(self, row: int, key: str, default: Any = _RAISE) -> Any:
+        cols = int(self._cols[row])
+        bit = _GEOM_BIT.get(key)
+        if bit is not None and cols & bit:
+            v = float(self._geom[_GEOM_ROW[key], row])
+            return int(v) if self._int_bits[row] & bit else v
+        if key == "id" and cols & _BIT_ID:
+            return self._ids[row]
+        nbit = _NAME_BIT.get(key)
+        if nbit is not None and cols & nbit:
+            i = _NAME_ROW[key]
+            return self._names[i][self._name[i, row]]
+        extras = self._extras[row]
+        if extras is not None and key in extras:
+            return extras[key]
+        if default is _RAISE:
+            raise KeyError(key)
+        return default
+
+    def _set(self, row: int, key: str, value: Any) -> None:
+        layout = self._layouts[self._layout[row]]
+        if key not in layout:
+            self._layout[row] = self._intern_layout(layout + (key,))
+
+        bit = _GEOM_BIT.get(key)
+        nbit = _NAME_BIT.get(key)
+        col_ok = (
+            (bit is not None and _is_geom_value(value))
+            or key == "id"
+            or (nbit is not None and isinstance(value, str))
+        )
+        extras = self._extras[row]
+        if not col_ok:
+            if bit is not None:
+                self._cols[row] &= ~bit & 0xFF
+            elif nbit is not None:
+                self._cols[row] &= ~nbit & 0xFF
+            if extras is None:
+                extras = self._extras[row] = {}
+            extras[key] = value
+            return
+
+        if extras is not None and key in extras:
+            del extras[key]
+            if not extras:
+                self._extras[row] = None
+        if bit is not None:
+            self._geom[_GEOM_ROW[key], row] = value
+            self._cols[row] |= bit
+            if isinstance(value, int):
+                self._int_bits[row] |= bit
+            else:
+                self._int_bits[row] &= ~bit & 0xFF
+        elif key == "id":
+            self._ids[row] = value
+            self._cols[row] |= _BIT_ID
+        else:
+            self._name[_NAME_ROW[key], row] = self._intern_name(key, value)
+            self._cols[row] |= nbit
+
+    def _del(self, row: int, key: str) -> None:
+        layout = self._layouts[self._layout[row]]
+        if key not in layout:
+            raise KeyError(key)
+        self._layout[row] = self._intern_layout(tuple(k for k in layout if k != key))
+        bit = _GEOM_BIT.get(key) or _NAME_BIT.get(key) or (_BIT_ID if key == "id" else 0)
+        self._cols[row] &= ~bit & 0xFF
+        if key == "id":
+            self._ids[row] = None
+        extras = self._extras[row]
+        if extras is not None:
+            extras.pop(key, None)
+            if not extras:
+                self._extras[row] = None
+
+    def value(self, row: int, key: str, default: Any = None) -> Any:
+        """🧠 ЛОГИКА: значение поля строки без создания EntityView."""
+        return self._get(row, key, default)
+
+    def set_position(self, row: int, x: int | float, y: int | float) -> None:
+        """🧠 ЛОГИКА: быстрый сдвиг одной строки (drag) без dict-обёртки."""
+        self._set(row, "x", x)
+        self._set(row, "y", y)
+
+    def set_positions(self, rows, x, y) -> None:
+        """
+        🧠 ЛОГИКА: сдвиг многих строк сразу (групповой drag): строки, у которых x/y уже в колонках,
+        пишутся одним присваиванием по массиву; остальные (x/y в extras или из шаблона) — по одной.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        x = np.asarray(x)
+        y = np.asarray(y)
+        both = _GEOM_BIT["x"] | _GEOM_BIT["y"]
+        fast = (self._cols[rows] & both) == both
+        fr = rows[fast]
+        self._geom[0, fr] = x[fast]
+        self._geom[1, fr] = y[fast]
+        if np.issubdtype(x.dtype, np.integer) and np.issubdtype(y.dtype, np.integer):
+            self._int_bits[fr] |= both
+        else:
+            self._int_bits[fr] &= ~both & 0xFF
+        slow = ~fast
+        for r, xv, yv in zip(rows[slow].tolist(), x[slow].tolist(), y[slow].tolist()):
+            self.set_position(r, xv, yv)
+
+    def _python_columns(self) -> dict[str, list]:
+        """🧠 ЛОГИКА: колонки -> python-списки значений (_MISSING там, где значение не в колонке)."""
+        n = self._n
+        cols = self._cols[:n]
+        out: dict[str, list] = {}
+        for key, gi in _GEOM_ROW.items():
+            bit = _GEOM_BIT[key]
+            floats = self._geom[gi, :n].tolist()
+            is_int = ((self._int_bits[:n] & bit) != 0).tolist()
+            present = ((cols & bit) != 0).tolist()
+            out[key] = [
+                (int(v) if ii else v) if p else _MISSING for v, ii, p in zip(floats, is_int, present)
+            ]
+        for key, ni in _NAME_ROW.items():
+            names = self._names[ni]
+            present = ((cols & _NAME_BIT[key]) != 0).tolist()
+            out[key] = [names[c] if p else _MISSING for c, p in zip(self._name[ni, :n].tolist(), present)]
+        has_id = ((cols & _BIT_ID) != 0).tolist()
+        out["id"] = [v if p else _MISSING for v, p in zip(self._ids, has_id)]
+        return out
+
+    def to_dicts(self) -> list[dict]:
+        """🧠 ЛОГИКА: все строки -> list[dict] (сохранение, json.dump). Колонки читаются целиком."""
+        pc = self._python_columns()
+        layouts = self._layouts
+        out: list[dict] = []
+        for i, (lay, extras) in enumerate(zip(self._layout[: self._n].tolist(), self._extras)):
+            if extras is None:
+                out.append({k: pc[k][i] for k in layouts[lay]})
+            else:
+                d = {}
+                for k in layouts[lay]:
+                    col = pc.get(k)
+                    v = col[i] if col is not None else _MISSING
+                    d[k] = extras[k] if v is _MISSING else v
+                out.append(d)
+        return out
+
+    @classmethod
+    def from_dicts(cls, entities: Iterable[Mapping]) -> "EntityStore":
+        """
+        🧠 ЛОГИКА: массовая загрузка по колонкам.
+        Типичные строки (id/type/x/y/w/h с числами) заполняются списковыми выражениями + NumPy,
+        всё нестандартное (лишние ключи, bool/str вместо чисел) — построчно через _write_row.
+        """
+        ents = [e.to_dict() if isinstance(e, EntityView) else e for e in entities]
+        n = len(ents)
+        store = cls(capacity=max(INITIAL_CAPACITY, n))
+        if n == 0:
+            return store
+
+        store._init_rows(n)
+        store._ids = [e.get("id") for e in ents]
+
+        # layouts (порядок ключей) + прочие поля -> extras
+        plain_keys = {"id", *NAME_KEYS, *GEOM_KEYS}
+        layout_codes: dict[tuple, int] = store._layout_codes
+        lay = []
+        for e in ents:
+            keys = tuple(e)
+            code = layout_codes.get(keys)
+            if code is None:
+                code = store._intern_layout(keys)
+            lay.append(code)
+        store._layout[:n] = lay
+        extra_keys = [tuple(k for k in keys if k not in plain_keys) for keys in store._layouts]
+        store._extras = [
+            {k: e[k] for k in extra_keys[code]} if extra_keys[code] else None for e, code in zip(ents, lay)
+        ]
+        slow = np.zeros(n, dtype=bool)
+
+        cols = np.zeros(n, dtype=np.uint8)
+        ints = np.zeros(n, dtype=np.uint8)
+
+        for key, gi in _GEOM_ROW.items():
+            bit = _GEOM_BIT[key]
+            vals = [e.get(key) for e in ents]
+            kinds = set(map(type, vals))
+            if kinds == {int} or kinds == {float}:
+                # ✅ типичный случай: колонка целиком int или целиком float
+                is_int = np.full(n, kinds == {int}, dtype=bool)
+                ok = np.ones(n, dtype=bool)
+                arr = np.array(vals, dtype=np.float64)
+            else:
+                kinds = list(map(type, vals))
+                is_int = np.fromiter((t is int for t in kinds), dtype=bool, count=n)
+                ok = is_int | np.fromiter((t is float for t in kinds), dtype=bool, count=n)
+                arr = np.array([v if good else 0.0 for v, good in zip(vals, ok.tolist())], dtype=np.float64)
+                slow |= ~ok & np.fromiter((key in e for e in ents), dtype=bool, count=n)
+            if is_int.any():
+                slow |= is_int & (np.abs(arr) > _MAX_EXACT_INT)
+            store._geom[gi, :n] = arr
+            cols |= np.where(ok, bit, 0).astype(np.uint8)
+            ints |= np.where(is_int, bit, 0).astype(np.uint8)
+
+        for key, ni in _NAME_ROW.items():
+            tvals = [e.get(key) for e in ents]
+            for name in {v for v in tvals if type(v) is str}:
+                store._intern_name(key, name)
+            tc = store._name_codes[ni]
+            store._name[ni, :n] = [tc[v] if type(v) is str else -1 for v in tvals]
+            if set(map(type, tvals)) - {str, type(None)}:
+                slow |= np.fromiter(
+                    (type(v) is not str and v is not None for v in tvals), dtype=bool, count=n
+                )
+            if None in tvals:
+                # ⚠️ явное {"type": None} (а не отсутствие ключа) — тоже построчно
+                slow |= np.fromiter((v is None and key in e for v, e in zip(tvals, ents)), dtype=bool, count=n)
+            cols |= np.where(store._name[ni, :n] >= 0, _NAME_BIT[key], 0).astype(np.uint8)
+
+        has_id = np.fromiter(("id" in keys for keys in store._layouts), dtype=bool)[store._layout[:n]]
+        cols |= np.where(has_id, _BIT_ID, 0).astype(np.uint8)
+
+        store._cols[:n] = cols
+        store._int_bits[:n] = ints
+
+        for row in np.nonzero(slow)[0].tolist():
+            store._write_row(row, ents[row])
+        return store
+
+    @classmethod
+    def from_binary(cls, source) -> "EntityStore":
+        """
+        🧠 ЛОГИКА: загрузка из открытого *.scene.bin (BinaryScene, engine/scene_binary.py) колонка в колонку:
+        числа — numpy.frombuffer из mmap, строки — одним декодированием колонки; dict-ы строк не собираются.
+        Колонки необычного вида (json, int вне точности float64) пишутся по значениям через _set.
+        ✅ Данные копируются — после вызова source можно закрыть.
+        """
+        n = int(source.count)
+        store = cls(capacity=max(INITIAL_CAPACITY, n))
+        if n == 0:
+            return store
+        store._init_rows(n)
+        store._ids = [None] * n
+        store._extras = [None] * n
+
+        names = source.column_names()
+        kinds = {name: source.column_kind(name) for name in names}
+        cols = np.zeros(n, dtype=np.uint8)
+        ints = np.zeros(n, dtype=np.uint8)
+        slow: dict[str, list] = {}  # колонка -> значения (_MISSING — ключа нет), пишутся по строкам
+
+        for name in names:
+            kind = kinds[name]
+            bit = _GEOM_BIT.get(name)
+            if bit is not None and kind in ("i64", "f64", "num"):
+                if kind == "i64":
+                    iv = np.frombuffer(source.column(name), dtype=np.int64)
+                    arr = iv.astype(np.float64)
+                    is_int = np.ones(n, dtype=bool)
+                    exact = np.abs(iv) <= _MAX_EXACT_INT
+                    if not exact.all():
+                        # ⚠️ int, который float64 не хранит точно, — в extras (как в _write_row)
+                        slow[name] = [_MISSING] * n
+                        for r, v in zip(np.nonzero(~exact)[0].tolist(), iv[~exact].tolist()):
+                            slow[name][r] = v
+                    del iv
+                else:
+                    arr = np.frombuffer(source.column(name), dtype=np.float64).copy()
+                    flags = source.int_flags(name)
+                    is_int = np.zeros(n, dtype=bool) if flags is None else np.frombuffer(flags, dtype=np.uint8) != 0
+                    exact = np.ones(n, dtype=bool)
+                store._geom[_GEOM_ROW[name], :n] = arr
+                cols |= np.where(exact, bit, 0).astype(np.uint8)
+                ints |= np.where(is_int & exact, bit, 0).astype(np.uint8)
+            elif name in _NAME_ROW and kind == "str":
+                vals = source.column_values(name)
+                for v in set(vals):
+                    store._intern_name(name, v)
+                codes = store._name_codes[_NAME_ROW[name]]
+                store._name[_NAME_ROW[name], :n] = [codes[v] for v in vals]
+                cols |= _NAME_BIT[name]
+            elif name == "id" and kind != "json":
+                store._ids = source.column_values(name)
+                cols |= _BIT_ID
+            else:
+                slow[name] = source.column_values(name, _MISSING)
+
+        # layout: ключи в порядке колонок; ключа нет только в колонках "json"
+        sparse = [name for name in names if kinds[name] == "json"]
+        if not sparse:
+            store._layout[:n] = store._intern_layout(tuple(names))
+        else:
+            by_presence: dict[tuple, int] = {}
+            lay = []
+            for present in zip(*((v is not _MISSING for v in slow[name]) for name in sparse)):
+                code = by_presence.get(present)
+                if code is None:
+                    has = dict(zip(sparse, present))
+                    code = store._intern_layout(tuple(k for k in names if has.get(k, True)))
+                    by_presence[present] = code
+                lay.append(code)
+            store._layout[:n] = lay
+
+        store._cols[:n] = cols
+        store._int_bits[:n] = ints
+
+        plain_keys = {"id", *NAME_KEYS, *GEOM_KEYS}
+        extras = store._extras
+        for name, vals in slow.items():
+            if name in plain_keys:
+                for r, v in enumerate(vals):
+                    if v is not _MISSING:
+                        store._set(r, name, v)
+                continue
+            for r, v in enumerate(vals):
+                if v is not _MISSING:
+                    if extras[r] is None:
+                        extras[r] = {name: v}
+                    else:
+                        extras[r][name] = v  # type: ignore[index]
+        return store
+
+    def copy(self) -> "EntityStore":
+        """
+        🧠 ЛОГИКА: независимый снимок хранилища (например, для записи в фоне): массивы копируются
+        целиком, dict-ы строк не собираются. Копируются только extras (их редактор правит на месте).
+        """
+        n = self._n
+        out = EntityStore(capacity=max(INITIAL_CAPACITY, n))
+        out._init_rows(n)
+        out._geom[:, :n] = self._geom[:, :n]
+        out._name[:, :n] = self._name[:, :n]
+        for name in ("_int_bits", "_cols", "_layout"):
+            getattr(out, name)[:n] = getattr(self, name)[:n]
+        out._ids = list(self._ids)
+        out._extras = [None if e is None else copy.deepcopy(e) for e in self._extras]
+        out._names = tuple(list(names) for names in self._names)
+        out._name_codes = tuple(dict(codes) for codes in self._name_codes)
+        out._layouts = list(self._layouts)
+        out._layout_codes = dict(self._layout_codes)
+        return out
+
+    def _init_rows(self, n: int) -> None:
+        """🧠 ЛОГИКА: n строк подряд в пустом хранилище: handle = номер строки, view пока нет."""
+        self._n = n
+        self._handles[:n] = np.arange(n, dtype=np.int64)
+        self._row_of = np.arange(max(n, self._row_of.shape[0]), dtype=np.int64)
+        self._row_of[n:] = -1
+        self._views = [None] * n
+        self._next_handle = n
+
+    # -----------------------------
+    # MutableSequence
+    # -----------------------------
+    def __len__(self) -> int:
+        return self._n
+
+    def _view(self, row: int) -> EntityView:
+        h = int(self._handles[row])
+        v = self._views[h]
+        if v is None:
+            v = EntityView(self, h)
+            self._views[h] = v
+        return v
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._view(i) for i in range(*index.indices(self._n))]
+        i = int(index)
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("EntityStore index out of range")
+        return self._view(i)
+
+    def __iter__(self) -> Iterator[EntityView]:
+        for i in range(self._n):
+            yield self._view(i)
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            rows = list(range(*index.indices(self._n)))
+            values = list(value)
+            for i in reversed(rows):
+                del self[i]
+            start = rows[0] if rows else index.indices(self._n)[0]
+            for k, v in enumerate(values):
+                self.insert(start + k, v)
+            return
+        i = int(index)
+        if i < 0:
+            i += self._n
+        self._write_row(i, value.to_dict() if isinstance(value, EntityView) else value)
+
+    def __delitem__(self, index) -> None:
+        if isinstance(index, slice):
+            self.delete_rows(range(*index.indices(self._n)))
+            return
+        i = int(index)
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("EntityStore index out of range")
+
+        h = int(self._handles[i])
+        view = self._views[h]
+        if view is not None:
+            view._detach(self.row_dict(i))
+            self._views[h] = None
+        self._row_of[h] = -1
+
+        n = self._n
+        if i < n - 1:
+            self._geom[:, i : n - 1] = self._geom[:, i + 1 : n]
+            self._name[:, i : n - 1] = self._name[:, i + 1 : n]
+            for arr in (self._int_bits, self._cols, self._layout, self._handles):
+                arr[i : n - 1] = arr[i + 1 : n]
+            self._row_of[self._handles[i : n - 1]] -= 1
+        del self._ids[i]
+        del self._extras[i]
+        self._n = n - 1
+
+    def delete_rows(self, rows) -> None:
+        """
+        🧠 ЛОГИКА: удалить много строк сразу (групповой Delete): колонки сжимаются одним проходом
+        по маске, view удалённых отвязываются, handles освобождаются — O(n + k), а не k сдвигов по O(n).
+        """
+        n = self._n
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = np.unique(np.where(rows < 0, rows + n, rows))
+        if rows.size == 0:
+            return
+        if rows[0] < 0 or rows[-1] >= n:
+            raise IndexError("EntityStore index out of range")
+
+        views = self._views
+        for r, h in zip(rows.tolist(), self._handles[rows].tolist()):
+            view = views[h]
+            if view is not None:
+                view._detach(self.row_dict(r))
+                views[h] = None
+        self._row_of[self._handles[rows]] = -1
+
+        keep = np.ones(n, dtype=bool)
+        keep[rows] = False
+        m = n - rows.size
+        self._geom[:, :m] = self._geom[:, :n][:, keep]
+        self._name[:, :m] = self._name[:, :n][:, keep]
+        for arr in (self._int_bits, self._cols, self._layout, self._handles):
+            arr[:m] = arr[:n][keep]
+        self._row_of[self._handles[:m]] = np.arange(m, dtype=np.int64)
+        kept = keep.tolist()
+        self._ids = [v for v, k in zip(self._ids, kept) if k]
+        self._extras = [v for v, k in zip(self._extras, kept) if k]
+        self._n = m
+
+    def insert(self, index: int, value: Mapping) -> None:
+        n = self._n
+        i = max(0, min(int(index) if index >= 0 else n + int(index), n))
+        self._grow(n + 1)
+        if i < n:
+            self._geom[:, i + 1 : n + 1] = self._geom[:, i:n].copy()
+            self._name[:, i + 1 : n + 1] = self._name[:, i:n].copy()
+            for arr in (self._int_bits, self._cols, self._layout, self._handles):
+                arr[i + 1 : n + 1] = arr[i:n].copy()
+            self._row_of[self._handles[i + 1 : n + 1]] += 1
+        self._ids.insert(i, None)
+        self._extras.insert(i, None)
+        self._n = n + 1
+        self._handles[i] = self._new_handle(i)
+        self._write_row(i, value.to_dict() if isinstance(value, EntityView) else value)
+
+    def append(self, value: Mapping) -> None:
+        """🧠 ЛОГИКА: быстрый путь вставки в конец (без сдвига колонок)."""
+        n = self._n
+        self._grow(n + 1)
+        self._ids.append(None)
+        self._extras.append(None)
+        self._n = n + 1
+        self._handles[n] = self._new_handle(n)
+        self._write_row(n, value.to_dict() if isinstance(value, EntityView) else value)
+
+    def index_of(self, view: EntityView) -> int:
+        """🧠 ЛОГИКА: строка view в этом хранилище за O(1) (-1 — view не отсюда)."""
+        if not isinstance(view, EntityView) or view.store is not self:
+            return -1
+        return view.row
+
+    # -----------------------------
+    # Handles строк (для engine/entity_index.py)
+    # -----------------------------
+    def handles(self) -> list[int]:
+        """🧠 ЛОГИКА: handle каждой строки по порядку (handle не меняется при сдвиге строк)."""
+        return self._handles[: self._n].tolist()
+
+    def handle_at(self, row: int) -> int:
+        return int(self._handles[row])
+
+    def row_of_handle(self, handle: int) -> int:
+        """🧠 ЛОГИКА: текущая строка handle-а за O(1) (-1 — строка удалена)."""
+        if not 0 <= handle < self._next_handle:
+            return -1
+        return int(self._row_of[handle])
+
+    def rows_of_handles(self, handles):
+        """🧠 ЛОГИКА: row_of_handle для массива handles сразу (-1 — строка удалена / чужой handle)."""
+        handles = np.asarray(handles, dtype=np.int64)
+        ok = (handles >= 0) & (handles < self._next_handle)
+        out = np.full(len(handles), -1, dtype=np.int64)
+        out[ok] = self._row_of[handles[ok]]
+        return out
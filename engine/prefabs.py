@@ -0,0 +1,227 @@
+# engine/prefabs.py
+# 🧠 ЛОГИКА: префабы — общие шаблоны сущностей проекта (<проект>/prefabs/*.prefab.json)
+#
+# В уровнях тысячи одинаковых прямоугольников, и каждый раньше был полным dict в JSON и в памяти.
+# Экземпляр префаба хранит только ссылку и отличающиеся поля:
+#   {"id": 17, "prefab": "crate", "x": 320, "y": 64}
+# Остальное (type, w, h, ...) берётся из шаблона:
+#   prefabs/crate.prefab.json -> {"name": "crate", "entity": {"type": "rect", "w": 40, "h": 30}}
+#
+# ✅ Сцена загружается и сохраняется как есть (только переопределения), копии шаблона не создаются:
+# чтение идёт через resolve() — ChainMap(экземпляр, шаблон), запись попадает в сам экземпляр.
+# ✅ Колоночное хранилище держит ссылку на префаб кодом (EntityStore.prefab_codes),
+# viewport достраивает геометрию экземпляров векторно (template_columns()).
+# ⚠️ Шаблон не может сам ссылаться на префаб (без вложенности).
+
+from __future__ import annotations
+
+import json
+import os
+from collections import ChainMap
+from collections.abc import Mapping
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+PREFABS_DIR_NAME = "prefabs"        # 🔧 МОЖНО МЕНЯТЬ: папка префабов внутри проекта
+PREFAB_SUFFIX = ".prefab.json"      # 🔧 МОЖНО МЕНЯТЬ: расширение файла префаба
+PREFAB_KEY = "prefab"               # поле сущности со ссылкой на префаб
+
+# 🧠 ЛОГИКА: поля, которые у каждого экземпляра свои (в шаблон не выносятся)
+INSTANCE_KEYS = ("id", "x", "y")
+
+_MISSING = object()
+
+
+def prefabs_dir(project_root: Path) -> Path:
+    return Path(project_root) / PREFABS_DIR_NAME
+
+
+def prefab_path(project_root: Path, name: str) -> Path:
+    return prefabs_dir(project_root) / f"{name}{PREFAB_SUFFIX}"
+
+
+def write_prefab(project_root: Path, name: str, template: Mapping) -> Path:
+    """🧠 ЛОГИКА: записать шаблон префаба (временный файл + os.replace)."""
+    data = {k: v for k, v in template.items() if k not in (PREFAB_KEY, "id")}
+    path = prefab_path(project_root, name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"name": name, "entity": data}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+class PrefabLibrary:
+    """
+    🧠 ЛОГИКА:
+    Шаблоны префабов одного проекта: {имя: MappingProxyType(поля)} — общие и только для чтения.
+    Читаются при первом обращении; reload() перечитывает папку (например, при открытии сцены).
+    """
+
+    def __init__(self, project_root: Path) -> None:
+        self.project_root = Path(project_root)
+        self._templates: dict[str, Mapping] | None = None
+        self.errors: list[str] = []
+
+    def reload(self) -> None:
+        templates: dict[str, Mapping] = {}
+        errors: list[str] = []
+        folder = prefabs_dir(self.project_root)
+        if folder.is_dir():
+            for path in sorted(folder.glob(f"*{PREFAB_SUFFIX}")):
+                name = path.name[: -len(PREFAB_SUFFIX)]
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    entity = data.get("entity") if isinstance(data, dict) else None
+                    if not isinstance(entity, dict):
+                        raise ValueError("нет объекта 'entity'")
+                    entity.pop(PREFAB_KEY, None)
+                    templates[name] = MappingProxyType(entity)
+                except Exception as e:
+                    errors.append(f"{path.name}: {e}")
+        self._templates = templates
+        self.errors = errors
+
+    @property
+    def templates(self) -> dict[str, Mapping]:
+        if self._templates is None:
+            self.reload()
+        return self._templates  # type: ignore[return-value]
+
+    def names(self) -> list[str]:
+        return list(self.templates)
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.templates
+
+    def get(self, name: Any) -> Mapping | None:
+        if not isinstance(name, str):
+            return None
+        return self.templates.get(name)
+
+    def add(self, name: str, template: Mapping) -> None:
+        """🧠 ЛОГИКА: сохранить новый/изменённый шаблон на диск и сразу сделать его доступным."""
+        write_prefab(self.project_root, name, template)
+        data = {k: v for k, v in template.items() if k not in (PREFAB_KEY, "id")}
+        self.templates[name] = MappingProxyType(data)
+
+    # -----------------------------
+    # Экземпляры
+    # -----------------------------
+    def template_of(self, ent: Mapping) -> Mapping | None:
+        return self.get(ent.get(PREFAB_KEY))
+
+    def resolve(self, ent: Mapping) -> Mapping:
+        """
+        🧠 ЛОГИКА: сущность с полями шаблона, без копирования:
+        для экземпляра — ChainMap(ent, шаблон) (запись идёт в ent), иначе — сама ent.
+        """
+        template = self.template_of(ent)
+        if template is None:
+            return ent
+        return ChainMap(ent, template)  # type: ignore[arg-type]
+
+    def value(self, ent: Mapping, key: str, default: Any = None) -> Any:
+        """🧠 ЛОГИКА: поле сущности, а если его нет — поле шаблона."""
+        v = ent.get(key, _MISSING)
+        if v is not _MISSING:
+            return v
+        template = self.template_of(ent)
+        return default if template is None else template.get(key, default)
+
+    def expand(self, ent: Mapping) -> dict:
+        """🧠 ЛОГИКА: полная копия экземпляра (экспорт/инструменты; редактор так не делает)."""
+        template = self.template_of(ent)
+        if template is None:
+            return dict(ent)
+        out = dict(template)
+        out.update(ent)
+        return out
+
+    def template_columns(self, names: list[str], keys: tuple[str, ...]) -> dict[str, list]:
+        """
+        🧠 ЛОГИКА: значения полей шаблонов по кодам префабов хранилища
+        (names = EntityStore.prefab_names()): {key: [значение для code 0, code 1, ...]}.
+        Неизвестный префаб / нет поля — None.
+        """
+        out: dict[str, list] = {}
+        for key in keys:
+            col = []
+            for name in names:
+                template = self.get(name)
+                col.append(None if template is None else template.get(key))
+            out[key] = col
+        return out
+
+
+def extract_prefabs(
+    scene_data: dict,
+    library: PrefabLibrary,
+    min_count: int = 2,
+    name_prefix: str = "auto_",
+) -> tuple[int, int]:
+    """
+    🧠 ЛОГИКА: найти повторяющиеся конфигурации (все поля, кроме id/x/y) и превратить их в префабы.
+    Сущности сцены переписываются на месте в экземпляры. Возвращает (новых префабов, экземпляров).
+    """
+    groups: dict[str, list[int]] = {}
+    entities = scene_data.get("entities", [])
+    for i, ent in enumerate(entities):
+        if PREFAB_KEY in ent:
+            continue
+        shared = {k: v for k, v in ent.items() if k not in INSTANCE_KEYS}
+        if not shared:
+            continue
+        key = json.dumps(shared, sort_keys=True, ensure_ascii=False, default=str)
+        groups.setdefault(key, []).append(i)
+
+    made = 0
+    instances = 0
+    for rows in groups.values():
+        if len(rows) < min_count:
+            continue
+        template = {k: v for k, v in entities[rows[0]].items() if k not in INSTANCE_KEYS}
+        base = f"{name_prefix}{template.get('type', 'entity')}_{made}"
+        name = base
+        n = 1
+        while name in library:
+            name = f"{base}_{n}"
+            n += 1
+        library.add(name, template)
+        made += 1
+        for i in rows:
+            ent = entities[i]
+            inst = {k: ent[k] for k in INSTANCE_KEYS if k in ent}
+            inst[PREFAB_KEY] = name
+            entities[i] = inst
+            instances += 1
+    return made, instances
+
+
+# ============================================================
+# ✅ Реестр: одна библиотека на проект
+# ============================================================
+_LIBRARIES: dict[str, PrefabLibrary] = {}
+
+
+def prefab_library_for(scene_path: Path) -> PrefabLibrary:
+    """
+    🧠 ЛОГИКА: библиотека префабов проекта, которому принадлежит сцена.
+    Сцены лежат в <проект>/scenes/, поэтому корень проекта — родитель папки сцены.
+    """
+    project_root = Path(scene_path).resolve().parent.parent
+    key = str(project_root)
+    lib = _LIBRARIES.get(key)
+    if lib is None:
+        lib = PrefabLibrary(project_root)
+        _LIBRARIES[key] = lib
+    return lib
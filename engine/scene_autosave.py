@@ -0,0 +1,224 @@
+# engine/scene_autosave.py
+# 🧠 ЛОГИКА: отложенное (debounce) фоновое автосохранение сцены
+#
+# Редактор сообщает о правках (mark_changed / mark_added / mark_deleted), а tick() раз в кадр
+# решает, пора ли сохранять: после последней правки должно пройти AUTOSAVE_DEBOUNCE_MS.
+# В главном потоке снимаются только копии изменённых сущностей (O(правки), а не O(сцены)),
+# сериализация и запись на диск идут в рабочем потоке — кадр никогда не ждёт диск.
+#
+# Куда пишем:
+# - обычно — дозапись в журнал сцены (engine/scene_journal.py, append + fsync);
+# - если точечно нельзя (нет уникальных id и т.п.) — полный снимок сцены, который
+#   записывается через временный файл + os.replace (write_scene_file).
+
+from __future__ import annotations
+
+import copy
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from engine.entity_store import EntityStore
+from engine.scene_binary import LazyEntityList
+from engine.scene_journal import journal_for
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+AUTOSAVE_DEBOUNCE_MS = 1500  # 🔧 МОЖНО МЕНЯТЬ: пауза после последней правки до автосохранения
+
+
+def _snapshot_scene(scene_data: dict) -> dict:
+    """
+    🧠 ЛОГИКА: полная копия сцены для записи в фоне (живые данные поток не трогает).
+    EntityStore копируется колонками (без dict на сущность) — строки собирает уже рабочий поток.
+    """
+    data = {k: copy.deepcopy(v) for k, v in scene_data.items() if k != "entities"}
+    entities = scene_data.get("entities", [])
+    if isinstance(entities, EntityStore):
+        data["entities"] = entities.copy()
+    else:
+        data["entities"] = [copy.deepcopy(ent) for ent in entities]
+    return data
+
+
+class SceneAutosaver:
+    """
+    🧠 ЛОГИКА:
+    Грязные сущности храним как {id: dict сущности} + множество удалённых id.
+    В любой момент в работе не больше одного сохранения; если диск не успевает,
+    правки копятся и уходят следующим заходом.
+    """
+
+    def __init__(self, scene_path: Path, debounce_ms: int = AUTOSAVE_DEBOUNCE_MS) -> None:
+        self.scene_path = Path(scene_path)
+        self.debounce_ms = int(debounce_ms)
+        self.journal = journal_for(self.scene_path)
+
+        self._changed: dict[Any, dict] = {}
+        self._deleted: set = set()
+        self._added: set = set()      # 🧠 ЛОГИКА: id новых сущностей, которых ещё нет на диске
+        self._full = False            # 🧠 ЛОГИКА: правку нельзя привязать к id -> сохраняем снимок целиком
+        self._last_change = 0.0
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scene-autosave")
+        self._future: Future | None = None
+
+        # для debug overlay
+        self.saves = 0
+        self.last_save_bytes = 0
+        self.last_error: str | None = None
+
+    # -----------------------------
+    # Отметки о правках
+    # -----------------------------
+    @property
+    def dirty(self) -> bool:
+        return self._full or bool(self._changed) or bool(self._deleted)
+
+    def _touch(self) -> None:
+        self._last_change = time.perf_counter()
+
+    def _key(self, ent: dict) -> Any:
+        key = ent.get("id")
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def mark_changed(self, ent: dict) -> None:
+        """🧠 ЛОГИКА: сущность изменилась на месте (перетаскивание, правка полей)."""
+        key = self._key(ent)
+        if key is None:
+            self._full = True
+        else:
+            self._changed[key] = ent
+        self._touch()
+
+    def mark_added(self, ent: dict) -> None:
+        key = self._key(ent)
+        if key is not None:
+            if key in self._deleted:
+                self._deleted.discard(key)  # id занят сохранённой сущностью — это замена, а не новая
+            else:
+                self._added.add(key)
+        self.mark_changed(ent)
+
+    def mark_deleted(self, ent: dict) -> None:
+        key = self._key(ent)
+        if key is None:
+            self._full = True
+        else:
+            self._changed.pop(key, None)
+            if key in self._added:
+                self._added.discard(key)  # ✅ добавили и удалили до сохранения — на диск нечего писать
+            else:
+                self._deleted.add(key)
+        self._touch()
+
+    def mark_all(self) -> None:
+        """🧠 ЛОГИКА: изменилось что-то, что не отследить по сущностям — сохраним всё."""
+        self._full = True
+        self._touch()
+
+    # -----------------------------
+    # Сохранение
+    # -----------------------------
+    @property
+    def busy(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    def _collect_result(self) -> None:
+        f = self._future
+        if f is None or not f.done():
+            return
+        self._future = None
+        try:
+            self.last_save_bytes = int(f.result())
+            self.saves += 1
+            self.last_error = None
+        except Exception as e:
+            # ⚠️ запись не удалась — следующим заходом сохраняем сцену целиком (diff по журналу)
+            self.last_error = str(e)
+            self._full = True
+
+    def status(self) -> str:
+        """🧠 ЛОГИКА: короткий статус для debug overlay."""
+        self._collect_result()
+        if self.last_error:
+            return "error"
+        if self.busy:
+            return "saving"
+        if self.dirty:
+            return "pending"
+        return "saved"
+
+    def tick(self, scene_data: dict) -> bool:
+        """
+        🧠 ЛОГИКА: вызывать раз в кадр. Запускает сохранение, когда правки "успокоились".
+        Возвращает True, если сохранение отправлено в фон.
+        """
+        self._collect_result()
+        if self.busy:
+            return False
+
+        if self.journal.compact_due:
+            # ✅ сжатие журнала запускаем здесь: для mmap-сцены нужно отвязать живой список
+            self.journal.start_compaction(scene_data.get("entities", []))
+
+        if not self.dirty:
+            return False
+        if (time.perf_counter() - self._last_change) * 1000.0 < self.debounce_ms:
+            return False
+        return self._submit(scene_data)
+
+    def save_now(self, scene_data: dict) -> bool:
+        """🧠 ЛОГИКА: сохранить без ожидания паузы (горячая клавиша)."""
+        self._collect_result()
+        if self.busy or not self.dirty:
+            return False
+        return self._submit(scene_data)
+
+    def _submit(self, scene_data: dict) -> bool:
+        if self._full or not self.journal.can_record_changes(scene_data):
+            entities = scene_data.get("entities")
+            if isinstance(entities, LazyEntityList):
+                # ⚠️ mmap основного файла мешает его заменить — отвязываем в главном потоке
+                entities.detach()
+            snapshot = _snapshot_scene(scene_data)
+            job = (self.journal.record, snapshot)
+        else:
+            meta = {k: copy.deepcopy(v) for k, v in scene_data.items() if k != "entities"}
+            puts = [copy.deepcopy(ent) for ent in self._changed.values()]
+            job = (self.journal.record_changes, meta, puts, list(self._deleted))
+
+        self._changed.clear()
+        self._deleted.clear()
+        self._added.clear()
+        self._full = False
+
+        fn, *args = job
+        self._future = self._executor.submit(fn, *args)
+        return True
+
+    def flush(self, scene_data: dict, timeout: float | None = None) -> None:
+        """🧠 ЛОГИКА: дождаться текущей записи и синхронно сохранить остаток (выход из редактора)."""
+        if self._future is not None:
+            try:
+                self._future.result(timeout)
+            except Exception:
+                pass
+        self._collect_result()
+        if self.dirty:
+            self._submit(scene_data)
+            try:
+                self._future.result(timeout)  # type: ignore[union-attr]
+            except Exception:
+                pass
+            self._collect_result()
+        self.journal.wait(timeout)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,443 @@
+# engine/scene_binary.py
+# 🧠 ЛОГИКА: бинарный колоночный формат сцены (*.scene.bin) + ленивое чтение через mmap
+#
+# Раскладка файла:
+#   [header]  MAGIC(8) | version u32 | count u32 | meta_len u64
+#   [meta]    UTF-8 JSON: {"scene": {...поля сцены кроме entities...}, "columns": [...]}
+#   [data]    колонки подряд, каждая выровнена по 8 байт
+#
+# Каждая колонка = одно поле сущности (id, type, x, y, w, h + любые дополнительные ключи).
+# Виды колонок:
+#   "i64"  — все значения int                        -> n * int64
+#   "f64"  — все значения float                      -> n * float64
+#   "num"  — смесь int/float                         -> n * float64 + n * u8 (1 = было int)
+#   "str"  — все значения str                        -> (n+1) * u64 offsets + UTF-8 blob
+#   "json" — всё остальное / ключ есть не у всех     -> как "str", но значение = JSON-текст ("" = ключа нет)
+#
+# Открытие файла = разбор заголовка (O(1) от числа сущностей), сами поля декодируются только при доступе.
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from collections.abc import MutableSequence
+from pathlib import Path
+from typing import Any
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+MAGIC = b"DRGSCNB\x00"     # ⚠️ НЕ МЕНЯТЬ: сигнатура формата (по ней load_scene узнаёт файл)
+FORMAT_VERSION = 1         # ⚠️ НЕ МЕНЯТЬ без миграции старых файлов
+ALIGN = 8                  # 🔧 МОЖНО МЕНЯТЬ: выравнивание колонок (8 = удобно для int64/float64)
+
+_HEADER = struct.Struct("<8sIIQ")
+_MAX_EXACT_INT = 2 ** 53   # 🧠 ЛОГИКА: int, который float64 хранит без потерь
+
+
+def is_binary_scene(path: Path) -> bool:
+    """🧠 ЛОГИКА: проверяем сигнатуру в начале файла (расширение не важно)."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+# ============================================================
+# ✅ Запись
+# ============================================================
+def _pad(n: int) -> int:
+    return (-n) % ALIGN
+
+
+def _column_kind(values: list, present_all: bool) -> str:
+    """🧠 ЛОГИКА: выбираем самый компактный вид колонки, который сохранит значения без потерь."""
+    if not present_all:
+        return "json"
+
+    has_int = False
+    has_float = False
+    has_str = False
+    for v in values:
+        if isinstance(v, bool):
+            return "json"
+        if isinstance(v, int):
+            if not (-(2 ** 63) <= v < 2 ** 63):
+                return "json"
+            has_int = True
+        elif isinstance(v, float):
+            has_float = True
+        elif isinstance(v, str):
+            has_str = True
+        else:
+            return "json"
+
+    if has_str and (has_int or has_float):
+        return "json"
+
+    if has_str or not values:
+        return "str"
+    if has_int and not has_float:
+        return "i64"
+    if has_float and not has_int:
+        return "f64"
+    # смесь int/float: int должен влезть в float64 без потерь
+    if all(not isinstance(v, int) or abs(v) <= _MAX_EXACT_INT for v in values):
+        return "num"
+    return "json"
+
+
+def _pack_strings(texts: list[str]) -> bytes:
+    blobs = [t.encode("utf-8") for t in texts]
+    offsets = [0]
+    for b in blobs:
+        offsets.append(offsets[-1] + len(b))
+    return struct.pack(f"<{len(offsets)}Q", *offsets) + b"".join(blobs)
+
+
+def _pack_column(kind: str, values: list) -> bytes:
+    n = len(values)
+    if kind == "i64":
+        return struct.pack(f"<{n}q", *values)
+    if kind == "f64":
+        return struct.pack(f"<{n}d", *values)
+    if kind == "num":
+        flags = bytes(1 if isinstance(v, int) else 0 for v in values)
+        return struct.pack(f"<{n}d", *(float(v) for v in values)) + flags
+    if kind == "str":
+        return _pack_strings(values)
+    # json: значение -> компактный JSON-текст, отсутствие ключа -> ""
+    return _pack_strings(
+        ["" if v is _ABSENT else json.dumps(v, ensure_ascii=False, separators=(",", ":")) for v in values]
+    )
+
+
+class _Absent:
+    """🧠 ЛОГИКА: маркер "у сущности нет такого ключа" (None — валидное значение JSON)."""
+
+    def __repr__(self) -> str:
+        return "<absent>"
+
+
+_ABSENT = _Absent()
+
+
+def encode_scene(scene_data: dict) -> bytes:
+    """🧠 ЛОГИКА: dict сцены (как из *.scene.json) -> байты *.scene.bin."""
+    entities = list(scene_data.get("entities", []))
+    scene_meta = {k: v for k, v in scene_data.items() if k != "entities"}
+    n = len(entities)
+
+    # порядок колонок = порядок первого появления ключей
+    names: list[str] = []
+    seen: set[str] = set()
+    for ent in entities:
+        for k in ent.keys():
+            if k not in seen:
+                seen.add(k)
+                names.append(k)
+
+    columns_meta: list[dict[str, Any]] = []
+    blobs: list[bytes] = []
+    offset = 0
+    for name in names:
+        values = [ent.get(name, _ABSENT) for ent in entities]
+        present_all = all(v is not _ABSENT for v in values)
+        kind = _column_kind(values, present_all)
+        blob = _pack_column(kind, values)
+
+        columns_meta.append({"name": name, "kind": kind, "offset": offset, "size": len(blob)})
+        blobs.append(blob + b"\x00" * _pad(len(blob)))
+        offset += len(blob) + _pad(len(blob))
+
+    meta = json.dumps(
+        {"scene": scene_meta, "columns": columns_meta},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    meta += b" " * _pad(_HEADER.size + len(meta))  # данные начинаются с выровненного адреса
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, n, len(meta))
+    return header + meta + b"".join(blobs)
+
+
+def write_binary_scene(path: Path, scene_data: dict) -> None:
+    """
+    🧠 ЛОГИКА: пишем через временный файл + os.replace.
+    Если старый файл кем-то открыт через mmap, мы его не портим на середине записи.
+    """
+    data = encode_scene(scene_data)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+# ============================================================
+# ✅ Чтение (mmap, ленивое декодирование)
+# ============================================================
+class BinaryScene:
+    """
+    🧠 ЛОГИКА:
+    Открытый *.scene.bin. Конструктор читает только заголовок и описание колонок,
+    значения достаются из mmap по запросу (value/row/column).
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap пустого файла невозможен -> это точно не наш формат
+            self._file.close()
+            raise ValueError(f"Пустой файл сцены: {self.path}")
+
+        magic, version, count, meta_len = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Не бинарная сцена: {self.path}")
+        if version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Неподдерживаемая версия .scene.bin: {version}")
+
+        meta = json.loads(bytes(self._mm[_HEADER.size:_HEADER.size + meta_len]).decode("utf-8"))
+        self.count = int(count)
+        self.scene_meta: dict = dict(meta.get("scene", {}))
+        self.columns: list[dict] = list(meta.get("columns", []))
+        self._col_by_name = {c["name"]: c for c in self.columns}
+        self._data_start = _HEADER.size + meta_len
+
+        # memoryview-ы колонок создаём лениво и держим (это не копии — окна в mmap)
+        self._views: dict[str, tuple] = {}
+
+    # -----------------------------
+    # Служебное
+    # -----------------------------
+    def close(self) -> None:
+        """🧠 ЛОГИКА: отпускаем mmap (обязательно до перезаписи файла на Windows)."""
+        for parts in self._views.values():
+            for mv in parts:
+                if isinstance(mv, memoryview):
+                    mv.release()
+        self._views.clear()
+        try:
+            self._mm.close()
+        except Exception:
+            pass
+        try:
+            self._file.close()
+        except Exception:
+            pass
+
+    @property
+    def closed(self) -> bool:
+        return self._mm.closed
+
+    def _col_views(self, name: str) -> tuple:
+        cached = self._views.get(name)
+        if cached is not None:
+            return cached
+
+        col = self._col_by_name[name]
+        kind = col["kind"]
+        start = self._data_start + int(col["offset"])
+        n = self.count
+        raw = memoryview(self._mm)[start:start + int(col["size"])]
+
+        if kind == "i64":
+            parts = (raw.cast("q"),)
+        elif kind == "f64":
+            parts = (raw[: n * 8].cast("d"),)
+        elif kind == "num":
+            parts = (raw[: n * 8].cast("d"), raw[n * 8: n * 9])
+        else:
+            off_bytes = (n + 1) * 8
+            parts = (raw[:off_bytes].cast("Q"), raw[off_bytes:])
+
+        self._views[name] = parts
+        return parts
+
+    # -----------------------------
+    # Доступ к данным
+    # -----------------------------
+    def column_names(self) -> list[str]:
+        return [c["name"] for c in self.columns]
+
+    def column_kind(self, name: str) -> str | None:
+        col = self._col_by_name.get(name)
+        return None if col is None else col["kind"]
+
+    def column(self, name: str) -> memoryview | None:
+        """
+        🧠 ЛОГИКА:
+        Zero-copy доступ к числовой колонке (i64/f64/num) — удобно для пакетной обработки
+        (например, numpy.frombuffer). Для строковых колонок возвращаем None.
+        """
+        if self.column_kind(name) not in ("i64", "f64", "num"):
+            return None
+        return self._col_views(name)[0]
+
+    def int_flags(self, name: str) -> memoryview | None:
+        """🧠 ЛОГИКА: для колонки "num" — u8 на строку (1 = значение было int), иначе None."""
+        if self.column_kind(name) != "num":
+            return None
+        return self._col_views(name)[1]
+
+    def column_values(self, name: str, default: Any = None) -> list:
+        """
+        🧠 ЛОГИКА: вся колонка -> python-список значений (default — у строки нет ключа).
+        Декодируется одна колонка целиком, dict-ы строк не собираются.
+        """
+        kind = self.column_kind(name)
+        if kind is None:
+            return [default] * self.count
+        parts = self._col_views(name)
+        if kind in ("i64", "f64"):
+            return parts[0].tolist()
+        if kind == "num":
+            return [int(v) if f else v for v, f in zip(parts[0].tolist(), parts[1].tolist())]
+
+        offsets = parts[0].tolist()
+        blob = bytes(parts[1])
+        if blob.isascii():
+            # ✅ ASCII: байтовые смещения = символьные, декодируем blob один раз
+            text = blob.decode("ascii")
+            texts = [text[a:b] for a, b in zip(offsets, offsets[1:])]
+        else:
+            texts = [blob[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:])]
+        if kind == "str":
+            return texts
+        return [json.loads(t) if t else default for t in texts]
+
+    def value(self, row: int, name: str, default: Any = None) -> Any:
+        """🧠 ЛОГИКА: одно поле одной сущности (декодируется только оно)."""
+        col = self._col_by_name.get(name)
+        if col is None:
+            return default
+        kind = col["kind"]
+        parts = self._col_views(name)
+
+        if kind in ("i64", "f64"):
+            return parts[0][row]
+        if kind == "num":
+            v = parts[0][row]
+            return int(v) if parts[1][row] else v
+
+        offsets, blob = parts
+        a, b = offsets[row], offsets[row + 1]
+        text = bytes(blob[a:b]).decode("utf-8")
+        if kind == "str":
+            return text
+        if not text:
+            return default
+        return json.loads(text)
+
+    def row(self, i: int) -> dict:
+        """🧠 ЛОГИКА: собрать dict сущности (ключи в порядке колонок, отсутствующие пропускаем)."""
+        ent: dict = {}
+        for col in self.columns:
+            name = col["name"]
+            v = self.value(i, name, _ABSENT)
+            if v is not _ABSENT:
+                ent[name] = v
+        return ent
+
+
+class LazyEntityList(MutableSequence):
+    """
+    🧠 ЛОГИКА:
+    Список сущностей поверх BinaryScene.
+    - элемент декодируется в dict при первом обращении и дальше живёт как обычный dict
+      (редактор может менять его на месте, как раньше)
+    - структурные изменения (insert/del) сначала материализуют весь список
+    """
+
+    def __init__(self, source: BinaryScene):
+        self._source: BinaryScene | None = source
+        self._rows: list[dict | None] = [None] * source.count
+
+    @property
+    def source(self) -> BinaryScene | None:
+        """Открытый бинарный файл (None — если список уже отвязан от mmap)."""
+        return self._source
+
+    def _get(self, i: int) -> dict:
+        ent = self._rows[i]
+        if ent is None:
+            ent = self._source.row(i)  # type: ignore[union-attr]
+            self._rows[i] = ent
+        return ent
+
+    def materialized_count(self) -> int:
+        return sum(1 for r in self._rows if r is not None)
+
+    def iter_materialized(self):
+        """🧠 ЛОГИКА: (index, dict) только для уже декодированных строк — только их мог поменять редактор."""
+        for i, ent in enumerate(self._rows):
+            if ent is not None:
+                yield i, ent
+
+    def original(self, i: int) -> dict:
+        """🧠 ЛОГИКА: строка в том виде, в каком она лежит в файле (без правок в памяти)."""
+        return self._source.row(i)  # type: ignore[union-attr]
+
+    def original_value(self, i: int, name: str, default: Any = None) -> Any:
+        return self._source.value(i, name, default)  # type: ignore[union-attr]
+
+    def detach(self) -> None:
+        """🧠 ЛОГИКА: декодируем всё и закрываем mmap (нужно перед перезаписью исходного файла)."""
+        if self._source is None:
+            return
+        for i in range(len(self._rows)):
+            self._get(i)
+        self._source.close()
+        self._source = None
+
+    # --- Sequence ---
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._get(j) for j in range(*i.indices(len(self._rows)))]
+        if i < 0:
+            i += len(self._rows)
+        if not (0 <= i < len(self._rows)):
+            raise IndexError(i)
+        return self._get(i)
+
+    def __iter__(self):
+        for i in range(len(self._rows)):
+            yield self._get(i)
+
+    def __reversed__(self):
+        for i in range(len(self._rows) - 1, -1, -1):
+            yield self._get(i)
+
+    # --- MutableSequence ---
+    def __setitem__(self, i, value) -> None:
+        self.detach()
+        self._rows[i] = value
+
+    def __delitem__(self, i) -> None:
+        self.detach()
+        del self._rows[i]
+
+    def insert(self, i: int, value: dict) -> None:
+        self.detach()
+        self._rows.insert(i, value)
+
+
+def read_binary_scene(path: Path) -> dict:
+    """
+    🧠 ЛОГИКА: открыть *.scene.bin как dict сцены.
+    "entities" — LazyEntityList (mmap остаётся открытым, пока список не отвязан).
+    """
+    source = BinaryScene(path)
+    scene = dict(source.scene_meta)
+    scene["entities"] = LazyEntityList(source)
+    return scene
@@ -0,0 +1,251 @@
+# engine/scene_cache.py
+# 🧠 ЛОГИКА: кеш уже разобранных сцен на диске (<проект>/.cache/scenes/)
+#
+# Повторное открытие сцены из менеджера проектов каждый раз разбирало JSON заново.
+# Здесь сохраняется pickle-снимок разобранного dict; при следующем открытии он читается
+# в разы быстрее json.load.
+#
+# Ключ записи: путь сцены + mtime_ns + размер + blake2b содержимого:
+# - mtime и размер совпали          -> берём кеш без разбора сцены;
+# - размер совпал, mtime другой     -> сверяем хеш содержимого (файл "тронули", но не меняли);
+# - иначе                           -> промах, сцена читается из JSON и кеш перезаписывается.
+#
+# ✅ При промахе файл уже прочитан парсером — второй раз ради хеша его не читаем: store() пишет
+# запись без хеша, хеш считается при первом попадании по (mtime, размер), когда файл точно тот же.
+#
+# ✅ Размер кеша ограничен (CACHE_MAX_BYTES), лишнее вытесняется по LRU.
+# ⚠️ Бинарные сцены (*.scene.bin) не кешируются — они и так открываются мгновенно (mmap).
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+from pathlib import Path
+
+from engine.scene_io import detect_scene_format
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+CACHE_DIR_NAME = ".cache/scenes"       # 🔧 МОЖНО МЕНЯТЬ: папка кеша внутри проекта
+CACHE_MAX_BYTES = 512 * 1024 * 1024    # 🔧 МОЖНО МЕНЯТЬ: предел размера кеша (LRU-вытеснение)
+PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+HASH_CHUNK_BYTES = 1024 * 1024
+
+INDEX_FILE_NAME = "index.json"
+# 🧠 ЛОГИКА: pickle-снимок зависит от версии Python — чужие записи считаем промахом
+_CACHE_TAG = f"py{sys.version_info[0]}{sys.version_info[1]}-p{PICKLE_PROTOCOL}"
+
+# 🧠 ЛОГИКА: счётчики за сессию (для debug overlay)
+_STATS = {"hits": 0, "misses": 0}
+
+
+def cache_stats() -> dict:
+    """🧠 ЛОГИКА: {"hits": N, "misses": M} за текущую сессию."""
+    return dict(_STATS)
+
+
+def file_content_hash(path: Path) -> str:
+    """🧠 ЛОГИКА: blake2b содержимого файла (читается кусками)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_BYTES)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _is_cacheable(scene_path: Path) -> bool:
+    return detect_scene_format(scene_path) in ("json", "jsonz")
+
+
+class SceneCache:
+    """
+    🧠 ЛОГИКА:
+    Кеш сцен одного проекта. Записи: <hash(путь)>.pickle, метаданные — index.json:
+        {"entries": {"<ключ>": {"path", "mtime_ns", "size", "hash", "bytes", "last_used", "tag"}}}
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = CACHE_MAX_BYTES) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(max_bytes)
+        self._index: dict | None = None
+
+    # ------------------------------------------------------------
+    # index.json
+    # ------------------------------------------------------------
+    @property
+    def index_path(self) -> Path:
+        return self.cache_dir / INDEX_FILE_NAME
+
+    def _entries(self) -> dict:
+        if self._index is None:
+            index = {"entries": {}}
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, dict) and isinstance(data.get("entries"), dict):
+                    index = data
+            except Exception:
+                pass
+            self._index = index
+        return self._index["entries"]
+
+    def _save_index(self) -> None:
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.index_path.with_name(INDEX_FILE_NAME + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._index, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.index_path)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _key(scene_path: Path) -> str:
+        resolved = str(Path(scene_path).resolve())
+        return hashlib.blake2b(resolved.encode("utf-8"), digest_size=10).hexdigest()
+
+    def _entry_file(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pickle"
+
+    def _drop(self, key: str) -> None:
+        self._entries().pop(key, None)
+        try:
+            self._entry_file(key).unlink()
+        except FileNotFoundError:
+            pass
+        except Exception:
+            pass
+
+    # ------------------------------------------------------------
+    # load/store
+    # ------------------------------------------------------------
+    def load(self, scene_path: Path) -> dict | None:
+        """
+        🧠 ЛОГИКА: разобранная сцена из кеша или None (промах).
+        Для *.scene.bin всегда None и счётчики не трогаем.
+        """
+        scene_path = Path(scene_path)
+        if not scene_path.exists() or not _is_cacheable(scene_path):
+            return None
+
+        key = self._key(scene_path)
+        entry = self._entries().get(key)
+        data = None
+        if entry is not None:
+            data = self._load_entry(key, entry, scene_path)
+
+        if data is None:
+            _STATS["misses"] += 1
+            return None
+
+        _STATS["hits"] += 1
+        entry["last_used"] = time.time()
+        self._save_index()
+        return data
+
+    def _load_entry(self, key: str, entry: dict, scene_path: Path) -> dict | None:
+        try:
+            st = scene_path.stat()
+            if entry.get("tag") != _CACHE_TAG or int(entry.get("size", -1)) != st.st_size:
+                return None
+            if int(entry.get("mtime_ns", -1)) != st.st_mtime_ns:
+                # ✅ файл перезаписан тем же содержимым — кеш остаётся валидным
+                if entry.get("hash") is None or entry["hash"] != file_content_hash(scene_path):
+                    return None
+                entry["mtime_ns"] = st.st_mtime_ns
+            elif entry.get("hash") is None:
+                entry["hash"] = file_content_hash(scene_path)  # отложенный хеш (см. шапку)
+
+            with open(self._entry_file(key), "rb") as f:
+                data = pickle.load(f)
+            return data if isinstance(data, dict) else None
+        except Exception:
+            # ⚠️ битая/удалённая запись — просто промах
+            self._drop(key)
+            return None
+
+    def store(self, scene_path: Path, scene_data: dict) -> bool:
+        """
+        🧠 ЛОГИКА: сохранить только что разобранную сцену.
+        Вызывать сразу после чтения файла (до применения журнала и любых правок):
+        снимок должен совпадать с содержимым файла на диске.
+        """
+        scene_path = Path(scene_path)
+        if not scene_path.exists() or not _is_cacheable(scene_path):
+            return False
+
+        key = self._key(scene_path)
+        try:
+            st = scene_path.stat()
+            payload = pickle.dumps(scene_data, protocol=PICKLE_PROTOCOL)
+            if len(payload) > self.max_bytes:
+                return False
+
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            target = self._entry_file(key)
+            tmp = target.with_name(target.name + ".tmp")
+            with open(tmp, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, target)
+
+            self._entries()[key] = {
+                "path": str(scene_path.resolve()),
+                "mtime_ns": st.st_mtime_ns,
+                "size": st.st_size,
+                "hash": None,  # считается при первом попадании
+                "bytes": len(payload),
+                "last_used": time.time(),
+                "tag": _CACHE_TAG,
+            }
+        except Exception:
+            return False
+
+        self._evict(keep=key)
+        self._save_index()
+        return True
+
+    def _evict(self, keep: str | None = None) -> None:
+        """🧠 ЛОГИКА: LRU — выкидываем самые давно использованные записи, пока не влезем в лимит."""
+        entries = self._entries()
+        total = sum(int(e.get("bytes", 0)) for e in entries.values())
+        if total <= self.max_bytes:
+            return
+        for key in sorted(entries, key=lambda k: float(entries[k].get("last_used", 0.0))):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= int(entries[key].get("bytes", 0))
+            self._drop(key)
+
+    def total_bytes(self) -> int:
+        return sum(int(e.get("bytes", 0)) for e in self._entries().values())
+
+
+# ============================================================
+# ✅ Реестр: один кеш на проект
+# ============================================================
+_CACHES: dict[str, SceneCache] = {}
+
+
+def scene_cache_for(scene_path: Path) -> SceneCache:
+    """
+    🧠 ЛОГИКА: кеш проекта, которому принадлежит сцена.
+    Сцены лежат в <проект>/scenes/, поэтому корень проекта — родитель папки сцены.
+    """
+    project_root = Path(scene_path).resolve().parent.parent
+    cache_dir = project_root / CACHE_DIR_NAME
+    key = str(cache_dir)
+    cache = _CACHES.get(key)
+    if cache is None:
+        cache = SceneCache(cache_dir)
+        _CACHES[key] = cache
+    return cache
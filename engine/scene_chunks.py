@@ -0,0 +1,582 @@
+# engine/scene_chunks.py
+# 🧠 ЛОГИКА: сцена, разбитая на клетки мира (chunks), с подгрузкой вокруг камеры
+#
+# Раскладка на диске:
+#   scenes/main.scene.chunks.json      — манифест: поля сцены, размер клетки, список клеток
+#   scenes/main.cells/c_<cx>_<cy>.json — сущности одной клетки мира {"cell": [cx, cy], "entities": [...]}
+#
+# Клетка сущности = floor(x / chunk_size), floor(y / chunk_size) по левому верхнему углу.
+# Открытие сцены читает только манифест; клетки рядом с камерой читаются в фоновом потоке,
+# дальние выгружаются, когда загруженное превышает бюджет памяти. Сохраняются только
+# изменённые клетки (+ манифест), каждая — через временный файл и os.replace.
+#
+# ✅ ChunkedScene повторяет интерфейс SceneAutosaver (mark_* / tick / save_now / flush / status),
+# поэтому редактор работает с ней так же, как с обычной сценой.
+
+from __future__ import annotations
+
+import copy
+import json
+import math
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+CHUNKS_SUFFIX = ".scene.chunks.json"       # 🔧 МОЖНО МЕНЯТЬ: расширение манифеста
+CELLS_DIR_SUFFIX = ".cells"                # 🔧 МОЖНО МЕНЯТЬ: папка клеток рядом с манифестом
+CHUNK_SIZE = 1024                          # 🔧 МОЖНО МЕНЯТЬ: размер клетки в world-единицах
+LOAD_MARGIN_CELLS = 1                      # 🔧 МОЖНО МЕНЯТЬ: сколько клеток вокруг видимой области держать
+MEMORY_BUDGET_BYTES = 256 * 1024 * 1024    # 🔧 МОЖНО МЕНЯТЬ: после этого выгружаем дальние клетки
+EST_ENTITY_BYTES = 120                     # 🧠 ЛОГИКА: оценка веса новой сущности (до первой записи)
+AUTOSAVE_DEBOUNCE_MS = 1500                # 🔧 МОЖНО МЕНЯТЬ: пауза после правки до сохранения клеток
+LOAD_WORKERS = 2                           # 🔧 МОЖНО МЕНЯТЬ: потоки чтения клеток
+
+MANIFEST_FORMAT = "dragon-chunks"
+MANIFEST_VERSION = 1
+
+ChunkKey = tuple[int, int]
+
+
+# ============================================================
+# ✅ Пути и ключи
+# ============================================================
+def is_chunked_scene(path: Path) -> bool:
+    return Path(path).name.endswith(CHUNKS_SUFFIX)
+
+
+def cells_dir(manifest_path: Path) -> Path:
+    manifest_path = Path(manifest_path)
+    stem = manifest_path.name[: -len(CHUNKS_SUFFIX)] if is_chunked_scene(manifest_path) else manifest_path.stem
+    return manifest_path.with_name(stem + CELLS_DIR_SUFFIX)
+
+
+def _key_str(key: ChunkKey) -> str:
+    return f"{key[0]},{key[1]}"
+
+
+def _key_parse(s: str) -> ChunkKey:
+    a, b = s.split(",")
+    return int(a), int(b)
+
+
+def _cell_file_name(key: ChunkKey) -> str:
+    return f"c_{key[0]}_{key[1]}.json"
+
+
+def cell_of(ent: dict, chunk_size: int) -> ChunkKey:
+    """🧠 ЛОГИКА: клетка мира, в которой лежит левый верхний угол сущности."""
+    try:
+        return int(math.floor(float(ent["x"]) / chunk_size)), int(math.floor(float(ent["y"]) / chunk_size))
+    except Exception:
+        return 0, 0
+
+
+def _atomic_write_text(path: Path, text: str) -> int:
+    data = text.encode("utf-8")
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+def _next_id_after(ids) -> tuple[bool, int]:
+    """🧠 ЛОГИКА: (все id целые?, следующий свободный номер) — для выдачи id новым сущностям."""
+    all_int = True
+    top = -1
+    for key in ids:
+        if isinstance(key, int) and not isinstance(key, bool):
+            top = max(top, key)
+            continue
+        all_int = False
+        if isinstance(key, str) and key[:1] == "e" and key[1:].isdigit():
+            top = max(top, int(key[1:]))
+    return all_int, top + 1
+
+
+# ============================================================
+# ✅ Целиком: конвертация обычной сцены <-> chunks
+# ============================================================
+def write_chunked_scene(manifest_path: Path, scene_data: dict, chunk_size: int = CHUNK_SIZE) -> None:
+    """🧠 ЛОГИКА: разложить сцену по клеткам и записать манифест (лишние файлы клеток удаляются)."""
+    manifest_path = Path(manifest_path)
+    folder = cells_dir(manifest_path)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    entities = list(scene_data.get("entities", []))
+    buckets: dict[ChunkKey, list] = {}
+    for ent in entities:
+        buckets.setdefault(cell_of(ent, chunk_size), []).append(ent)
+
+    chunks: dict[str, dict] = {}
+    for key, ents in buckets.items():
+        name = _cell_file_name(key)
+        size = _atomic_write_text(folder / name, json.dumps({"cell": list(key), "entities": ents}, ensure_ascii=False))
+        chunks[_key_str(key)] = {"file": name, "count": len(ents), "bytes": size}
+
+    int_ids, next_id = _next_id_after(ent.get("id") for ent in entities)
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "version": MANIFEST_VERSION,
+        "chunk_size": int(chunk_size),
+        "scene": {k: v for k, v in scene_data.items() if k != "entities"},
+        "int_ids": int_ids,
+        "next_id": next_id,
+        "chunks": chunks,
+    }
+    _atomic_write_text(manifest_path, json.dumps(manifest, ensure_ascii=False))
+
+    keep = {c["file"] for c in chunks.values()}
+    for p in folder.glob("c_*.json"):
+        if p.name not in keep:
+            try:
+                p.unlink()
+            except OSError:
+                pass
+
+
+def read_manifest(manifest_path: Path) -> dict:
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if not isinstance(manifest, dict) or manifest.get("format") != MANIFEST_FORMAT:
+        raise ValueError(f"Не манифест chunk-сцены: {manifest_path}")
+    return manifest
+
+
+def _read_cell(path: Path) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return list(data.get("entities", []))
+
+
+def read_chunked_scene(manifest_path: Path) -> dict:
+    """🧠 ЛОГИКА: прочитать все клетки в обычный dict сцены (конвертация, инструменты)."""
+    manifest_path = Path(manifest_path)
+    manifest = read_manifest(manifest_path)
+    folder = cells_dir(manifest_path)
+    data = dict(manifest.get("scene", {}))
+    entities: list = []
+    for key_s in sorted(manifest.get("chunks", {}), key=_key_parse):
+        entities.extend(_read_cell(folder / manifest["chunks"][key_s]["file"]))
+    data["entities"] = entities
+    return data
+
+
+# ============================================================
+# ✅ Потоковая работа в редакторе
+# ============================================================
+class _Chunk:
+    __slots__ = ("key", "entities", "bytes", "dirty")
+
+    def __init__(self, key: ChunkKey, entities: list, nbytes: int) -> None:
+        self.key = key
+        self.entities = entities
+        self.bytes = int(nbytes)
+        self.dirty = False
+
+
+class ChunkedScene:
+    """
+    🧠 ЛОГИКА:
+    scene_data["entities"] — плоский список сущностей ТОЛЬКО загруженных клеток
+    (его рисует и редактирует редактор). Принадлежность сущности клетке хранится по id(dict).
+    Сущность, перетащенная в другую клетку, переезжает в неё при сохранении.
+    """
+
+    def __init__(
+        self,
+        manifest_path: Path,
+        memory_budget: int = MEMORY_BUDGET_BYTES,
+        debounce_ms: int = AUTOSAVE_DEBOUNCE_MS,
+    ) -> None:
+        self.path = Path(manifest_path)
+        self.folder = cells_dir(self.path)
+        self.memory_budget = int(memory_budget)
+        self.debounce_ms = int(debounce_ms)
+
+        self.manifest = read_manifest(self.path)
+        self.chunk_size = max(1, int(self.manifest.get("chunk_size", CHUNK_SIZE)))
+        self._index: dict[ChunkKey, dict] = {
+            _key_parse(k): dict(v) for k, v in self.manifest.get("chunks", {}).items()
+        }
+
+        self.scene_data: dict = dict(self.manifest.get("scene", {}))
+        self.scene_data["entities"] = []
+
+        self._loaded: dict[ChunkKey, _Chunk] = {}
+        self._owner: dict[int, ChunkKey] = {}                  # id(dict сущности) -> клетка
+        self._loading: dict[ChunkKey, Future] = {}
+        self._pending_add: dict[ChunkKey, list] = {}           # добавлены в клетку, которая ещё читается
+        self._flat_dirty = False
+        self._wanted: set[ChunkKey] = set()
+
+        self._meta_dirty = False
+        self._last_change = 0.0
+        self._save_future: Future | None = None
+
+        self._load_pool = ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix="scene-chunk-load")
+        self._save_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scene-chunk-save")
+
+        # для debug overlay
+        self.saves = 0
+        self.last_save_bytes = 0
+        self.last_error: str | None = None
+
+    # -----------------------------
+    # Состояние
+    # -----------------------------
+    @property
+    def total_chunks(self) -> int:
+        return len(set(self._index) | set(self._loaded))
+
+    @property
+    def loaded_chunks(self) -> int:
+        return len(self._loaded)
+
+    @property
+    def loading_chunks(self) -> int:
+        return len(self._loading)
+
+    @property
+    def loaded_bytes(self) -> int:
+        return sum(ch.bytes for ch in self._loaded.values())
+
+    @property
+    def dirty(self) -> bool:
+        return self._meta_dirty or any(ch.dirty for ch in self._loaded.values()) or bool(self._pending_add)
+
+    @property
+    def busy(self) -> bool:
+        return self._save_future is not None and not self._save_future.done()
+
+    def cell_counts(self) -> dict[ChunkKey, int]:
+        """🧠 ЛОГИКА: сущностей в каждой клетке мира (загруженные — по факту, остальные — из манифеста)."""
+        counts = {k: int(v.get("count", 0)) for k, v in self._index.items()}
+        for k, ch in self._loaded.items():
+            counts[k] = len(ch.entities)
+        for k, ents in self._pending_add.items():
+            counts[k] = counts.get(k, 0) + len(ents)
+        return {k: n for k, n in counts.items() if n > 0}
+
+    def new_entity_id(self) -> Any:
+        """🧠 ЛОГИКА: id, уникальный во всём мире (а не только среди загруженных клеток)."""
+        n = int(self.manifest.get("next_id", 0))
+        self.manifest["next_id"] = n + 1
+        self._meta_dirty = True
+        return n if self.manifest.get("int_ids", True) else f"e{n}"
+
+    # -----------------------------
+    # Подгрузка/выгрузка вокруг камеры
+    # -----------------------------
+    def _cells_in_rect(self, world_rect: tuple[float, float, float, float], margin: int) -> set[ChunkKey]:
+        x, y, w, h = world_rect
+        cs = self.chunk_size
+        x0 = int(math.floor(x / cs)) - margin
+        y0 = int(math.floor(y / cs)) - margin
+        x1 = int(math.floor((x + max(0.0, w)) / cs)) + margin
+        y1 = int(math.floor((y + max(0.0, h)) / cs)) + margin
+        return {(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)}
+
+    def update_view(self, world_rect: tuple[float, float, float, float], pinned: dict | None = None) -> bool:
+        """
+        🧠 ЛОГИКА: вызывать раз в кадр с видимой областью мира (x, y, w, h).
+        Ставит в очередь чтение нужных клеток, принимает готовые, выгружает лишние.
+        Возвращает True, если плоский список сущностей поменялся.
+        """
+        self._wanted = self._cells_in_rect(world_rect, LOAD_MARGIN_CELLS)
+        saving = self.busy
+
+        for key in self._wanted:
+            if key in self._loaded or key in self._loading or key not in self._index:
+                continue
+            if saving:
+                continue  # ⚠️ файл клетки может как раз перезаписываться — прочитаем в следующем кадре
+            path = self.folder / self._index[key]["file"]
+            self._loading[key] = self._load_pool.submit(_read_cell, path)
+
+        self._collect_loads()
+
+        pinned_key = self._owner.get(id(pinned)) if pinned is not None else None
+        self._evict(keep=pinned_key)
+
+        if self._flat_dirty:
+            self._rebuild_flat()
+            return True
+        return False
+
+    def _collect_loads(self) -> None:
+        """🧠 ЛОГИКА: готовые чтения клеток -> в память (и прочь из _loading: второй раз не примем)."""
+        for key, fut in list(self._loading.items()):
+            if not fut.done():
+                continue
+            del self._loading[key]
+            try:
+                ents = fut.result()
+            except Exception as e:
+                self.last_error = f"{_cell_file_name(key)}: {e}"
+                continue
+            self._attach(key, ents)
+
+    def _attach(self, key: ChunkKey, ents: list) -> None:
+        """🧠 ЛОГИКА: прочитанная клетка -> в память (+ сущности, добавленные, пока она читалась)."""
+        chunk = _Chunk(key, ents, int(self._index.get(key, {}).get("bytes", 0)))
+        for ent in ents:
+            self._owner[id(ent)] = key
+        extra = self._pending_add.pop(key, None)
+        if extra:
+            for ent in extra:
+                chunk.entities.append(ent)
+                self._owner[id(ent)] = key
+            chunk.dirty = True
+        self._loaded[key] = chunk
+        self._flat_dirty = True
+
+    def _evict(self, keep: ChunkKey | None) -> None:
+        """🧠 ЛОГИКА: пока загруженное больше бюджета — выгружаем самые дальние чистые клетки вне вида."""
+        total = self.loaded_bytes
+        if total <= self.memory_budget or not self._wanted:
+            return
+        cx = sum(k[0] for k in self._wanted) / len(self._wanted)
+        cy = sum(k[1] for k in self._wanted) / len(self._wanted)
+        far = sorted(
+            (k for k, ch in self._loaded.items() if k not in self._wanted and k != keep and not ch.dirty),
+            key=lambda k: (k[0] - cx) ** 2 + (k[1] - cy) ** 2,
+            reverse=True,
+        )
+        for key in far:
+            if total <= self.memory_budget:
+                break
+            chunk = self._loaded.pop(key)
+            for ent in chunk.entities:
+                self._owner.pop(id(ent), None)
+            total -= chunk.bytes
+            self._flat_dirty = True
+
+    def _rebuild_flat(self) -> None:
+        flat: list = []
+        for key in sorted(self._loaded):
+            flat.extend(self._loaded[key].entities)
+        for ents in self._pending_add.values():
+            flat.extend(ents)
+        # ✅ на месте: редактор держит ссылку на scene_data["entities"]
+        self.scene_data["entities"][:] = flat
+        self._flat_dirty = False
+
+    # -----------------------------
+    # Правки (интерфейс как у SceneAutosaver)
+    # -----------------------------
+    def _touch(self) -> None:
+        self._last_change = time.perf_counter()
+
+    def _chunk_for_new(self, key: ChunkKey) -> _Chunk | None:
+        chunk = self._loaded.get(key)
+        if chunk is None and key not in self._index:
+            chunk = _Chunk(key, [], 0)
+            self._loaded[key] = chunk
+        return chunk
+
+    def mark_changed(self, ent: dict) -> None:
+        key = self._owner.get(id(ent))
+        if key is not None and key in self._loaded:
+            self._loaded[key].dirty = True
+        self._touch()
+
+    def mark_added(self, ent: dict) -> None:
+        key = cell_of(ent, self.chunk_size)
+        chunk = self._chunk_for_new(key)
+        if chunk is None:
+            # клетка есть на диске, но ещё не прочитана — добавим, когда дочитается
+            self._pending_add.setdefault(key, []).append(ent)
+        else:
+            chunk.entities.append(ent)
+            chunk.bytes += EST_ENTITY_BYTES
+            chunk.dirty = True
+            self._owner[id(ent)] = key
+        self._touch()
+
+    def mark_deleted(self, ent: dict) -> None:
+        key = self._owner.pop(id(ent), None)
+        if key is not None and key in self._loaded:
+            chunk = self._loaded[key]
+            for i, e in enumerate(chunk.entities):
+                if e is ent:
+                    del chunk.entities[i]
+                    break
+            chunk.dirty = True
+        else:
+            for ents in self._pending_add.values():
+                for i, e in enumerate(ents):
+                    if e is ent:
+                        del ents[i]
+                        break
+        self._touch()
+
+    def mark_all(self) -> None:
+        self._meta_dirty = True
+        for chunk in self._loaded.values():
+            chunk.dirty = True
+        self._touch()
+
+    # -----------------------------
+    # Сохранение изменённых клеток
+    # -----------------------------
+    def _rebucket(self) -> None:
+        """
+        🧠 ЛОГИКА: сущности изменённых клеток, уехавшие в другую клетку, переносим туда.
+        Если целевая клетка есть на диске, но не загружена — сущность пока остаётся на месте
+        (сохранится корректно, просто в "чужой" клетке).
+        """
+        for chunk in [ch for ch in self._loaded.values() if ch.dirty]:
+            stay: list = []
+            for ent in chunk.entities:
+                key = cell_of(ent, self.chunk_size)
+                if key == chunk.key:
+                    stay.append(ent)
+                    continue
+                target = self._chunk_for_new(key)
+                if target is None:
+                    stay.append(ent)
+                    continue
+                target.entities.append(ent)
+                target.bytes += EST_ENTITY_BYTES
+                target.dirty = True
+                self._owner[id(ent)] = key
+            chunk.entities[:] = stay
+
+    def _submit_save(self) -> bool:
+        self._rebucket()
+        jobs: list[tuple[ChunkKey, list]] = []
+        for chunk in self._loaded.values():
+            if chunk.dirty:
+                jobs.append((chunk.key, [copy.deepcopy(ent) for ent in chunk.entities]))
+                chunk.dirty = False
+        if not jobs and not self._meta_dirty:
+            return False
+
+        self.manifest["scene"] = {k: copy.deepcopy(v) for k, v in self.scene_data.items() if k != "entities"}
+        manifest = copy.deepcopy(self.manifest)
+        manifest["chunks"] = {_key_str(k): dict(v) for k, v in self._index.items()}
+        self._meta_dirty = False
+
+        self._save_future = self._save_pool.submit(self._write_chunks, jobs, manifest)
+        return True
+
+    def _write_chunks(self, jobs: list[tuple[ChunkKey, list]], manifest: dict) -> dict:
+        """🧠 ЛОГИКА (рабочий поток): клетки -> файлы, затем манифест. Возвращает новые записи индекса."""
+        self.folder.mkdir(parents=True, exist_ok=True)
+        updates: dict[ChunkKey, dict | None] = {}
+        total = 0
+        for key, ents in jobs:
+            name = _cell_file_name(key)
+            path = self.folder / name
+            if not ents:
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                manifest["chunks"].pop(_key_str(key), None)
+                updates[key] = None
+                continue
+            size = _atomic_write_text(path, json.dumps({"cell": list(key), "entities": ents}, ensure_ascii=False))
+            entry = {"file": name, "count": len(ents), "bytes": size}
+            manifest["chunks"][_key_str(key)] = entry
+            updates[key] = entry
+            total += size
+        total += _atomic_write_text(self.path, json.dumps(manifest, ensure_ascii=False))
+        return {"updates": updates, "bytes": total}
+
+    def _collect_save(self) -> None:
+        f = self._save_future
+        if f is None or not f.done():
+            return
+        self._save_future = None
+        try:
+            res = f.result()
+        except Exception as e:
+            # ⚠️ запись не удалась — пометим всё загруженное, сохраним ещё раз
+            self.last_error = str(e)
+            self.mark_all()
+            return
+        for key, entry in res["updates"].items():
+            if entry is None:
+                self._index.pop(key, None)
+                chunk = self._loaded.get(key)
+                if chunk is not None and not chunk.entities and not chunk.dirty:
+                    del self._loaded[key]
+            else:
+                self._index[key] = entry
+                chunk = self._loaded.get(key)
+                if chunk is not None:
+                    chunk.bytes = int(entry["bytes"])
+        self.saves += 1
+        self.last_save_bytes = int(res["bytes"])
+        self.last_error = None
+
+    def status(self) -> str:
+        self._collect_save()
+        if self.last_error:
+            return "error"
+        if self.busy:
+            return "saving"
+        if self.dirty:
+            return "pending"
+        return "saved"
+
+    def tick(self, scene_data: dict | None = None) -> bool:
+        self._collect_save()
+        if self.busy or not self.dirty:
+            return False
+        if (time.perf_counter() - self._last_change) * 1000.0 < self.debounce_ms:
+            return False
+        return self._submit_save()
+
+    def save_now(self, scene_data: dict | None = None) -> bool:
+        self._collect_save()
+        if self.busy:
+            return False
+        return self._submit_save()
+
+    def flush(self, scene_data: dict | None = None, timeout: float | None = None) -> None:
+        """🧠 ЛОГИКА: дождаться чтения/записи и синхронно сохранить все изменённые клетки."""
+        for fut in list(self._loading.values()):
+            try:
+                fut.result(timeout)
+            except Exception:
+                pass
+        if self._save_future is not None:
+            try:
+                self._save_future.result(timeout)
+            except Exception:
+                pass
+        self._collect_save()
+        # ✅ дочитанные клетки принимаем так же, как update_view(): иначе клетка из фонового чтения
+        # прикрепилась бы позже второй раз (поверх синхронно дочитанной ниже) — сущности задвоятся
+        self._collect_loads()
+        # ✅ новые сущности в недочитанных клетках: дочитываем клетку синхронно, чтобы не потерять их
+        for key in list(self._pending_add):
+            if key in self._loaded:
+                continue
+            late = self._loading.pop(key, None)  # ⚠️ не дождались (timeout): фоновое чтение уже не принимаем
+            if late is not None:
+                late.cancel()
+            try:
+                ents = _read_cell(self.folder / self._index[key]["file"])
+            except Exception as e:
+                self.last_error = f"{_cell_file_name(key)}: {e}"
+                continue
+            self._attach(key, ents)
+        if self._submit_save():
+            try:
+                self._save_future.result(timeout)  # type: ignore[union-attr]
+            except Exception:
+                pass
+            self._collect_save()
+
+    def close(self) -> None:
+        self._load_pool.shutdown(wait=True)
+        self._save_pool.shutdown(wait=True)
@@ -0,0 +1,182 @@
+# engine/scene_compress.py
+# 🧠 ЛОГИКА: сжатый контейнер для *.scene.json (zlib / lzma из stdlib), блоки сжимаются параллельно
+#
+# JSON больших уровней очень повторяющийся и сжимается в 10–20 раз. Сжатие включается
+# для проекта в project.json:
+#   {"scene_compression": "zlib"}   # или "lzma"; нет ключа / "none" — обычный JSON
+#
+# Формат файла (путь сцены тот же — *.scene.json, формат узнаётся по сигнатуре):
+#   MAGIC "DRGSCNZ\0" | u32 длина заголовка | заголовок JSON | блок 0 | блок 1 | ...
+#   заголовок: {"codec": "zlib", "raw": <байт JSON>, "blocks": [[сжато, исходно], ...]}
+#
+# ✅ Текст JSON режется на независимые блоки (BLOCK_BYTES) — zlib/lzma отпускают GIL,
+# поэтому блоки сжимаются и распаковываются в пуле потоков на всех ядрах.
+# ✅ При чтении распаковка идёт с опережением, а разбор JSON (engine/scene_stream.py) —
+# по мере готовности блоков, прогресс загрузки считается по распакованным байтам.
+
+from __future__ import annotations
+
+import json
+import lzma
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+BLOCK_BYTES = 1024 * 1024                      # 🔧 МОЖНО МЕНЯТЬ: размер независимого блока (до сжатия)
+COMPRESS_WORKERS = max(1, os.cpu_count() or 1)  # 🔧 МОЖНО МЕНЯТЬ: потоков на сжатие/распаковку
+ZLIB_LEVEL = 6                                 # 🔧 МОЖНО МЕНЯТЬ: 1 — быстрее, 9 — меньше
+LZMA_PRESET = 3                                # 🔧 МОЖНО МЕНЯТЬ: 0..9 (выше 3 — заметно медленнее, почти без выигрыша)
+READ_PIECE_BYTES = 256 * 1024                  # 🧠 ЛОГИКА: распакованный блок отдаём парсеру кусками (шаг загрузки)
+
+MAGIC = b"DRGSCNZ\0"
+CODECS = ("zlib", "lzma")
+PROJECT_KEY = "scene_compression"
+
+_HEADER_LEN = struct.Struct("<I")
+
+_POOL: ThreadPoolExecutor | None = None
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _POOL
+    if _POOL is None:
+        _POOL = ThreadPoolExecutor(max_workers=COMPRESS_WORKERS, thread_name_prefix="scene-compress")
+    return _POOL
+
+
+def _compress_block(codec: str, raw: bytes) -> bytes:
+    if codec == "zlib":
+        return zlib.compress(raw, ZLIB_LEVEL)
+    return lzma.compress(raw, format=lzma.FORMAT_XZ, preset=LZMA_PRESET)
+
+
+def _decompress_block(codec: str, data: bytes) -> bytes:
+    if codec == "zlib":
+        return zlib.decompress(data)
+    return lzma.decompress(data, format=lzma.FORMAT_XZ)
+
+
+def is_compressed_scene(path: Path) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+# ============================================================
+# ✅ Настройка проекта
+# ============================================================
+_PROJECT_CODECS: dict[str, tuple[int, str | None]] = {}
+
+
+def scene_compression_for(scene_path: Path) -> str | None:
+    """
+    🧠 ЛОГИКА: кодек сцен проекта из project.json ("zlib"/"lzma") или None — без сжатия.
+    Сцены лежат в <проект>/scenes/, значит project.json — в родителе папки сцены.
+    Значение кешируется по mtime project.json.
+    """
+    pj = Path(scene_path).resolve().parent.parent / "project.json"
+    try:
+        mtime = pj.stat().st_mtime_ns
+    except OSError:
+        return None
+    key = str(pj)
+    cached = _PROJECT_CODECS.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    codec = None
+    try:
+        with open(pj, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        value = data.get(PROJECT_KEY) if isinstance(data, dict) else None
+        if isinstance(value, str) and value.lower() in CODECS:
+            codec = value.lower()
+    except Exception:
+        codec = None
+    _PROJECT_CODECS[key] = (mtime, codec)
+    return codec
+
+
+# ============================================================
+# ✅ Запись
+# ============================================================
+def compress_bytes(raw: bytes, codec: str) -> bytes:
+    """🧠 ЛОГИКА: raw -> контейнер (заголовок + блоки), блоки сжимаются параллельно."""
+    if codec not in CODECS:
+        raise ValueError(f"Неизвестный кодек сжатия сцены: {codec!r}")
+    view = memoryview(raw)
+    pieces = [bytes(view[i : i + BLOCK_BYTES]) for i in range(0, len(raw), BLOCK_BYTES)]
+    blocks = list(_pool().map(lambda b: _compress_block(codec, b), pieces))
+
+    header = json.dumps(
+        {"codec": codec, "raw": len(raw), "blocks": [[len(c), len(r)] for c, r in zip(blocks, pieces)]},
+        separators=(",", ":"),
+    ).encode("utf-8")
+    return b"".join([MAGIC, _HEADER_LEN.pack(len(header)), header, *blocks])
+
+
+def write_compressed_scene(path: Path, raw: bytes, codec: str) -> int:
+    """🧠 ЛОГИКА: записать сжатую сцену (временный файл + os.replace). Возвращает размер файла."""
+    path = Path(path)
+    payload = compress_bytes(raw, codec)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(payload)
+    os.replace(tmp, path)
+    return len(payload)
+
+
+# ============================================================
+# ✅ Чтение
+# ============================================================
+def read_header(f) -> dict:
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Не сжатая сцена DragonEngine (нет сигнатуры)")
+    (n,) = _HEADER_LEN.unpack(f.read(_HEADER_LEN.size))
+    header = json.loads(f.read(n).decode("utf-8"))
+    if header.get("codec") not in CODECS:
+        raise ValueError(f"Неизвестный кодек сжатия сцены: {header.get('codec')!r}")
+    return header
+
+
+def iter_decompressed(path: Path) -> Iterator[bytes]:
+    """
+    🧠 ЛОГИКА: распакованный текст сцены кусками по порядку.
+    Блоки читаются и распаковываются в пуле с опережением (не больше 2 x потоков в памяти).
+    """
+    pool = _pool()
+    with open(path, "rb") as f:
+        header = read_header(f)
+        codec = header["codec"]
+        pending: deque = deque()
+        for csize, _rsize in header["blocks"]:
+            pending.append(pool.submit(_decompress_block, codec, f.read(int(csize))))
+            if len(pending) >= COMPRESS_WORKERS * 2:
+                yield from _pieces(pending.popleft().result())
+        while pending:
+            yield from _pieces(pending.popleft().result())
+
+
+def _pieces(block: bytes) -> Iterator[bytes]:
+    view = memoryview(block)
+    for i in range(0, len(block), READ_PIECE_BYTES):
+        yield view[i : i + READ_PIECE_BYTES]
+
+
+def raw_size(path: Path) -> int:
+    """🧠 ЛОГИКА: размер распакованного JSON (для прогресса загрузки)."""
+    with open(path, "rb") as f:
+        return int(read_header(f).get("raw", 0))
+
+
+def read_compressed_bytes(path: Path) -> bytes:
+    return b"".join(iter_decompressed(path))
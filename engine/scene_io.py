@@ -0,0 +1,154 @@
+# engine/scene_io.py
+# 🧠 ЛОГИКА: чтение/запись файлов сцены с автоопределением формата
+# - *.scene.json — исходный текстовый формат (indent=2, как раньше)
+# - *.scene.bin  — бинарный колоночный формат (engine/scene_binary.py), открывается через mmap
+# - *.scene.chunks.json — манифест сцены, разбитой на клетки мира (engine/scene_chunks.py)
+# - сжатый *.scene.json (engine/scene_compress.py) — если в project.json задан "scene_compression"
+#
+# ✅ Формат определяем по сигнатуре файла, а если файла ещё нет — по расширению.
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Generator
+
+from engine.scene_binary import (
+    LazyEntityList,
+    is_binary_scene,
+    read_binary_scene,
+    write_binary_scene,
+)
+from engine.scene_chunks import is_chunked_scene, read_chunked_scene, write_chunked_scene
+from engine.scene_compress import (
+    is_compressed_scene,
+    iter_decompressed,
+    raw_size,
+    read_compressed_bytes,
+    scene_compression_for,
+    write_compressed_scene,
+)
+from engine.scene_stream import LoadProgress, iter_parse_scene_chunks, iter_parse_scene_json
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+SCENE_JSON_SUFFIX = ".scene.json"   # 🔧 МОЖНО МЕНЯТЬ: расширение текстовых сцен
+SCENE_BIN_SUFFIX = ".scene.bin"     # 🔧 МОЖНО МЕНЯТЬ: расширение бинарных сцен
+JSON_INDENT = 2                     # 🔧 МОЖНО МЕНЯТЬ: отступы в *.scene.json
+
+
+def detect_scene_format(path: Path) -> str:
+    """🧠 ЛОГИКА: "bin", "chunks", "jsonz" (сжатый JSON) или "json" (сигнатура важнее расширения)."""
+    path = Path(path)
+    if is_chunked_scene(path):
+        return "chunks"
+    if path.exists():
+        if is_binary_scene(path):
+            return "bin"
+        return "jsonz" if is_compressed_scene(path) else "json"
+    return "bin" if path.name.endswith(SCENE_BIN_SUFFIX) else "json"
+
+
+def _plain_scene(scene_data: dict) -> dict:
+    """🧠 ЛОГИКА: копия сцены, которую понимает json.dump (entities -> обычный list)."""
+    data = dict(scene_data)
+    entities = scene_data.get("entities", [])
+    to_dicts = getattr(entities, "to_dicts", None)  # EntityStore (engine/entity_store.py)
+    data["entities"] = to_dicts() if to_dicts is not None else list(entities)
+    return data
+
+
+def read_scene_file(path: Path) -> dict:
+    """🧠 ЛОГИКА: прочитать сцену в dict {"name": ..., "entities": [...]} в любом формате."""
+    path = Path(path)
+    fmt = detect_scene_format(path)
+    if fmt == "bin":
+        return read_binary_scene(path)
+    if fmt == "chunks":
+        return read_chunked_scene(path)
+    if fmt == "jsonz":
+        return json.loads(read_compressed_bytes(path).decode("utf-8"))
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def iter_read_scene_file(path: Path) -> Generator[LoadProgress, None, dict]:
+    """
+    🧠 ЛОГИКА:
+    То же, что read_scene_file, но по шагам: после каждого прочитанного куска — LoadProgress.
+    JSON разбирается потоково (engine/scene_stream.py), бинарная сцена открывается сразу (mmap).
+    """
+    path = Path(path)
+    fmt = detect_scene_format(path)
+    if fmt == "chunks":
+        data = read_chunked_scene(path)
+        yield LoadProgress(1, 1, len(data.get("entities", [])))
+        return data
+    if fmt == "bin":
+        data = read_binary_scene(path)
+        total = path.stat().st_size
+        yield LoadProgress(total, total, len(data.get("entities", [])))
+        return data
+    if fmt == "jsonz":
+        # ✅ блоки распаковываются параллельно, парсер разбирает их по мере готовности
+        return (yield from iter_parse_scene_chunks(iter_decompressed(path), raw_size(path)))
+    return (yield from iter_parse_scene_json(path))
+
+
+def write_scene_file(path: Path, scene_data: dict, fmt: str | None = None) -> None:
+    """
+    🧠 ЛОГИКА:
+    Записать сцену. fmt=None -> формат по расширению файла.
+    JSON сжимается, если это включено в project.json ("scene_compression"); fmt="json" — всегда без сжатия.
+    ⚠️ Если entities — ленивый список из mmap этого же файла, сначала отвязываем его
+    (иначе на Windows файл нельзя заменить, пока он отображён в память).
+    """
+    path = Path(path)
+    if fmt is None:
+        if is_chunked_scene(path):
+            fmt = "chunks"
+        else:
+            fmt = "bin" if path.name.endswith(SCENE_BIN_SUFFIX) else None
+
+    entities = scene_data.get("entities")
+    if isinstance(entities, LazyEntityList):
+        entities.detach()
+    elif hasattr(entities, "to_dicts"):
+        scene_data = _plain_scene(scene_data)
+
+    if fmt == "bin":
+        write_binary_scene(path, scene_data)
+        return
+    if fmt == "chunks":
+        write_chunked_scene(path, scene_data)
+        return
+
+    codec = scene_compression_for(path) if fmt is None or fmt == "jsonz" else None
+    if fmt == "jsonz" and codec is None:
+        codec = "zlib"
+    if codec is not None:
+        text = json.dumps(_plain_scene(scene_data), ensure_ascii=False, indent=JSON_INDENT)
+        write_compressed_scene(path, text.encode("utf-8"), codec)
+        return
+
+    # ✅ через временный файл: при падении посреди записи старая сцена остаётся целой
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as file:
+        json.dump(_plain_scene(scene_data), file, ensure_ascii=False, indent=JSON_INDENT)
+    os.replace(tmp, path)
+
+
+def convert_scene(src: Path, dst: Path) -> None:
+    """
+    🧠 ЛОГИКА: JSON <-> binary <-> chunks без потерь.
+    Формат источника — по сигнатуре, формат результата — по расширению dst.
+    """
+    data = read_scene_file(Path(src))
+    try:
+        write_scene_file(Path(dst), data)
+    finally:
+        entities = data.get("entities")
+        if isinstance(entities, LazyEntityList):
+            entities.detach()
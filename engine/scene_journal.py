@@ -0,0 +1,464 @@
+# engine/scene_journal.py
+# 🧠 ЛОГИКА: журнал изменений сцены (write-ahead, append-only)
+#
+# Рядом со сценой лежит <scene>.journal — JSON Lines, по записи на изменение:
+#   {"op": "put",  "id": <id>, "e": {...сущность целиком...}}   — изменена или добавлена
+#   {"op": "del",  "id": <id>}                                  — удалена
+#   {"op": "meta", "scene": {...поля сцены кроме entities...}}  — изменились поля сцены
+#
+# save_scene дописывает в журнал только то, что поменялось с прошлого сохранения,
+# load_scene проигрывает журнал поверх основного файла. Когда журнал вырастает больше
+# порога, фоновый поток "сжимает" его: пересобирает основной файл (base + журнал)
+# и оставляет в журнале только записи, пришедшие во время сжатия.
+#
+# ✅ Проигрывание идемпотентно: если движок упал между заменой основного файла и
+# обрезкой журнала, повторное применение тех же записей даёт то же состояние.
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+from engine.entity_store import EntityStore, json_default
+from engine.scene_binary import LazyEntityList
+from engine.scene_io import read_scene_file, write_scene_file
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+JOURNAL_SUFFIX = ".journal"             # 🔧 МОЖНО МЕНЯТЬ: <scene>.scene.json.journal
+COMPACT_THRESHOLD_BYTES = 4 * 1024 ** 2  # 🔧 МОЖНО МЕНЯТЬ: размер журнала, после которого сжимаем
+FSYNC_ON_APPEND = True                  # 🔧 МОЖНО МЕНЯТЬ: False = быстрее, но можно потерять хвост при сбое ОС
+
+
+def journal_path(scene_path: Path) -> Path:
+    scene_path = Path(scene_path)
+    return scene_path.with_name(scene_path.name + JOURNAL_SUFFIX)
+
+
+def _dump_line(rec: dict) -> str:
+    return json.dumps(rec, ensure_ascii=False, separators=(",", ":"), default=json_default) + "\n"
+
+
+def _fingerprint(ent: dict) -> int:
+    """🧠 ЛОГИКА: дешёвый отпечаток содержимого сущности (repr dict-а считается в C)."""
+    return hash(repr(ent))
+
+
+def _scene_meta(scene_data: dict) -> dict:
+    return {k: v for k, v in scene_data.items() if k != "entities"}
+
+
+def _entity_id(ent: dict) -> Any:
+    return ent.get("id")
+
+
+# ============================================================
+# ✅ Чтение и проигрывание
+# ============================================================
+def _parse_journal(raw: bytes) -> tuple[list[dict], int]:
+    """🧠 ЛОГИКА: (записи, длина целой части в байтах). Всё после битой/недописанной строки — хвост сбоя."""
+    records: list[dict] = []
+    pos = 0
+    while pos < len(raw):
+        end = raw.find(b"\n", pos)
+        if end < 0:
+            break  # строка без перевода строки = запись оборвалась
+        line = raw[pos:end]
+        if line.strip():
+            try:
+                rec = json.loads(line.decode("utf-8"))
+            except Exception:
+                break
+            if isinstance(rec, dict):
+                records.append(rec)
+        pos = end + 1
+    return records, pos
+
+
+def read_journal_records(path: Path, limit_bytes: int | None = None) -> list[dict]:
+    """
+    🧠 ЛОГИКА: читаем записи журнала.
+    Оборванную последнюю строку (сбой посреди записи) молча пропускаем.
+    """
+    path = Path(path)
+    if not path.exists():
+        return []
+
+    with open(path, "rb") as f:
+        raw = f.read() if limit_bytes is None else f.read(limit_bytes)
+    return _parse_journal(raw)[0]
+
+
+def apply_journal_records(scene_data: dict, records: list[dict]) -> int:
+    """
+    🧠 ЛОГИКА:
+    Применяем записи к сцене. Сначала сворачиваем журнал в итоговое состояние по id,
+    затем одним проходом: правим существующие (на месте), дописываем новые, удаляем удалённые.
+    Возвращает число применённых записей.
+    """
+    if not records:
+        return 0
+
+    final: dict[Any, dict | None] = {}
+    new_order: list[Any] = []
+    for rec in records:
+        op = rec.get("op")
+        if op == "meta":
+            meta = rec.get("scene")
+            if isinstance(meta, dict):
+                for k in [k for k in scene_data.keys() if k != "entities"]:
+                    if k not in meta:
+                        del scene_data[k]
+                scene_data.update({k: v for k, v in meta.items() if k != "entities"})
+        elif op == "put" and isinstance(rec.get("e"), dict):
+            key = rec.get("id")
+            if key not in final:
+                new_order.append(key)
+            final[key] = rec["e"]
+        elif op == "del":
+            key = rec.get("id")
+            if key not in final:
+                new_order.append(key)
+            final[key] = None
+
+    entities = scene_data.setdefault("entities", [])
+
+    # индекс id -> позиция (для mmap-сцены читаем только колонку id, строки не декодируем)
+    if isinstance(entities, LazyEntityList) and entities.source is not None:
+        positions = {entities.original_value(i, "id"): i for i in range(len(entities))}
+    else:
+        positions = {_entity_id(ent): i for i, ent in enumerate(entities)}
+
+    deleted: set[int] = set()
+    for key in new_order:
+        ent_new = final[key]
+        pos = positions.get(key)
+        if pos is None:
+            if ent_new is not None:
+                entities.append(dict(ent_new))
+            continue
+        if ent_new is None:
+            deleted.add(pos)
+        else:
+            ent = entities[pos]
+            ent.clear()
+            ent.update(ent_new)
+
+    if deleted:
+        entities[:] = [ent for i, ent in enumerate(entities) if i not in deleted]
+
+    return len(records)
+
+
+def replay_journal(scene_path: Path, scene_data: dict) -> int:
+    """
+    🧠 ЛОГИКА: проиграть журнал сцены поверх уже прочитанного основного файла.
+    Хвост после сбоя обрезаем, иначе новые записи приклеятся к битой строке и потеряются.
+    """
+    path = journal_path(scene_path)
+    if not path.exists():
+        return 0
+
+    raw = path.read_bytes()
+    records, valid_len = _parse_journal(raw)
+    if valid_len < len(raw):
+        with open(path, "r+b") as f:
+            f.truncate(valid_len)
+    return apply_journal_records(scene_data, records)
+
+
+# ============================================================
+# ✅ Запись (инкрементальное сохранение)
+# ============================================================
+class SceneJournal:
+    """
+    🧠 ЛОГИКА:
+    Хранит отпечатки сущностей на момент последнего сохранения и при record()
+    дописывает в журнал только разницу. I/O на сохранение ~ размеру правки, а не сцены.
+    """
+
+    def __init__(self, scene_path: Path, compact_threshold: int = COMPACT_THRESHOLD_BYTES):
+        self.scene_path = Path(scene_path)
+        self.path = journal_path(self.scene_path)
+        self.compact_threshold = int(compact_threshold)
+
+        self._fp: dict[Any, int] = {}
+        self._meta_fp: int | None = None
+        self._has_baseline = False
+        self._known_all = False       # False = отпечатки есть не у всех (mmap-сцена, декодируем лениво)
+        self._lazy_ids_ok: bool | None = None
+
+        self._ids_ok: bool | None = None    # 🧠 ЛОГИКА: кеш проверки уникальности id (для record_changes)
+        self.compact_due = False            # 🧠 ЛОГИКА: журнал перерос порог, сжатие запускает владелец сцены
+
+        self._lock = threading.Lock()       # 🧠 ЛОГИКА: дозапись vs обрезка журнала
+        self._base_lock = threading.Lock()  # 🧠 ЛОГИКА: перезапись основного файла (сжатие vs полное сохранение)
+        self._compact_thread: threading.Thread | None = None
+
+    # -----------------------------
+    # Базовое состояние
+    # -----------------------------
+    def baseline(self, scene_data: dict) -> None:
+        """🧠 ЛОГИКА: запомнить текущее состояние как "сохранённое"."""
+        entities = scene_data.get("entities", [])
+        self._fp.clear()
+        self._lazy_ids_ok = None
+        self._ids_ok = None
+
+        try:
+            if isinstance(entities, LazyEntityList) and entities.source is not None:
+                # mmap-сцена: отпечатки только у уже декодированных строк, остальные не менялись
+                for _, ent in entities.iter_materialized():
+                    self._fp[_entity_id(ent)] = _fingerprint(ent)
+                self._known_all = False
+            else:
+                for ent in entities:
+                    self._fp[_entity_id(ent)] = _fingerprint(ent)
+                self._known_all = True
+        except TypeError:
+            # id не годится в ключ (например, список) -> журнал для этой сцены не ведём
+            self._has_baseline = False
+            return
+
+        self._meta_fp = _fingerprint(_scene_meta(scene_data))
+        self._has_baseline = True
+
+    def _journalable(self, ids) -> bool:
+        """🧠 ЛОГИКА: журнал работает по id — нужны уникальные hashable id у всех сущностей."""
+        seen: set = set()
+        for key in ids:
+            try:
+                if key is None or key in seen:
+                    return False
+                seen.add(key)
+            except TypeError:
+                return False
+        return True
+
+    def _diff(self, scene_data: dict) -> list[dict] | None:
+        """🧠 ЛОГИКА: список записей журнала или None (нужна полная перезапись)."""
+        entities = scene_data.get("entities", [])
+        recs: list[dict] = []
+
+        meta = _scene_meta(scene_data)
+        meta_fp = _fingerprint(meta)
+        if meta_fp != self._meta_fp:
+            recs.append({"op": "meta", "scene": meta})
+
+        if isinstance(entities, LazyEntityList) and entities.source is not None:
+            # структурных правок не было (они отвязывают список) -> только изменения на месте
+            if self._lazy_ids_ok is None:
+                # один раз читаем только колонку id (строки целиком не декодируем)
+                self._lazy_ids_ok = self._journalable(
+                    entities.original_value(i, "id") for i in range(len(entities))
+                )
+            if not self._lazy_ids_ok:
+                return None
+            for i, ent in entities.iter_materialized():
+                key = _entity_id(ent)
+                old = self._fp.get(key)
+                if old is None:
+                    old = _fingerprint(entities.original(i))
+                if _fingerprint(ent) != old:
+                    recs.append({"op": "put", "id": key, "e": ent})
+            return recs
+
+        if not self._known_all:
+            # mmap-список отвязался (удаление/вставка) — прошлых отпечатков у части строк нет
+            return None
+        if not self._journalable(_entity_id(ent) for ent in entities):
+            return None
+
+        alive: set = set()
+        for ent in entities:
+            key = _entity_id(ent)
+            alive.add(key)
+            if self._fp.get(key) != _fingerprint(ent):
+                recs.append({"op": "put", "id": key, "e": ent})
+        for key in self._fp.keys():
+            if key not in alive:
+                recs.append({"op": "del", "id": key})
+        return recs
+
+    def record(self, scene_data: dict) -> int:
+        """
+        🧠 ЛОГИКА: сохранить сцену.
+        Обычно — дописать разницу в журнал; если разницу посчитать нельзя — полная перезапись.
+        Возвращает число байт, записанных на диск.
+        """
+        recs = self._diff(scene_data) if self._has_baseline else None
+        if recs is None:
+            return self.rewrite(scene_data)
+        if not recs:
+            return 0
+
+        written, size = self._append(recs)
+        self._meta_fp = _fingerprint(_scene_meta(scene_data))
+
+        if size >= self.compact_threshold:
+            self._start_compaction(scene_data.get("entities", []))
+        return written
+
+    def _append(self, recs: list[dict]) -> tuple[int, int]:
+        """
+        🧠 ЛОГИКА: дописать записи в журнал (fsync по FSYNC_ON_APPEND) и обновить отпечатки put/del.
+        Возвращает (записано байт, размер журнала после записи).
+        """
+        payload = "".join(_dump_line(r) for r in recs).encode("utf-8")
+        with self._lock:
+            with open(self.path, "ab") as f:
+                f.write(payload)
+                f.flush()
+                if FSYNC_ON_APPEND:
+                    os.fsync(f.fileno())
+            size = self.path.stat().st_size
+
+        # отпечатки обновляем только после успешной записи
+        for r in recs:
+            if r["op"] == "put":
+                self._fp[r["id"]] = _fingerprint(r["e"])
+            elif r["op"] == "del":
+                self._fp.pop(r["id"], None)
+        return len(payload), size
+
+    # -----------------------------
+    # Точечные изменения (без полного diff)
+    # -----------------------------
+    def can_record_changes(self, scene_data: dict) -> bool:
+        """
+        🧠 ЛОГИКА: можно ли сохранять сцену через record_changes (нужны уникальные id).
+        ⚠️ Вызывать из потока, который владеет сценой: для mmap-сцены читается колонка id.
+        Результат кешируется до следующего baseline (редактор сам выдаёт новым сущностям уникальные id).
+        """
+        if not self._has_baseline:
+            return False
+        if self._ids_ok is None:
+            entities = scene_data.get("entities", [])
+            if isinstance(entities, LazyEntityList) and entities.source is not None:
+                ids = (entities.original_value(i, "id") for i in range(len(entities)))
+            elif isinstance(entities, EntityStore):
+                ids = entities.ids()  # ✅ колонка id, без создания view на каждую строку
+            else:
+                ids = (_entity_id(ent) for ent in entities)
+            self._ids_ok = self._journalable(ids)
+        return self._ids_ok
+
+    def record_changes(self, scene_meta: dict, puts: list[dict], deleted: list) -> int:
+        """
+        🧠 ЛОГИКА: дописать в журнал заранее известные изменения (их отслеживает редактор).
+        puts — копии изменённых/добавленных сущностей, deleted — id удалённых.
+        Можно вызывать из фонового потока: живые данные сцены здесь не читаются.
+        Возвращает число байт, записанных на диск.
+        """
+        recs: list[dict] = []
+        meta_fp = _fingerprint(scene_meta)
+        if meta_fp != self._meta_fp:
+            recs.append({"op": "meta", "scene": scene_meta})
+        for ent in puts:
+            key = _entity_id(ent)
+            fp = _fingerprint(ent)
+            if self._fp.get(key) != fp:
+                recs.append({"op": "put", "id": key, "e": ent})
+        for key in deleted:
+            recs.append({"op": "del", "id": key})
+        if not recs:
+            return 0
+
+        written, size = self._append(recs)
+        self._meta_fp = meta_fp
+
+        if size >= self.compact_threshold:
+            self.compact_due = True
+        return written
+
+    def start_compaction(self, entities) -> None:
+        """🧠 ЛОГИКА: запустить отложенное сжатие (из потока, который владеет сценой)."""
+        self.compact_due = False
+        self._start_compaction(entities)
+
+    def rewrite(self, scene_data: dict) -> int:
+        """🧠 ЛОГИКА: полная перезапись основного файла + пустой журнал."""
+        with self._base_lock:
+            write_scene_file(self.scene_path, scene_data)
+            with self._lock:
+                if self.path.exists():
+                    self.path.unlink()
+        self.baseline(scene_data)
+        try:
+            return self.scene_path.stat().st_size
+        except OSError:
+            return 0
+
+    # -----------------------------
+    # Фоновое сжатие
+    # -----------------------------
+    def is_compacting(self) -> bool:
+        return self._compact_thread is not None and self._compact_thread.is_alive()
+
+    def _start_compaction(self, entities) -> None:
+        if self.is_compacting():
+            return
+
+        # ⚠️ mmap нашего же файла мешает заменить его (Windows) — отвязываем заранее,
+        # запомнив отпечатки всех строк, чтобы дальше работал обычный diff
+        if isinstance(entities, LazyEntityList) and entities.source is not None:
+            for ent in entities:
+                self._fp.setdefault(_entity_id(ent), _fingerprint(ent))
+            entities.detach()
+            self._known_all = True
+
+        self._compact_thread = threading.Thread(target=self.compact, name="scene-journal-compact", daemon=True)
+        self._compact_thread.start()
+
+    def compact(self) -> None:
+        """
+        🧠 ЛОГИКА (работает только с файлами, живые данные редактора не трогает):
+        1) запоминаем длину журнала N
+        2) base + первые N байт журнала -> новый основной файл (атомарно)
+        3) в журнале оставляем только то, что дописали после N
+        """
+        with self._base_lock:
+            with self._lock:
+                if not self.path.exists():
+                    return
+                upto = self.path.stat().st_size
+
+            base = read_scene_file(self.scene_path) if self.scene_path.exists() else {"entities": []}
+            apply_journal_records(base, read_journal_records(self.path, limit_bytes=upto))
+            write_scene_file(self.scene_path, base)
+
+            with self._lock:
+                with open(self.path, "rb") as f:
+                    f.seek(upto)
+                    tail = f.read()
+                if tail:
+                    tmp = self.path.with_name(self.path.name + ".tmp")
+                    with open(tmp, "wb") as f:
+                        f.write(tail)
+                    os.replace(tmp, self.path)
+                else:
+                    self.path.unlink()
+
+    def wait(self, timeout: float | None = None) -> None:
+        t = self._compact_thread
+        if t is not None:
+            t.join(timeout)
+
+
+# ============================================================
+# ✅ Реестр журналов (один на файл сцены)
+# ============================================================
+_JOURNALS: dict[str, SceneJournal] = {}
+
+
+def journal_for(scene_path: Path) -> SceneJournal:
+    key = str(Path(scene_path).resolve())
+    j = _JOURNALS.get(key)
+    if j is None:
+        j = SceneJournal(Path(scene_path))
+        _JOURNALS[key] = j
+    return j
@@ -0,0 +1,222 @@
+# engine/scene_stream.py
+# 🧠 ЛОГИКА: потоковое (инкрементальное) чтение *.scene.json
+#
+# json.load читает и разбирает весь файл за один вызов — на сценах в сотни MB это
+# секунды "зависшего" окна. Здесь файл читается кусками, массив "entities" разбирается
+# по одной сущности, а между кусками генератор отдаёт управление (и честный прогресс).
+#
+# Использование:
+#   gen = iter_parse_scene_json(path)
+#   for progress in gen: ...           # LoadProgress после каждого куска
+#   scene = <значение StopIteration>   # или: scene = yield from iter_parse_scene_json(path)
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Generator, Iterable
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+CHUNK_BYTES = 256 * 1024   # 🔧 МОЖНО МЕНЯТЬ: размер куска чтения (меньше = чаще прогресс, больше = быстрее)
+_BUF_COMPACT_AT = 64 * 1024  # 🧠 ЛОГИКА: когда отрезать разобранное начало буфера
+
+_WS = re.compile(r"[ \t\n\r]*")
+_DELIMITERS = frozenset(" \t\n\r,:]}")
+
+
+@dataclass
+class LoadProgress:
+    """🧠 ЛОГИКА: состояние загрузки после очередного куска."""
+    bytes_done: int
+    bytes_total: int
+    entities: int
+
+    @property
+    def percent(self) -> float:
+        if self.bytes_total <= 0:
+            return 100.0
+        return max(0.0, min(100.0, 100.0 * self.bytes_done / self.bytes_total))
+
+
+class SceneJsonStreamParser:
+    """
+    🧠 ЛОГИКА:
+    Возобновляемый разбор объекта сцены верхнего уровня.
+    feed() добавляет текст, parse() разбирает всё, что уже можно разобрать,
+    и останавливается, если данных не хватает (продолжит после следующего feed()).
+
+    Поле "entities" разбирается поэлементно, остальные поля — целиком через raw_decode.
+    """
+
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._state = "start"
+        self._key: str | None = None
+        self._need_comma = False  # 🧠 ЛОГИКА: перед следующим полем/элементом ожидается ','
+
+        self.scene: dict[str, Any] = {}
+        self.entities: list = []
+
+    @property
+    def done(self) -> bool:
+        return self._state == "done"
+
+    def feed(self, text: str) -> None:
+        if self._pos >= _BUF_COMPACT_AT:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        self._buf += text
+
+    def _skip_ws(self) -> bool:
+        """True — если после пробелов в буфере ещё есть символы."""
+        self._pos = _WS.match(self._buf, self._pos).end()
+        return self._pos < len(self._buf)
+
+    def _decode_value(self, final: bool) -> tuple[bool, Any]:
+        """
+        🧠 ЛОГИКА: (успех, значение).
+        Значение считаем полным, только если за ним уже виден разделитель:
+        число "12" в конце куска может оказаться "123", а "1500." — "1500.5".
+        """
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return False, None
+        if not final and (end >= len(self._buf) or self._buf[end] not in _DELIMITERS):
+            return False, None
+        self._pos = end
+        return True, value
+
+    def _error(self, expected: str) -> ValueError:
+        return ValueError(f"Некорректный JSON сцены: ожидалось {expected} (позиция {self._pos})")
+
+    def parse(self, final: bool = False) -> None:
+        """🧠 ЛОГИКА: разобрать всё, что есть в буфере. final=True — данных больше не будет."""
+        buf_len = len(self._buf)
+
+        while self._state != "done":
+            if not self._skip_ws():
+                break
+            ch = self._buf[self._pos]
+
+            if self._state == "start":
+                if ch == "\ufeff":  # BOM
+                    self._pos += 1
+                    continue
+                if ch != "{":
+                    raise self._error("'{'")
+                self._pos += 1
+                self._state = "member"
+
+            elif self._state == "member":
+                if ch == "}":
+                    self._pos += 1
+                    self._state = "done"
+                    continue
+                if self._need_comma:
+                    if ch != ",":
+                        raise self._error("',' или '}'")
+                    self._pos += 1
+                    self._need_comma = False
+                    continue
+                if ch != '"':
+                    raise self._error("имя поля")
+                ok, key = self._decode_value(final)
+                if not ok:
+                    break
+                self._key = key
+                self._state = "colon"
+
+            elif self._state == "colon":
+                if ch != ":":
+                    raise self._error("':'")
+                self._pos += 1
+                self._need_comma = False
+                self._state = "entities_open" if self._key == "entities" else "value"
+
+            elif self._state == "value":
+                ok, value = self._decode_value(final)
+                if not ok:
+                    break
+                self.scene[self._key] = value  # type: ignore[index]
+                self._need_comma = True
+                self._state = "member"
+
+            elif self._state == "entities_open":
+                if ch != "[":
+                    # "entities" не массив — берём как обычное значение
+                    self._state = "value"
+                    continue
+                self._pos += 1
+                self.scene["entities"] = self.entities
+                self._state = "entities"
+
+            elif self._state == "entities":
+                if ch == "]":
+                    self._pos += 1
+                    self._need_comma = True
+                    self._state = "member"
+                    continue
+                if self._need_comma:
+                    if ch != ",":
+                        raise self._error("',' или ']'")
+                    self._pos += 1
+                    self._need_comma = False
+                    continue
+                ok, ent = self._decode_value(final)
+                if not ok:
+                    break
+                self.entities.append(ent)
+                self._need_comma = True
+
+        if final and self._state != "done":
+            raise ValueError(f"Некорректный JSON сцены: файл оборвался (прочитано {buf_len} символов)")
+
+
+def iter_parse_scene_chunks(
+    chunks: Iterable[bytes],
+    bytes_total: int,
+) -> Generator[LoadProgress, None, dict]:
+    """
+    🧠 ЛОГИКА: разбор сцены из любого источника байтовых кусков (файл, распаковка и т.п.).
+    После каждого куска — LoadProgress, в конце (StopIteration.value) — dict сцены.
+    """
+    parser = SceneJsonStreamParser()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    done = 0
+
+    for chunk in chunks:
+        done += len(chunk)
+        parser.feed(utf8.decode(chunk))
+        parser.parse()
+        yield LoadProgress(done, bytes_total, len(parser.entities))
+
+    parser.feed(utf8.decode(b"", final=True))
+    parser.parse(final=True)
+    yield LoadProgress(bytes_total, bytes_total, len(parser.entities))
+    return parser.scene
+
+
+def _iter_file_chunks(path: Path, chunk_bytes: int):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_bytes)
+            if not chunk:
+                break
+            yield chunk
+
+
+def iter_parse_scene_json(path: Path, chunk_bytes: int = CHUNK_BYTES) -> Generator[LoadProgress, None, dict]:
+    """🧠 ЛОГИКА: потоковое чтение *.scene.json с диска."""
+    path = Path(path)
+    total = path.stat().st_size
+    return (yield from iter_parse_scene_chunks(_iter_file_chunks(path, int(chunk_bytes)), total))
@@ -0,0 +1,255 @@
+# engine/spatial_hash.py
+# 🧠 ЛОГИКА: пространственный хеш (равномерная сетка) для быстрых запросов "что лежит здесь"
+#
+# Мир делится на квадратные ячейки CELL_SIZE x CELL_SIZE. Каждый ключ (сущность) записан
+# во все ячейки, которые задевает его прямоугольник. Запрос точки смотрит одну ячейку,
+# запрос прямоугольника — только ячейки внутри него. Вставка/сдвиг/удаление — O(ячеек объекта).
+#
+# ✅ Хеш ничего не знает о сущностях: ключ — любое hashable (номер, handle строки и т.п.),
+# сопоставление ключ -> сущность и порядок отрисовки хранит вызывающий код (SceneViewport).
+#
+# ⚠️ Ключ с нечисловыми bounds (NaN/inf — битая сцена) в хеш не попадает: его нельзя разложить
+# по ячейкам, и ни один запрос его всё равно не нашёл бы. Запросы с такими координатами не падают.
+
+from __future__ import annotations
+
+import math
+from typing import Hashable, Iterable
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+CELL_SIZE = 256         # 🔧 МОЖНО МЕНЯТЬ: размер ячейки в единицах мира (~ несколько типичных сущностей)
+MAX_CELLS_PER_KEY = 64  # 🔧 МОЖНО МЕНЯТЬ: объект крупнее — в отдельный список "больших" (проверяются всегда)
+
+_FAR_CELL = 1 << 62  # 🧠 ЛОГИКА: номер ячейки для ±inf в запросах (дальше любой занятой)
+
+Bounds = tuple[float, float, float, float]  # x0, y0, x1, y1
+Cell = tuple[int, int]
+
+
+class SpatialHash:
+    """
+    🧠 ЛОГИКА:
+    cells:  {(cx, cy): set(ключей)}
+    bounds: {ключ: (x0, y0, x1, y1)} — чтобы знать, из каких ячеек удалять при сдвиге.
+    big:    ключи, которые задевают больше MAX_CELLS_PER_KEY ячеек (фон, огромные объекты).
+    """
+
+    def __init__(self, cell_size: int = CELL_SIZE) -> None:
+        self.cell_size = max(1, int(cell_size))
+        self._cells: dict[Cell, set] = {}
+        self._bounds: dict[Hashable, Bounds] = {}
+        self._big: set = set()
+
+    def __len__(self) -> int:
+        return len(self._bounds)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._bounds
+
+    @property
+    def cell_count(self) -> int:
+        return len(self._cells)
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._bounds.clear()
+        self._big.clear()
+
+    def bounds(self, key: Hashable) -> Bounds | None:
+        return self._bounds.get(key)
+
+    def items(self):
+        """🧠 ЛОГИКА: (ключ, bounds) всех ключей — для обзоров целиком (миникарта)."""
+        return self._bounds.items()
+
+    # -----------------------------
+    # Ячейки
+    # -----------------------------
+    def _range(self, x0: float, y0: float, x1: float, y1: float) -> tuple[int, int, int, int]:
+        cs = self.cell_size
+        try:
+            return (
+                math.floor(x0 / cs),
+                math.floor(y0 / cs),
+                math.floor(x1 / cs),
+                math.floor(y1 / cs),
+            )
+        except (ValueError, OverflowError):
+            return (_cell(x0, cs), _cell(y0, cs), _cell(x1, cs), _cell(y1, cs))
+
+    def _is_big(self, b: Bounds) -> bool:
+        cx0, cy0, cx1, cy1 = self._range(*b)
+        return (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > MAX_CELLS_PER_KEY
+
+    def _iter_cells(self, b: Bounds) -> Iterable[Cell]:
+        cx0, cy0, cx1, cy1 = self._range(*b)
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                yield (cx, cy)
+
+    @staticmethod
+    def _norm(x: float, y: float, w: float, h: float) -> Bounds:
+        x1 = x + w
+        y1 = y + h
+        return (min(x, x1), min(y, y1), max(x, x1), max(y, y1))
+
+    # -----------------------------
+    # Правки
+    # -----------------------------
+    def insert(self, key: Hashable, x: float, y: float, w: float, h: float) -> None:
+        self.insert_many(((key, x, y, w, h),))
+
+    def insert_many(self, items: Iterable[tuple[Hashable, float, float, float, float]]) -> None:
+        """🧠 ЛОГИКА: массовая вставка (построение индекса) — тот же insert, но без лишних вызовов."""
+        cs = self.cell_size
+        cells = self._cells
+        bounds = self._bounds
+        floor = math.floor
+        for key, x, y, w, h in items:
+            if key in bounds:
+                self.remove(key)
+            x1 = x + w
+            y1 = y + h
+            if x1 < x:
+                x, x1 = x1, x
+            if y1 < y:
+                y, y1 = y1, y
+            try:
+                cx0 = floor(x / cs)
+                cy0 = floor(y / cs)
+                cx1 = floor(x1 / cs)
+                cy1 = floor(y1 / cs)
+            except (ValueError, OverflowError):
+                continue  # ⚠️ NaN/inf — ключ в хеш не кладём (см. шапку)
+            bounds[key] = (x, y, x1, y1)
+            if cx0 == cx1 and cy0 == cy1:
+                # ✅ частый случай: объект меньше ячейки
+                bucket = cells.get((cx0, cy0))
+                if bucket is None:
+                    cells[(cx0, cy0)] = {key}
+                else:
+                    bucket.add(key)
+                continue
+            if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > MAX_CELLS_PER_KEY:
+                self._big.add(key)
+                continue
+            for cy in range(cy0, cy1 + 1):
+                for cx in range(cx0, cx1 + 1):
+                    bucket = cells.get((cx, cy))
+                    if bucket is None:
+                        cells[(cx, cy)] = {key}
+                    else:
+                        bucket.add(key)
+
+    def remove(self, key: Hashable) -> None:
+        b = self._bounds.pop(key, None)
+        if b is None:
+            return
+        if key in self._big:
+            self._big.discard(key)
+            return
+        cells = self._cells
+        for cell in self._iter_cells(b):
+            bucket = cells.get(cell)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del cells[cell]
+
+    def move(self, key: Hashable, x: float, y: float, w: float, h: float) -> None:
+        """🧠 ЛОГИКА: сдвиг; если набор ячеек не поменялся — только обновляем bounds."""
+        old = self._bounds.get(key)
+        b = self._norm(x, y, w, h)
+        if (
+            old is not None
+            and key not in self._big
+            and all(map(math.isfinite, b))
+            and self._range(*old) == self._range(*b)
+        ):
+            self._bounds[key] = b
+            return
+        self.insert(key, x, y, w, h)
+
+    def move_many(self, items: Iterable[tuple[Hashable, float, float, float, float]]) -> None:
+        """
+        🧠 ЛОГИКА: массовый сдвиг (групповой drag): кто остался в тех же ячейках — только bounds,
+        остальные перекладываются одной insert_many.
+        """
+        cs = self.cell_size
+        bounds = self._bounds
+        big = self._big
+        floor = math.floor
+        moved = []
+        for key, x, y, w, h in items:
+            x1 = x + w
+            y1 = y + h
+            if x1 < x:
+                x, x1 = x1, x
+            if y1 < y:
+                y, y1 = y1, y
+            old = bounds.get(key)
+            try:
+                same = (
+                    old is not None
+                    and key not in big
+                    and floor(old[0] / cs) == floor(x / cs)
+                    and floor(old[1] / cs) == floor(y / cs)
+                    and floor(old[2] / cs) == floor(x1 / cs)
+                    and floor(old[3] / cs) == floor(y1 / cs)
+                )
+            except (ValueError, OverflowError):
+                same = False  # NaN/inf: insert_many уберёт ключ из хеша
+            if same:
+                bounds[key] = (x, y, x1, y1)
+                continue
+            moved.append((key, x, y, x1 - x, y1 - y))
+        if moved:
+            self.insert_many(moved)
+
+    # -----------------------------
+    # Запросы
+    # -----------------------------
+    def query_point(self, x: float, y: float) -> set:
+        """🧠 ЛОГИКА: ключи из ячейки точки (кандидаты; точное попадание проверяет вызывающий)."""
+        cs = self.cell_size
+        out = set(self._cells.get((_cell(x, cs), _cell(y, cs)), ()))
+        if self._big:
+            bounds = self._bounds
+            out.update(k for k in self._big if _overlaps(bounds[k], x, y, x, y))
+        return out
+
+    def query_rect(self, x: float, y: float, w: float, h: float) -> set:
+        """🧠 ЛОГИКА: ключи, чьи bounds пересекают прямоугольник (x, y, w, h)."""
+        qx0, qy0, qx1, qy1 = self._norm(x, y, w, h)
+        cx0, cy0, cx1, cy1 = self._range(qx0, qy0, qx1, qy1)
+        cells = self._cells
+        out: set = set()
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(cells):
+            # ✅ запрос шире всех занятых ячеек — обходим только занятые
+            for (cx, cy), bucket in cells.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    out |= bucket
+        else:
+            for cy in range(cy0, cy1 + 1):
+                for cx in range(cx0, cx1 + 1):
+                    bucket = cells.get((cx, cy))
+                    if bucket:
+                        out |= bucket
+        out |= self._big
+        bounds = self._bounds
+        return {k for k in out if _overlaps(bounds[k], qx0, qy0, qx1, qy1)}
+
+
+def _cell(v: float, cs: int) -> int:
+    """🧠 ЛОГИКА: номер ячейки координаты; inf — "очень далеко", NaN — ячейка 0 (bounds с NaN не пересекаются ни с чем)."""
+    if math.isnan(v):
+        return 0
+    if math.isinf(v):
+        return _FAR_CELL if v > 0 else -_FAR_CELL
+    return math.floor(v / cs)
+
+
+def _overlaps(b: Bounds, x0: float, y0: float, x1: float, y1: float) -> bool:
+    return b[0] <= x1 and x0 <= b[2] and b[1] <= y1 and y0 <= b[3]
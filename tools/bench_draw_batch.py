@@ -0,0 +1,109 @@
+# tools/bench_draw_batch.py
+# 🧠 ЛОГИКА: сколько стоит вывод по одному вызову на элемент и сколько — пачкой (editor/draw_batch.py)
+#
+# Рисуем N "сущностей" как во viewport (залитый прямоугольник + подпись) двумя способами:
+#   direct — pygame.draw.rect + screen.blit на каждый элемент (как было);
+#   batch  — DrawBatch.fill + DrawBatch.blit, один Surface.blits/fblits на кадр.
+# Картинки обоих способов сравниваются попиксельно.
+#
+# ⚠️ В pygame 2.x сам blits() почти не дешевле цикла blit() — выигрыш даёт заливка кусками
+# заготовки цвета вместо draw.rect. В pygame-ce пачка уходит через fblits() и экономит ещё
+# и на вызовах. Совсем мелкие прямоугольники (< ~12 px) пачкой не быстрее: там время съедает
+# сборка кортежей в Python.
+#
+# Пример:
+#   python tools/bench_draw_batch.py            (20000 элементов)
+#   python tools/bench_draw_batch.py 50000 20   (элементов, повторов)
+
+from pathlib import Path
+import os
+import random
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # окно не нужно — меряем только вывод в поверхность
+
+import pygame  # noqa: E402
+
+from editor.draw_batch import DrawBatch  # noqa: E402
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+SCREEN_SIZE = (1280, 720)  # 🔧 МОЖНО МЕНЯТЬ
+ITEM_MIN_SIDE = 16         # 🔧 МОЖНО МЕНЯТЬ: стороны прямоугольников (типичные сущности сцены ~40x30)
+ITEM_MAX_SIDE = 64
+FILL_COLOR = (235, 235, 240)
+TEXT_COLOR = (200, 200, 200)
+
+
+def _make_items(n: int, labels: list[pygame.Surface]) -> list[tuple[pygame.Rect, pygame.Surface]]:
+    rnd = random.Random(18)
+    w, h = SCREEN_SIZE
+    items = []
+    for i in range(n):
+        r = pygame.Rect(rnd.randint(0, w), rnd.randint(0, h), rnd.randint(ITEM_MIN_SIDE, ITEM_MAX_SIDE), rnd.randint(ITEM_MIN_SIDE, ITEM_MAX_SIDE))
+        items.append((r, labels[i % len(labels)]))
+    return items
+
+
+def _draw_direct(screen: pygame.Surface, items) -> None:
+    for r, label in items:
+        pygame.draw.rect(screen, FILL_COLOR, r, 0)
+        screen.blit(label, (r.x, r.y - 18))
+
+
+def _draw_batch(screen: pygame.Surface, items) -> None:
+    out = DrawBatch(screen)
+    for r, label in items:
+        out.fill(FILL_COLOR, r)
+        out.blit(label, (r.x, r.y - 18))
+    out.flush()
+
+
+def _best_ms(fn, screen, items, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        screen.fill((0, 0, 0))
+        t0 = time.perf_counter()
+        fn(screen, items)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def main():
+    if len(sys.argv) > 3:
+        print("Использование: python tools/bench_draw_batch.py [элементов] [повторов]")
+        sys.exit(2)
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    font = pygame.font.Font(None, 16)
+    labels = [font.render(str(i), True, TEXT_COLOR).convert_alpha() for i in range(100)]
+    items = _make_items(n, labels)
+
+    direct_ms = _best_ms(_draw_direct, screen, items, repeats)
+    direct_px = pygame.image.tobytes(screen, "RGB")
+    batch_ms = _best_ms(_draw_batch, screen, items, repeats)
+    batch_px = pygame.image.tobytes(screen, "RGB")
+
+    calls = 2 * n  # прямоугольник + подпись
+    print(f"[BENCH] сущностей: {n}, элементов вывода: {calls}, лучший из {repeats}")
+    print(f"[BENCH] direct: {direct_ms:8.2f} ms  ({direct_ms * 1000 / calls:.2f} us/элемент, {calls} вызовов)")
+    print(f"[BENCH] batch:  {batch_ms:8.2f} ms  ({batch_ms * 1000 / calls:.2f} us/элемент, 1 вызов blits)")
+    print(f"[BENCH] экономия: {(direct_ms - batch_ms) * 1000 / calls:.2f} us/элемент, x{direct_ms / max(batch_ms, 1e-9):.2f}")
+    print(f"[BENCH] картинка совпадает: {'да' if direct_px == batch_px else 'НЕТ'}")
+
+    pygame.quit()
+    if direct_px != batch_px:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# tools/bench_rect_raster.py
+# 🧠 ЛОГИКА: сколько стоит заливка N прямоугольников по вызову на каждый и сколько — в пиксели через NumPy
+#
+# Рисуем N залитых прямоугольников одного цвета (как сущности viewport без подписей) тремя способами:
+#   draw.rect — pygame.draw.rect на каждый прямоугольник (как было до пакетного вывода);
+#   batch     — DrawBatch.fill на каждый, один Surface.blits (editor/draw_batch.py, по умолчанию);
+#   surfarray — rect_raster.fill_rects: колонки NumPy -> surfarray.pixels2d (editor/rect_raster.py).
+# Координаты для draw.rect / batch — уже списки Python, для surfarray — массивы (как колонки EntityStore).
+# Картинки всех способов сравниваются попиксельно.
+#
+# Пример:
+#   python tools/bench_rect_raster.py              (1000, 10000 и 100000 прямоугольников)
+#   python tools/bench_rect_raster.py 50000 20     (прямоугольников, повторов)
+
+from pathlib import Path
+import os
+import random
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # окно не нужно — меряем только вывод в поверхность
+
+import numpy as np  # noqa: E402
+import pygame  # noqa: E402
+
+from editor import rect_raster  # noqa: E402
+from editor.draw_batch import DrawBatch  # noqa: E402
+
+# ============================================================
+# 🟡 ИЗМЕНЯЕМЫЕ ПАРАМЕТРЫ
+# ============================================================
+SCREEN_SIZE = (1280, 720)  # 🔧 МОЖНО МЕНЯТЬ
+ITEM_MIN_SIDE = 1          # 🔧 МОЖНО МЕНЯТЬ: стороны прямоугольников (сущности при отдалении — единицы px)
+ITEM_MAX_SIDE = 24
+FILL_COLOR = (235, 235, 240)
+DEFAULT_COUNTS = (1000, 10000, 100000)
+
+
+def _make_rects(n: int) -> tuple[list[int], list[int], list[int], list[int]]:
+    rnd = random.Random(23)
+    w, h = SCREEN_SIZE
+    xs = [rnd.randint(0, w) for _ in range(n)]
+    ys = [rnd.randint(0, h) for _ in range(n)]
+    ws = [rnd.randint(ITEM_MIN_SIDE, ITEM_MAX_SIDE) for _ in range(n)]
+    hs = [rnd.randint(ITEM_MIN_SIDE, ITEM_MAX_SIDE) for _ in range(n)]
+    return xs, ys, ws, hs
+
+
+def _draw_rect(screen: pygame.Surface, cols) -> None:
+    for r in zip(*cols):
+        pygame.draw.rect(screen, FILL_COLOR, r, 0)
+
+
+def _draw_batch(screen: pygame.Surface, cols) -> None:
+    out = DrawBatch(screen)
+    for r in zip(*cols):
+        out.fill(FILL_COLOR, r)
+    out.flush()
+
+
+def _draw_surfarray(screen: pygame.Surface, arrays) -> None:
+    rect_raster.fill_rects(screen, FILL_COLOR, *arrays)
+
+
+def _best_ms(fn, screen, data, repeats: int) -> tuple[float, bytes]:
+    best = float("inf")
+    for _ in range(repeats):
+        screen.fill((0, 0, 0))
+        t0 = time.perf_counter()
+        fn(screen, data)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0, pygame.image.tobytes(screen, "RGB")
+
+
+def main():
+    if len(sys.argv) > 3:
+        print("Использование: python tools/bench_rect_raster.py [прямоугольников] [повторов]")
+        sys.exit(2)
+
+    counts = (int(sys.argv[1]),) if len(sys.argv) > 1 else DEFAULT_COUNTS
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    if not rect_raster.available(screen):
+        print(f"[BENCH] surfarray недоступен для этой поверхности ({screen.get_bitsize()} бит)")
+        sys.exit(2)
+
+    same = True
+    for n in counts:
+        cols = _make_rects(n)
+        arrays = tuple(np.asarray(c, dtype=np.int64) for c in cols)
+        rect_ms, rect_px = _best_ms(_draw_rect, screen, cols, repeats)
+        batch_ms, batch_px = _best_ms(_draw_batch, screen, cols, repeats)
+        raster_ms, raster_px = _best_ms(_draw_surfarray, screen, arrays, repeats)
+        ok = rect_px == batch_px == raster_px
+        same &= ok
+
+        print(f"[BENCH] прямоугольников: {n}, лучший из {repeats}")
+        print(f"[BENCH]   draw.rect: {rect_ms:8.2f} ms  ({rect_ms * 1000 / n:.2f} us/шт)")
+        print(f"[BENCH]   batch:     {batch_ms:8.2f} ms  ({batch_ms * 1000 / n:.2f} us/шт)")
+        print(f"[BENCH]   surfarray: {raster_ms:8.2f} ms  ({raster_ms * 1000 / n:.2f} us/шт)"
+              f"  x{rect_ms / max(raster_ms, 1e-9):.1f} к draw.rect, x{batch_ms / max(raster_ms, 1e-9):.1f} к batch")
+        print(f"[BENCH]   картинка совпадает: {'да' if ok else 'НЕТ'}")
+
+    pygame.quit()
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# tools/convert_scene.py
+# 🧠 ЛОГИКА: конвертер сцен JSON <-> binary <-> chunks (без потерь)
+#
+# Примеры:
+#   python tools/convert_scene.py scenes/main.scene.json scenes/main.scene.bin
+#   python tools/convert_scene.py scenes/main.scene.bin  scenes/main.scene.json
+#   python tools/convert_scene.py scenes/main.scene.json scenes/main.scene.chunks.json
+#
+# Формат источника определяется по сигнатуре файла, формат результата — по расширению.
+
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from engine.scene_io import convert_scene  # noqa: E402
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("Использование: python tools/convert_scene.py <источник> <результат>")
+        sys.exit(2)
+
+    src = Path(sys.argv[1])
+    dst = Path(sys.argv[2])
+
+    if not src.exists():
+        print(f"[CONVERT ERROR] Файл не найден: {src}")
+        sys.exit(1)
+
+    convert_scene(src, dst)
+    print(f"[OK] {src} -> {dst}")
+
+
+if __name__ == "__main__":
+    main()
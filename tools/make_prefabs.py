@@ -0,0 +1,51 @@
+# tools/make_prefabs.py
+# 🧠 ЛОГИКА: вынести повторяющиеся сущности сцены в префабы (<проект>/prefabs/*.prefab.json)
+#
+# Сущности с одинаковыми полями (кроме id/x/y) превращаются в экземпляры общего шаблона:
+#   {"id": 17, "type": "rect", "w": 40, "h": 30, "x": 320, "y": 64}
+#   -> {"id": 17, "x": 320, "y": 64, "prefab": "auto_rect_0"}
+#
+# Пример:
+#   python tools/make_prefabs.py projects/MyGame/scenes/main.scene.json
+#   python tools/make_prefabs.py projects/MyGame/scenes/main.scene.json 100   (мин. число повторов)
+#
+# ⚠️ Сцена перезаписывается; журнал сцены (если есть) сначала применяется и обрезается.
+
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from engine.prefabs import extract_prefabs, prefab_library_for  # noqa: E402
+from engine.scene_journal import journal_for, replay_journal  # noqa: E402
+from engine.scene_io import read_scene_file  # noqa: E402
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        print("Использование: python tools/make_prefabs.py <сцена> [мин. повторов]")
+        sys.exit(2)
+
+    scene_path = Path(sys.argv[1])
+    min_count = int(sys.argv[2]) if len(sys.argv) == 3 else 2
+
+    if not scene_path.exists():
+        print(f"[PREFABS ERROR] Файл не найден: {scene_path}")
+        sys.exit(1)
+
+    scene_data = read_scene_file(scene_path)
+    replay_journal(scene_path, scene_data)
+    entities = scene_data.get("entities", [])
+    detach = getattr(entities, "detach", None)  # *.scene.bin: закрыть mmap перед перезаписью
+    if detach is not None:
+        detach()
+    scene_data["entities"] = list(entities)
+
+    made, instances = extract_prefabs(scene_data, prefab_library_for(scene_path), min_count=min_count)
+    journal_for(scene_path).rewrite(scene_data)
+    print(f"[OK] префабов: {made}, экземпляров: {instances} -> {scene_path}")
+
+
+if __name__ == "__main__":
+    main()